@@ -0,0 +1,161 @@
+"""
+VARDA Batch Classification
+Deferred review classification through the OpenAI Batch API for overnight sweeps.
+Requests are written to JSONL, submitted, polled until done and merged back by custom_id.
+"""
+
+import asyncio
+import io
+import json
+import os
+import uuid
+from types import SimpleNamespace
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+MAX_REQUESTS_PER_BATCH = 50000  # Batch API limit per input file
+FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+class PendingBatch:
+    """Collects chat completion requests in JSONL files, rotating at the per-batch request limit"""
+
+    def __init__(self, output_dir: str, timestamp: str):
+        self.directory = os.path.join(output_dir, "batches")
+        os.makedirs(self.directory, exist_ok=True)
+        self.prefix = os.path.join(self.directory, f"batch_{timestamp}")
+        self.paths = []
+        self.counts = []  # Requests per file in paths
+        self.count = 0
+        self._file = None
+        self._file_count = 0
+
+    def add(self, custom_id: str, body: dict):
+        if self._file is None or self._file_count >= MAX_REQUESTS_PER_BATCH:
+            self._rotate()
+        line = {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+        self._file.write(json.dumps(line, ensure_ascii=False) + "\n")
+        self._file_count += 1
+        self.counts[-1] += 1
+        self.count += 1
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        path = f"{self.prefix}_requests_{len(self.paths) + 1}.jsonl"
+        self.paths.append(path)
+        self.counts.append(0)
+        self._file = open(path, "w", encoding="utf-8")
+        self._file_count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+
+def submit_batch(client, requests_path: str, description: str = "") -> str:
+    """Upload a requests file and create a batch job. Returns the batch id."""
+    with open(requests_path, "rb") as f:
+        input_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window=BATCH_COMPLETION_WINDOW,
+        metadata={"description": description} if description else None,
+    )
+    return batch.id
+
+
+async def wait_for_batch(client, batch_id: str, poll_seconds: float = 60, progress_callback=None):
+    """Poll a batch until it reaches a final status and return it"""
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status in FINAL_STATUSES:
+            return batch
+
+        if progress_callback:
+            counts = getattr(batch, "request_counts", None)
+            done = f" ({counts.completed}/{counts.total})" if counts else ""
+            progress_callback({"status": "batch_waiting", "batch_id": batch_id, "message": f"Batch {batch_id} {batch.status}{done}"})
+        await asyncio.sleep(poll_seconds)
+
+
+def download_batch_results(client, batch) -> dict:
+    """Map custom_id to the assistant message content (None for failed requests)"""
+    results = {}
+    for file_id in (batch.output_file_id, getattr(batch, "error_file_id", None)):
+        if not file_id:
+            continue
+        for line in client.files.content(file_id).text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            try:
+                content = item["response"]["body"]["choices"][0]["message"]["content"]
+            except (KeyError, IndexError, TypeError):
+                content = None
+            results.setdefault(item["custom_id"], content)
+    return results
+
+
+#######################################################################
+# LOCAL STAND-IN
+#######################################################################
+
+class LocalBatchClient:
+    """
+    In-process stand-in for the subset of the OpenAI client used by batch mode.
+    Each request body is answered by `responder(body) -> str`. Batches report
+    "in_progress" for `pending_polls` retrieves before completing.
+    """
+
+    def __init__(self, responder=None, pending_polls: int = 1):
+        self.responder = responder or (lambda body: json.dumps({
+            "is_violation": False, "confidence": 0.0, "violation_types": [], "reasoning": "Local stand-in"
+        }))
+        self.pending_polls = pending_polls
+        self._files = {}
+        self._batches = {}
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    def _create_file(self, file, purpose: str):
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        data = file.read() if hasattr(file, "read") else file
+        self._files[file_id] = data.decode("utf-8") if isinstance(data, bytes) else data
+        return SimpleNamespace(id=file_id, purpose=purpose)
+
+    def _file_content(self, file_id: str):
+        return SimpleNamespace(text=self._files[file_id])
+
+    def _create_batch(self, input_file_id: str, endpoint: str, completion_window: str, metadata=None):
+        batch_id = f"batch-{uuid.uuid4().hex[:12]}"
+        output = io.StringIO()
+        lines = [l for l in self._files[input_file_id].splitlines() if l.strip()]
+        for line in lines:
+            request = json.loads(line)
+            response = {"choices": [{"message": {"role": "assistant", "content": self.responder(request["body"])}}]}
+            output.write(json.dumps({"custom_id": request["custom_id"], "response": {"status_code": 200, "body": response}}) + "\n")
+        output_file = self._create_file(output.getvalue(), "batch_output")
+        self._batches[batch_id] = {
+            "polls_left": self.pending_polls,
+            "output_file_id": output_file.id,
+            "total": len(lines),
+        }
+        return self._retrieve_batch(batch_id, count_poll=False)
+
+    def _retrieve_batch(self, batch_id: str, count_poll: bool = True):
+        state = self._batches[batch_id]
+        done = state["polls_left"] <= 0
+        if count_poll and not done:
+            state["polls_left"] -= 1
+        return SimpleNamespace(
+            id=batch_id,
+            status="completed" if done else "in_progress",
+            output_file_id=state["output_file_id"] if done else None,
+            error_file_id=None,
+            request_counts=SimpleNamespace(total=state["total"], completed=state["total"] if done else 0, failed=0),
+        )
@@ -0,0 +1,115 @@
+"""
+VARDA Business Table
+Every place seen in a Maps search feed, persisted as one Parquet table with its
+rating, review count, category and zip code. New rating or review filters are
+re-applied with vectorized pandas queries instead of a rescrape, and only places
+that newly qualify are queued for review processing.
+"""
+
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+BUSINESS_TABLE_FILE = "businesses.parquet"
+
+COLUMNS = {
+    "place_key": "string",  # Place ID, or the URL when the feed item has none
+    "place_id": "string",
+    "name": "string",
+    "url": "string",
+    "rating": "float64",
+    "review_count": "int64",
+    "category": "string",
+    "zip_code": "string",
+    "scraped_at": "datetime64[ns]",
+    "processed_at": "datetime64[ns]",  # NaT until the business went through review processing
+}
+
+
+def _empty_frame() -> pd.DataFrame:
+    return pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype in COLUMNS.items()})
+
+
+class BusinessTable:
+    """One row per place and zip x category search it appeared in"""
+
+    def __init__(self, output_dir: str, filename: str = BUSINESS_TABLE_FILE):
+        os.makedirs(output_dir, exist_ok=True)
+        self.path = os.path.join(output_dir, filename)
+        self._lock = threading.Lock()
+        self._dirty = False
+        if os.path.exists(self.path):
+            self.df = pd.read_parquet(self.path).astype(COLUMNS)
+        else:
+            self.df = _empty_frame()
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def upsert(self, results: list, zip_code: str, category: str):
+        """Store an unfiltered search feed, refreshing rating and review count of known places"""
+        if not results:
+            return
+        rows = pd.DataFrame(results).reindex(columns=["place_id", "name", "url", "rating", "review_count"])
+        rows["place_id"] = rows["place_id"].fillna("")
+        rows["place_key"] = rows["place_id"].where(rows["place_id"] != "", rows["url"])
+        rows["category"] = category
+        rows["zip_code"] = str(zip_code)
+        rows["scraped_at"] = pd.Timestamp(datetime.now())
+        rows["rating"] = rows["rating"].fillna(0.0)
+        rows["review_count"] = rows["review_count"].fillna(0)
+
+        with self._lock:
+            # Keep processed_at of places already seen in this cell
+            key = ["place_key", "zip_code", "category"]
+            previous = self.df.set_index(key)["processed_at"]
+            rows["processed_at"] = previous.reindex(pd.MultiIndex.from_frame(rows[key])).to_numpy()
+            rows = rows.reindex(columns=list(COLUMNS)).astype(COLUMNS)
+
+            frames = [f for f in (self.df, rows) if len(f)]
+            self.df = pd.concat(frames, ignore_index=True).drop_duplicates(key, keep="last").reset_index(drop=True)
+            self._dirty = True
+
+    def query(self, min_rating: float, max_rating: float, min_reviews: int, zip_codes=None, categories=None) -> pd.DataFrame:
+        """Rows matching the filters, as one vectorized mask"""
+        df = self.df
+        mask = df["rating"].between(min_rating, max_rating) & (df["review_count"] >= min_reviews)
+        if zip_codes:
+            mask &= df["zip_code"].isin([str(z) for z in zip_codes])
+        if categories:
+            mask &= df["category"].isin(categories)
+        return df[mask]
+
+    def new_candidates(self, min_rating: float, max_rating: float, min_reviews: int, zip_codes=None, categories=None) -> pd.DataFrame:
+        """Matching places that were never processed, in any cell, one row per place"""
+        matches = self.query(min_rating, max_rating, min_reviews, zip_codes, categories)
+        processed = self.df.loc[self.df["processed_at"].notna(), "place_key"].unique()
+        matches = matches[~matches["place_key"].isin(processed)]
+        return matches.drop_duplicates("place_key")
+
+    def to_businesses(self, df: pd.DataFrame) -> list:
+        """Rows as the business dicts run_scraper queues"""
+        records = df[["place_id", "name", "url", "rating", "review_count", "category", "zip_code"]].astype(object)
+        return records.where(records.notna(), None).to_dict("records")
+
+    def mark_processed(self, business: dict):
+        place_key = business.get("place_id") or business.get("url")
+        if not place_key:
+            return
+        with self._lock:
+            mask = (self.df["place_key"] == place_key).to_numpy()
+            if mask.any():
+                self.df.loc[mask, "processed_at"] = pd.Timestamp(datetime.now())
+                self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = self.path + ".tmp"
+            self.df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
@@ -4,8 +4,6 @@ Run with: streamlit run dashboard.py
 """
 
 import streamlit as st
-import queue
-import threading
 import os
 
 # Page configuration - MUST be the FIRST Streamlit command
@@ -51,8 +49,8 @@ if ACCESS_PASSWORD:
         else:
             st.stop()
 
-import asyncio
 import pandas as pd
+from collections import deque
 from datetime import datetime
 import time
 import warnings
@@ -96,11 +94,16 @@ for logger_name in ["streamlit", "streamlit.runtime", "streamlit.runtime.scriptr
 # Import with error handling
 try:
     from varda_scraper import (
-        run_scraper, CATEGORIES, TIERS_TO_SCRAPE, 
+        CATEGORIES, TIERS_TO_SCRAPE, 
         MIN_RATING, MAX_RATING, MIN_REVIEWS,
-        MAX_REVIEWS_PER_BUSINESS, MIN_VIOLATIONS_TO_STOP,
-        OUTPUT_DIR, export_leads
+        MAX_REVIEWS_PER_BUSINESS, MIN_VIOLATIONS_TO_STOP, MAX_CLEAN_REVIEWS_TO_STOP,
+        PREFILTER_THRESHOLD, CLASSIFIER_BACKEND, LOCAL_MODEL_PATH, SEARCH_CACHE_TTL_HOURS,
+        CASCADE_LOW, CASCADE_HIGH, CLASSIFICATION_MODE, EXTRACTION_MODE, OUTPUT_DIR, export_leads
     )
+    from business_table import BusinessTable, BUSINESS_TABLE_FILE
+    from exporter import PARQUET_DIR, leads_to_wide, load_flagged_reviews, load_leads
+    from results_store import ResultsStore
+    from worker import ACTIVE_STATUSES, WorkerClient, WorkerError, ensure_worker
 except ValueError as e:
     # API key not set - show helpful message
     if "OPENAI_API_KEY" in str(e):
@@ -193,8 +196,6 @@ if 'progress' not in st.session_state:
     st.session_state.progress = {"status": "idle", "message": "Ready to start"}
 if 'csv_path' not in st.session_state:
     st.session_state.csv_path = None
-if 'scraper_thread' not in st.session_state:
-    st.session_state.scraper_thread = None
 if 'scraper_done' not in st.session_state:
     st.session_state.scraper_done = False
 if 'logs' not in st.session_state:
@@ -205,130 +206,134 @@ if 'current_category' not in st.session_state:
     st.session_state.current_category = None
 if 'current_area' not in st.session_state:
     st.session_state.current_area = None
-# Use a module-level queue that can be accessed from any thread without warnings
-_progress_queue = queue.Queue()
+if 'allocation' not in st.session_state:
+    st.session_state.allocation = []
+if 'job_id' not in st.session_state:
+    st.session_state.job_id = None
+if 'event_offset' not in st.session_state:
+    st.session_state.event_offset = 0
+if 'subscriber_id' not in st.session_state:
+    st.session_state.subscriber_id = None
+if 'render_ms' not in st.session_state:
+    st.session_state.render_ms = {}
 
-if 'progress_queue' not in st.session_state:
-    st.session_state.progress_queue = _progress_queue
 
-def update_progress(update):
-    """Update progress using thread-safe queue - can be called from any thread"""
-    # Use module-level queue to avoid accessing st.session_state from thread
-    try:
-        _progress_queue.put(update, block=False)
-    except queue.Full:
-        # Queue is full, skip this update
-        pass
-    except:
-        # Any other error, skip silently
-        pass
+@st.cache_resource
+def get_worker() -> WorkerClient:
+    """Client for the worker process that runs the scraper, started on first use"""
+    client = WorkerClient()
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    ensure_worker(client, output_dir=OUTPUT_DIR)
+    return client
 
-def process_progress_queue():
-    """Process all pending updates from the queue - call this from main thread"""
+
+def apply_update(update):
+    """Fold one progress event from the worker into the session state"""
     import datetime
     
-    processed_count = 0
-    max_updates_per_rerun = 50  # Limit updates per rerun to avoid blocking
+    if update.get("job_id", st.session_state.job_id) != st.session_state.job_id:
+        return  # Belongs to another job
+    
+    if update.get("status") == "counters":
+        # Periodic run totals - feed the statistics panel, not the log
+        st.session_state.stats = {**st.session_state.stats, **update.get("counters", {})}
+        return
+    
+    # Add log entry
+    log_entry = {
+        "timestamp": datetime.datetime.now().strftime("%H:%M:%S"),
+        "status": update.get("status", "info"),
+        "message": update.get("message", ""),
+        "data": {k: v for k, v in update.items() if k not in ["status", "message"]}
+    }
+    st.session_state.logs.append(log_entry)
+    
+    # Keep only last 500 log entries
+    if len(st.session_state.logs) > 500:
+        st.session_state.logs = st.session_state.logs[-500:]
+    
+    # Update progress
+    st.session_state.progress = update
     
-    # Use module-level queue to avoid session state access issues
-    while processed_count < max_updates_per_rerun:
+    # Update current state
+    if update.get("status") == "area_start":
+        st.session_state.current_area = update.get("area", "")
+    elif update.get("status") == "category_start":
+        st.session_state.current_category = update.get("category", "")
+    elif update.get("status") == "business_processing":
+        st.session_state.current_business = update.get("business_name", "")
+    elif update.get("status") == "allocation":
+        st.session_state.allocation = update.get("allocation", [])
+    
+    if update.get("status") == "lead_found":
+        lead = update.get("lead", {})
+        # Avoid duplicates
+        if not any(l.get("name") == lead.get("name") and l.get("website") == lead.get("website") 
+                   for l in st.session_state.leads):
+            st.session_state.leads.append(lead)
+    elif update.get("status") == "completed":
+        st.session_state.stats = {**st.session_state.stats, **update.get("stats", {})}
+        st.session_state.scraping = False
+        st.session_state.scraper_done = True
+    elif update.get("status") in ("error", "cancelled"):
+        st.session_state.progress = {"status": update["status"], "message": update.get("message", "Unknown error")}
+        st.session_state.scraping = False
+        st.session_state.scraper_done = True
+
+def follow_job(job_id):
+    """Point this session at a worker job; its events are replayed from the start"""
+    if st.session_state.subscriber_id:
         try:
-            update = _progress_queue.get_nowait()
-            processed_count += 1
-            
-            # Initialize logs if not exists
-            if 'logs' not in st.session_state:
-                st.session_state.logs = []
-            
-            # Add log entry
-            log_entry = {
-                "timestamp": datetime.datetime.now().strftime("%H:%M:%S"),
-                "status": update.get("status", "info"),
-                "message": update.get("message", ""),
-                "data": {k: v for k, v in update.items() if k not in ["status", "message"]}
-            }
-            st.session_state.logs.append(log_entry)
-            
-            # Keep only last 500 log entries
-            if len(st.session_state.logs) > 500:
-                st.session_state.logs = st.session_state.logs[-500:]
-            
-            # Initialize other session state variables if needed
-            if 'progress' not in st.session_state:
-                st.session_state.progress = {}
-            if 'leads' not in st.session_state:
-                st.session_state.leads = []
-            if 'stats' not in st.session_state:
-                st.session_state.stats = {}
-            
-            # Update progress
-            st.session_state.progress = update
-            
-            # Update current state
-            if update.get("status") == "area_start":
-                st.session_state.current_area = update.get("area", "")
-            elif update.get("status") == "category_start":
-                st.session_state.current_category = update.get("category", "")
-            elif update.get("status") == "business_processing":
-                st.session_state.current_business = update.get("business_name", "")
-            
-            if update.get("status") == "lead_found":
-                lead = update.get("lead", {})
-                # Avoid duplicates
-                if not any(l.get("name") == lead.get("name") and l.get("website") == lead.get("website") 
-                           for l in st.session_state.leads):
-                    st.session_state.leads.append(lead)
-            elif update.get("status") == "completed":
-                st.session_state.stats = update.get("stats", {})
-                st.session_state.scraping = False
-                st.session_state.scraper_done = True
-            elif update.get("status") == "error":
-                st.session_state.progress = {"status": "error", "message": update.get("message", "Unknown error")}
-                st.session_state.scraping = False
-                st.session_state.scraper_done = True
-        except queue.Empty:
-            break
+            get_worker().unsubscribe(st.session_state.subscriber_id)
+        except WorkerError:
+            pass
+    st.session_state.job_id = job_id
+    st.session_state.event_offset = 0
+    st.session_state.subscriber_id = None
+    st.query_params["job"] = job_id  # So a refresh of this page finds its job again
+
+def process_progress_queue():
+    """Read this session's subscription to its job since the last rerun - call this from main thread"""
+    max_updates_per_rerun = 200  # Limit updates per rerun to avoid blocking
+    if not st.session_state.job_id:
+        return 0, False
+    
+    worker = get_worker()
+    try:
+        if not st.session_state.subscriber_id:
+            # Resume where this session left off (the subscription may have expired while the tab was idle)
+            st.session_state.subscriber_id = worker.subscribe(st.session_state.job_id, st.session_state.event_offset)
+        batch = worker.read(st.session_state.subscriber_id, limit=max_updates_per_rerun)
+    except WorkerError as e:
+        if e.status == 404 and st.session_state.subscriber_id:
+            st.session_state.subscriber_id = None  # Expired - resubscribe on the next rerun
+            return 0, True
+        if e.status == 404:
+            # The worker dropped the job a while after it finished - its results are in the results store
+            st.session_state.scraping = False
+            st.session_state.scraper_done = True
+            return 0, False
+        st.session_state.progress = {"status": "error", "message": f"Lost contact with the worker: {e}"}
+        st.session_state.scraping = False
+        return 0, False
+    
+    if batch["dropped"]:
+        apply_update({"status": "info", "message": f"⚠️ {batch['dropped']} progress events skipped - the dashboard fell behind"})
+    for update in batch["events"]:
+        try:
+            apply_update(update)
         except Exception as e:
             # Log error but continue processing
             print(f"Error processing progress update: {e}")
-            break
+        st.session_state.event_offset = update["offset"] + 1
     
-    return processed_count
-
-def run_scraper_thread(zip_codes, filters=None):
-    """Run scraper in a separate thread"""
-    try:
-        import sys
-        import platform
-        
-        # On Windows, we need to use ProactorEventLoopPolicy for subprocess support
-        if platform.system() == 'Windows':
-            asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
-        
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            leads, training_data, stats = loop.run_until_complete(
-                run_scraper(zip_codes=zip_codes, progress_callback=update_progress, filters=filters)
-            )
-        finally:
-            loop.close()
-    except Exception as e:
-        import traceback
-        error_msg = f"Error during scraping: {str(e)}\n{traceback.format_exc()}"
-        print(f"ERROR: {error_msg}")  # Print to console for debugging
-        
-        # Provide helpful error message for common issues
-        error_str = str(e)
-        if "Executable doesn't exist" in error_str or "playwright install" in error_str.lower():
-            user_message = "Playwright browsers not installed. Please run: playwright install chromium"
-        elif "NotImplementedError" in error_str:
-            user_message = "Windows event loop issue. Please restart the dashboard."
-        else:
-            user_message = f"Error: {str(e)[:200]}"  # Truncate long errors
-        
-        # Can't use st.error() from thread, so update progress instead
-        update_progress({"status": "error", "message": user_message})
+    # Job ended without a final event we understood (e.g. cancelled while queued)
+    if batch["closed"] and not st.session_state.scraper_done:
+        st.session_state.scraping = False
+        st.session_state.scraper_done = True
+    
+    more_pending = len(batch["events"]) == max_updates_per_rerun
+    return len(batch["events"]), more_pending
 
 # Header
 st.markdown('<div class="main-header">🛡️ VARDA Lead Generation Scraper</div>', unsafe_allow_html=True)
@@ -516,89 +521,263 @@ with st.sidebar:
         step=1,
         help="Stop analyzing reviews once this many violations are found"
     )
+    
+    max_clean_reviews = st.number_input(
+        "Stop After Clean Reviews",
+        min_value=5,
+        max_value=200,
+        value=int(MAX_CLEAN_REVIEWS_TO_STOP),
+        step=5,
+        help="Stop scrolling a business once this many reviews were analyzed without any violation"
+    )
+    
+    time_budget_minutes = st.number_input(
+        "Time Budget (minutes)",
+        min_value=0,
+        value=0,
+        step=15,
+        help="Stop the run after this long (0 = no limit). Businesses are processed by expected lead yield, so the most promising ones go first."
+    )
+    
+    max_businesses = st.number_input(
+        "Businesses Budget",
+        min_value=0,
+        value=0,
+        step=50,
+        help="Process at most this many businesses (0 = no limit). The budget is split across zip codes and categories by past lead yield, keeping a small share for exploration."
+    )
+    
+    classifier_backend = st.selectbox(
+        "Classifier",
+        ["openai", "local", "cascade"],
+        index=["openai", "local", "cascade"].index(CLASSIFIER_BACKEND) if CLASSIFIER_BACKEND in ["openai", "local", "cascade"] else 0,
+        help="openai: gpt-4o-mini per review. local: CPU model trained on past AI verdicts (python local_classifier.py train). "
+             "cascade: local model decides clear cases, only uncertain reviews go to gpt-4o-mini."
+    )
+    if classifier_backend in ("local", "cascade") and not os.path.exists(LOCAL_MODEL_PATH):
+        st.warning("⚠️ No local model found. Run: python local_classifier.py train")
+    
+    cascade_band = (CASCADE_LOW, CASCADE_HIGH)
+    if classifier_backend == "cascade":
+        cascade_band = st.slider(
+            "Cascade Uncertainty Band",
+            min_value=0.0,
+            max_value=1.0,
+            value=(float(CASCADE_LOW), float(CASCADE_HIGH)),
+            step=0.05,
+            help="Reviews whose local violation score falls inside this band are sent to gpt-4o-mini"
+        )
+    
+    classification_mode = st.selectbox(
+        "Classification Mode",
+        ["realtime", "batch"],
+        index=1 if CLASSIFICATION_MODE == "batch" else 0,
+        help="batch: queue reviews during the sweep and classify them through the OpenAI Batch API at the end "
+             "(half price, leads appear only once the batch completes - best for overnight runs)"
+    )
+    
+    extraction_mode = st.selectbox(
+        "Extraction Mode",
+        ["dom", "network"],
+        index=1 if EXTRACTION_MODE == "network" else 0,
+        help="network: read businesses and reviews from the data Google Maps downloads instead of the rendered page "
+             "(faster, falls back to the page when the data can't be decoded)"
+    )
+    
+    search_cache_ttl_hours = st.number_input(
+        "Search Cache (hours)",
+        min_value=0,
+        value=int(SEARCH_CACHE_TTL_HOURS),
+        step=6,
+        help="Reuse Maps search results for the same zip code and category for this long, even with different filters (0 = always search again)"
+    )
+    
+    prefilter_threshold = st.slider(
+        "Pre-filter Threshold",
+        min_value=0.0,
+        max_value=1.0,
+        value=float(PREFILTER_THRESHOLD),
+        step=0.05,
+        help="Reviews scoring below this on the local keyword pre-filter skip the AI check. 0 sends every review to the AI."
+    )
 
-# Process progress queue - this handles updates from the background thread
-updates_processed = process_progress_queue()
+# A job keeps running in the worker across page refreshes and dashboard restarts - pick up the one
+# this page started (its ID is in the URL), never another session's
+if not st.session_state.job_id and st.query_params.get("job"):
+    try:
+        own_job = get_worker().status(st.query_params["job"])
+    except WorkerError as e:
+        own_job = None
+        if e.status == 404:
+            del st.query_params["job"]  # Finished long ago and dropped by the worker
+    if own_job:
+        follow_job(own_job["job_id"])
+        st.session_state.scraping = own_job["status"] in ACTIVE_STATUSES
+        st.session_state.scraper_done = not st.session_state.scraping
 
-# Auto-refresh when scraping is active
-if st.session_state.scraping:
-    # Check if thread is still alive
-    if st.session_state.scraper_thread and not st.session_state.scraper_thread.is_alive():
-        if not st.session_state.scraper_done:
-            # Thread finished but we didn't get a completion message
-            st.session_state.scraping = False
-            st.session_state.progress = {"status": "error", "message": "Scraper thread ended unexpectedly"}
-    
-    # Only rerun if we processed updates or if there are more in queue
-    # Use a small delay to prevent excessive reruns
-    queue_has_items = not _progress_queue.empty()
-    if updates_processed > 0 or queue_has_items:
-        # Small delay to batch updates
-        time.sleep(0.1)
-        st.rerun()
-    elif updates_processed == 0 and st.session_state.scraping:
-        # No updates, but still scraping - refresh every 1.5 seconds to check for new updates
-        if 'last_refresh' not in st.session_state:
-            st.session_state.last_refresh = time.time()
-        elif time.time() - st.session_state.last_refresh > 1.5:
-            st.session_state.last_refresh = time.time()
-            st.rerun()
+@st.cache_resource(max_entries=1)
+def load_business_table(mtime: float) -> BusinessTable:
+    """Read the business table once per change on disk"""
+    return BusinessTable(OUTPUT_DIR)
 
-# Main content area
-col1, col2 = st.columns([2, 1])
 
-with col1:
-    # Control buttons
-    if not st.session_state.scraping:
-        if st.button("🚀 Start Scraping", type="primary", use_container_width=True):
-            if not zip_codes:
-                st.error("Please enter at least one zip code!")
-            else:
-                if not selected_categories:
-                    st.error("Please select at least one category!")
-                elif not zip_codes:
-                    st.error("Please enter at least one zip code!")
-                else:
-                    st.session_state.scraping = True
-                    st.session_state.leads = []
-                    st.session_state.stats = {}
-                    st.session_state.progress = {"status": "starting", "message": "Initializing..."}
-                    st.session_state.scraper_done = False
-                    st.session_state.logs = []  # Clear logs
-                    st.session_state.current_business = None
-                    st.session_state.current_category = None
-                    st.session_state.current_area = None
-                    
-                    # Send initial progress message immediately
-                    import datetime
-                    initial_log = {
-                        "timestamp": datetime.datetime.now().strftime("%H:%M:%S"),
-                        "status": "starting",
-                        "message": "Starting scraper...",
-                        "data": {}
-                    }
-                    st.session_state.logs.append(initial_log)
-                    
-                    # Prepare filter parameters
-                    filters = {
-                        "min_rating": min_rating,
-                        "max_rating": max_rating,
-                        "min_reviews": min_reviews,
-                        "max_reviews_per_business": max_reviews_per_business,
-                        "min_violations_to_stop": min_violations_to_stop,
-                        "categories": selected_categories,  # Pass selected categories
-                        "country": country  # Pass country
-                    }
-                    # Start scraper in background thread
-                    thread = threading.Thread(target=run_scraper_thread, args=(zip_codes, filters), daemon=True)
-                    thread.start()
-                    st.session_state.scraper_thread = thread
-                    st.rerun()
-    else:
-        if st.button("⏹️ Stop Scraping", type="secondary", use_container_width=True):
-            st.session_state.scraping = False
-            st.warning("Scraping stopped. Results may be incomplete.")
-            st.rerun()
+@st.cache_resource
+def get_results_store() -> ResultsStore:
+    """One connection per dashboard process - WAL lets it read while a scraper writes"""
+    return ResultsStore(OUTPUT_DIR)
+
+
+def start_scraper(zip_codes, filters):
+    """Reset the run state and submit the run to the worker"""
+    try:
+        job = get_worker().submit(zip_codes, filters)
+    except WorkerError as e:
+        st.error(f"❌ Could not start the scraper: {e}")
+        return
+    
+    follow_job(job["job_id"])
+    st.session_state.scraping = True
+    st.session_state.leads = []
+    st.session_state.stats = {}
+    st.session_state.progress = {"status": "starting", "message": "Initializing..."}
+    st.session_state.scraper_done = False
+    st.session_state.logs = []  # Clear logs
+    st.session_state.current_business = None
+    st.session_state.current_category = None
+    st.session_state.current_area = None
+    st.session_state.allocation = []
+    
+    # Send initial progress message immediately
+    import datetime
+    initial_log = {
+        "timestamp": datetime.datetime.now().strftime("%H:%M:%S"),
+        "status": "starting",
+        "message": "Starting scraper...",
+        "data": {}
+    }
+    st.session_state.logs.append(initial_log)
+    st.rerun()
+
+
+# Prepare filter parameters
+filters = {
+    "min_rating": min_rating,
+    "max_rating": max_rating,
+    "min_reviews": min_reviews,
+    "max_reviews_per_business": max_reviews_per_business,
+    "min_violations_to_stop": min_violations_to_stop,
+    "max_clean_reviews": max_clean_reviews,
+    "prefilter_threshold": prefilter_threshold,
+    "classifier_backend": classifier_backend,
+    "classification_mode": classification_mode,
+    "time_budget_minutes": time_budget_minutes or None,
+    "max_businesses": max_businesses or None,
+    "search_cache_ttl_hours": search_cache_ttl_hours,
+    "extraction_mode": extraction_mode,
+    "cascade_low": cascade_band[0],
+    "cascade_high": cascade_band[1],
+    "categories": selected_categories,  # Pass selected categories
+    "country": country  # Pass country
+}
+
+# Live areas refresh on their own timer while a job runs; the sidebar and everything else
+# only render again when the user interacts with them
+LIVE_REFRESH_SECONDS = 1.0
+LEADS_PAGE_SIZE = 25  # Rows per results page; render cost doesn't depend on the total number of leads
+LEAD_SORTS = {
+    "Newest": ("found_at", True),
+    "Most violations": ("violations_count", True),
+    "Lowest rating": ("rating", False),
+    "Most reviews": ("review_count", True),
+    "Name": ("name", False),
+}
+LEAD_TABLE_COLUMNS = ["found_at", "name", "zip_code", "category", "rating", "review_count", "violations_count", "email", "phone", "website"]
+live_refresh = LIVE_REFRESH_SECONDS if st.session_state.scraping else None
+
+
+def record_render_time(area, start):
+    """Keep the last render times of a live area for the statistics panel"""
+    timings = st.session_state.render_ms.setdefault(area, deque(maxlen=20))
+    timings.append((time.perf_counter() - start) * 1000)
+
+
+def render_leads_table(store, run_id, key):
+    """Filter, sort and page leads in SQL; flagged reviews are only read for the lead being looked at"""
+    filter_cols = st.columns(4)
+    with filter_cols[0]:
+        zip_code = st.selectbox("Zip code", [""] + store.filter_values("zip_code", run_id), format_func=lambda z: z or "All zip codes", key=f"{key}_zip")
+    with filter_cols[1]:
+        category = st.selectbox("Category", [""] + store.filter_values("category", run_id), format_func=lambda c: c or "All categories", key=f"{key}_category")
+    with filter_cols[2]:
+        rating_range = st.slider("Rating", 0.0, 5.0, (0.0, 5.0), 0.1, key=f"{key}_rating")
+    with filter_cols[3]:
+        min_violations = st.number_input("Min violations", min_value=0, value=0, step=1, key=f"{key}_violations")
+    
+    sort_cols = st.columns([3, 1])
+    with sort_cols[0]:
+        sort_label = st.selectbox("Sort by", list(LEAD_SORTS), key=f"{key}_sort")
+    with sort_cols[1]:
+        page = st.number_input("Page", min_value=1, value=1, step=1, key=f"{key}_page")
+    
+    sort, descending = LEAD_SORTS[sort_label]
+    filters = dict(run_id=run_id, zip_code=zip_code, category=category, min_rating=rating_range[0] or None, max_rating=rating_range[1] if rating_range[1] < 5.0 else None,
+                   min_violations=min_violations or None, sort=sort, descending=descending, page_size=LEADS_PAGE_SIZE)
+    rows, total = store.leads_page(page=int(page) - 1, **filters)
+    pages = max(1, -(-total // LEADS_PAGE_SIZE))
+    if page > pages:
+        # Filters narrowed the results below the current page
+        page = pages
+        rows, total = store.leads_page(page=pages - 1, **filters)
+    st.caption(f"{total} leads match - page {page} of {pages}")
+    if not len(rows):
+        st.info("No leads match these filters.")
+        return
+    
+    st.dataframe(rows[LEAD_TABLE_COLUMNS], use_container_width=True, hide_index=True)
+    
+    choice = st.selectbox(
+        "Details for",
+        range(len(rows)),
+        format_func=lambda i: f"{rows.iloc[i]['name']} ({rows.iloc[i]['violations_count']} violations)",
+        key=f"{key}_detail",
+    )
+    lead = rows.iloc[choice]
+    col_a, col_b = st.columns(2)
+    with col_a:
+        st.markdown("**Contact Information:**")
+        st.write(f"🌐 Website: {lead['website'] or 'N/A'}")
+        st.write(f"📧 Email: {lead['email'] or 'Not found'}")
+        st.write(f"📞 Phone: {lead['phone'] or 'N/A'}")
+    with col_b:
+        st.markdown("**Business Details:**")
+        st.write(f"⭐ Rating: **{lead['rating']}**")
+        st.write(f"📝 Reviews: **{lead['review_count']}**")
+        st.write(f"🚩 Violations: **{lead['violations_count']}**")
+        if lead['duplicate_evidence_count']:
+            st.write(f"📎 Copied elsewhere: **{lead['duplicate_evidence_count']}** review(s)")
+    
+    # Show violations with better formatting
+    flagged = store.flagged_reviews(lead["run_id"], lead["place_key"])
+    if len(flagged):
+        st.markdown("---")
+        st.markdown("**Violations:**")
+        for v_idx, violation in enumerate(flagged.itertuples(), 1):
+            reasoning = violation.reasoning or "N/A"
+            st.markdown(f"""
+                <div style="background: #fff3cd; padding: 0.8rem; border-radius: 0.5rem; margin: 0.5rem 0; border-left: 4px solid #ffc107;">
+                    <strong>Violation #{v_idx}:</strong> ⭐{violation.rating}/5<br>
+                    {violation.text[:300]}{'...' if len(violation.text or '') > 300 else ''}<br>
+                    <em>{reasoning[:150]}{'...' if len(reasoning) > 150 else ''}</em>
+                </div>
+            """, unsafe_allow_html=True)
+
+
+@st.fragment(run_every=live_refresh)
+def live_status():
+    """Pull new worker events, then draw the current status and progress"""
+    render_start = time.perf_counter()
+    was_scraping = st.session_state.scraping
+    process_progress_queue()
     
     # Current Status Display with better styling
     if st.session_state.scraping:
@@ -687,6 +866,14 @@ with col1:
                 st.progress(0.1, text="🔄 Running...")
             st.info(f"ℹ️ {message}")
     
+    record_render_time("status", render_start)
+    if was_scraping and not st.session_state.scraping:
+        st.rerun()  # Job ended - one full rerun stops the timers and refreshes the download section
+
+
+@st.fragment(run_every=live_refresh)
+def live_logs():
+    render_start = time.perf_counter()
     # Live Log Viewer
     log_header_cols = st.columns([3, 1])
     with log_header_cols[0]:
@@ -694,7 +881,6 @@ with col1:
     with log_header_cols[1]:
         if st.button("🗑️ Clear Logs", key="clear_logs"):
             st.session_state.logs = []
-            st.rerun()
     
     log_container = st.container()
     
@@ -725,6 +911,7 @@ with col1:
                     "reviews_collected": "📝",
                     "classifying_reviews": "🤖",
                     "violation_found": "🚩",
+                    "allocation": "🎰",
                     "lead_found": "🚩",
                     "completed": "✅",
                     "error": "❌",
@@ -750,6 +937,8 @@ with col1:
                     extra_info = f" (Total: {data['violation_count']})"
                 elif status == "lead_found" and "violations_count" in data:
                     extra_info = f" ({data['violations_count']} violations)"
+                if data.get("coalesced", 1) > 1:
+                    extra_info += f" (+{data['coalesced'] - 1} more)"
                 
                 log_text += f"[{timestamp}] {status_icon} {message}{extra_info}\n"
             
@@ -767,6 +956,12 @@ with col1:
         else:
             st.info("No logs yet. Start scraping to see activity.")
     
+    record_render_time("logs", render_start)
+
+
+@st.fragment(run_every=live_refresh)
+def live_results():
+    render_start = time.perf_counter()
     # Real-time results with better styling
     st.markdown("### 🎯 Results")
     
@@ -777,40 +972,16 @@ with col1:
             </div>
         """, unsafe_allow_html=True)
         
-        # Display leads in real-time with better cards
-        for idx, lead in enumerate(st.session_state.leads, 1):
-            violations_count = len(lead.get('flagged_reviews', []))
-            with st.expander(f"🚩 {idx}. {lead.get('name', 'Unknown')} ({violations_count} violation{'s' if violations_count != 1 else ''})", expanded=False):
-                col_a, col_b = st.columns(2)
-                with col_a:
-                    st.markdown("**Contact Information:**")
-                    st.write(f"🌐 Website: {lead.get('website', 'N/A')}")
-                    st.write(f"📧 Email: {lead.get('email', 'Not found')}")
-                    st.write(f"📞 Phone: {lead.get('phone', 'N/A')}")
-                with col_b:
-                    st.markdown("**Business Details:**")
-                    st.write(f"⭐ Rating: **{lead.get('rating', 'N/A')}**")
-                    st.write(f"📝 Reviews: **{lead.get('review_count', 'N/A')}**")
-                    st.write(f"🚩 Violations: **{violations_count}**")
-                
-                # Show top violations with better formatting
-                flagged = lead.get('flagged_reviews', [])
-                if flagged:
-                    st.markdown("---")
-                    st.markdown("**Top Violations:**")
-                    for v_idx, violation in enumerate(flagged[:3], 1):
-                        rating = violation.get('rating', '?')
-                        reasoning = violation.get('classification', {}).get('reasoning', 'N/A')
-                        st.markdown(f"""
-                            <div style="background: #fff3cd; padding: 0.8rem; border-radius: 0.5rem; margin: 0.5rem 0; border-left: 4px solid #ffc107;">
-                                <strong>Violation #{v_idx}:</strong> ⭐{rating}/5<br>
-                                <em>{reasoning[:150]}{'...' if len(reasoning) > 150 else ''}</em>
-                            </div>
-                        """, unsafe_allow_html=True)
+        # One page at a time, sorted and filtered by the results store
+        render_leads_table(get_results_store(), st.session_state.job_id, "results")
     else:
         st.info("💡 No violations found yet. Results will appear here as they are discovered.")
+    record_render_time("results", render_start)
 
-with col2:
+
+@st.fragment(run_every=live_refresh)
+def live_stats():
+    render_start = time.perf_counter()
     # Statistics
     st.subheader("📈 Statistics")
     
@@ -838,6 +1009,31 @@ with col2:
             if stats.get('reviews_skipped', 0) > 0:
                 st.write(f"⚡ Reviews skipped (early exit): {stats.get('reviews_skipped', 0)}")
         
+        if stats.get('reviews_classified', 0) > 0:
+            st.divider()
+            st.write("**Pre-filter:**")
+            st.write(f"⚡ AI calls skipped: {stats.get('prefilter_skipped', 0)}/{stats['reviews_classified']} ({stats.get('prefilter_skip_rate', 0):.1%})")
+            if stats.get('prefilter_audited', 0) > 0:
+                st.write(f"🎯 Audit agreement: {stats.get('prefilter_agreement_rate', 0):.1%} ({stats['prefilter_audited']} sampled)")
+            if stats.get('avg_llm_calls_per_business') is not None:
+                st.write(f"🤖 AI calls per business: {stats['avg_llm_calls_per_business']} (budget {stats.get('avg_review_budget', 0)} reviews)")
+            if stats.get('sequential_stops', 0) > 0:
+                st.write(f"🛑 Early stops (unlikely to find more): {stats['sequential_stops']}")
+            if stats.get('near_duplicate_reuses', 0) > 0:
+                st.write(f"📎 Near-duplicates reused: {stats['near_duplicate_reuses']}")
+            if stats.get('classification_errors', 0) > 0:
+                st.write(f"⚠️ Classification errors: {stats['classification_errors']}")
+        
+        if stats.get('cascade'):
+            cascade_stats = stats['cascade']
+            st.divider()
+            st.write("**Cascade:**")
+            st.write(f"✅ Local clean: {cascade_stats['local_negative_count']} ({cascade_stats['local_negative_avg_ms']} ms)")
+            st.write(f"🚩 Local violation: {cascade_stats['local_positive_count']} ({cascade_stats['local_positive_avg_ms']} ms)")
+            st.write(f"🤖 AI: {cascade_stats['llm_count']} ({cascade_stats['llm_avg_ms']} ms)")
+            if cascade_stats.get('audit_agreement_rate') is not None:
+                st.write(f"🎯 Audit agreement: {cascade_stats['audit_agreement_rate']:.1%} ({cascade_stats['audits']} audits, {cascade_stats.get('audit_avg_ms', 0)} ms)")
+        
         # Progress percentage
         if st.session_state.scraping and stats.get('found', 0) > 0:
             st.divider()
@@ -846,52 +1042,84 @@ with col2:
             st.progress(min(processed_pct / 100, 1.0))
     else:
         st.info("Statistics will appear here once scraping starts.")
+    
+    # Budget allocation chosen by the bandit
+    if st.session_state.allocation:
+        with st.expander("🎰 Budget Allocation", expanded=False):
+            allocation_df = pd.DataFrame(st.session_state.allocation)
+            st.dataframe(allocation_df[allocation_df["businesses"] > 0], use_container_width=True, hide_index=True)
+            st.caption(f"{int((allocation_df['businesses'] == 0).sum())} cells received no budget and are not searched")
+    
+    record_render_time("stats", render_start)
+    if st.session_state.render_ms:
+        averages = {area: sum(ms) / len(ms) for area, ms in st.session_state.render_ms.items()}
+        st.caption("⏱️ Live refresh render time (avg ms): " + ", ".join(f"{area} {ms:.0f}" for area, ms in averages.items()))
+
+
+# Main content area
+col1, col2 = st.columns([2, 1])
+
+with col1:
+    # Control buttons
+    if not st.session_state.scraping:
+        if st.button("🚀 Start Scraping", type="primary", use_container_width=True):
+            if not zip_codes:
+                st.error("Please enter at least one zip code!")
+            elif not selected_categories:
+                st.error("Please select at least one category!")
+            else:
+                start_scraper(zip_codes, filters)
+        
+        # Re-apply the sliders to every business seen in earlier searches - no rescrape
+        table_path = os.path.join(OUTPUT_DIR, BUSINESS_TABLE_FILE)
+        business_table = load_business_table(os.path.getmtime(table_path)) if os.path.exists(table_path) else None
+        if business_table is not None and len(business_table):
+            refilter_start = time.perf_counter()
+            candidates = business_table.new_candidates(
+                min_rating, max_rating, min_reviews,
+                zip_codes=zip_codes or None,
+                categories=[c["name"] for c in selected_categories] or None,
+            )
+            refilter_ms = (time.perf_counter() - refilter_start) * 1000
+            st.caption(
+                f"🗂️ {len(candidates)} of {len(business_table)} saved places newly match these filters "
+                f"(re-filtered in {refilter_ms:.0f} ms)"
+            )
+            if len(candidates) and st.button(f"♻️ Process {len(candidates)} New Matches", use_container_width=True):
+                start_scraper(zip_codes, {**filters, "businesses": business_table.to_businesses(candidates)})
+    else:
+        if st.button("⏹️ Stop Scraping", type="secondary", use_container_width=True):
+            try:
+                get_worker().cancel(st.session_state.job_id)
+                st.warning("Scraping stopped. Results may be incomplete.")
+            except WorkerError as e:
+                st.error(f"❌ Could not reach the worker: {e}")
+            st.session_state.scraping = False
+            st.rerun()
+    
+    live_status()
+    live_logs()
+    live_results()
+
+with col2:
+    live_stats()
 
 # Download section (at the bottom)
 st.divider()
 st.subheader("💾 Download Results")
 
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def leads_frame(_leads, job_id, count):
+    """Wide CSV rows, rebuilt only when the job or its lead count changes"""
+    return leads_to_wide(_leads)
+
+
 if st.session_state.leads:
     # Create CSV for download
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
     
-    rows = []
-    for lead in st.session_state.leads:
-        flagged = lead.get("flagged_reviews", [])
-        top_violations = flagged[:3]
-        
-        row = {
-            "business_name": lead["name"],
-            "website_url": lead.get("website", ""),
-            "email": lead.get("email", ""),
-            "phone": lead.get("phone", ""),
-            "address": lead.get("address", ""),
-            "rating": lead.get("rating", ""),
-            "review_count": lead.get("review_count", ""),
-            "zip_code": lead.get("zip_code", ""),
-            "violations_count": len(flagged),
-        }
-        
-        for i in range(3):
-            if i < len(top_violations):
-                v = top_violations[i]
-                row[f"review_{i+1}_text"] = v["text"]
-                row[f"review_{i+1}_reason"] = v["classification"]["reasoning"]
-                row[f"review_{i+1}_confidence"] = round(v["classification"]["confidence"], 2)
-                row[f"review_{i+1}_rating"] = v["rating"]
-                row[f"review_{i+1}_reviewer"] = v["reviewer_name"]
-                row[f"review_{i+1}_date"] = v["date"]
-            else:
-                row[f"review_{i+1}_text"] = ""
-                row[f"review_{i+1}_reason"] = ""
-                row[f"review_{i+1}_confidence"] = ""
-                row[f"review_{i+1}_rating"] = ""
-                row[f"review_{i+1}_reviewer"] = ""
-                row[f"review_{i+1}_date"] = ""
-        
-        rows.append(row)
-    
-    df = pd.DataFrame(rows)
+    df = leads_frame(st.session_state.leads, st.session_state.job_id, len(st.session_state.leads))
     
     # Download button
     csv = df.to_csv(index=False)
@@ -909,6 +1137,54 @@ if st.session_state.leads:
 else:
     st.info("No results to download yet. Start scraping to generate results.")
 
-# Auto-refresh mechanism - simplified to avoid blocking
-# Note: Manual refresh recommended for best experience
-# The page will update when you click the refresh button or interact with the page
+# Past runs, read from the columnar exports only when asked for
+st.divider()
+st.subheader("📚 Past Results")
+
+PAST_LEAD_COLUMNS = ["run_id", "lead_id", "exported_at", "name", "zip_code", "category", "rating", "violations_count", "email", "phone", "website"]
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def cached_past_leads(days: int, version: float) -> pd.DataFrame:
+    """Leads of the last days, reloaded whenever a new run is exported"""
+    return load_leads(OUTPUT_DIR, days=days, columns=PAST_LEAD_COLUMNS)
+
+
+if st.checkbox("Show leads from previous runs", value=False):
+    leads_dir = os.path.join(OUTPUT_DIR, PARQUET_DIR, "leads")
+    version = os.path.getmtime(leads_dir) if os.path.isdir(leads_dir) else 0.0
+    days = st.selectbox("Period", [1, 7, 30, 0], index=1, format_func=lambda d: f"Last {d} days" if d else "All time")
+    
+    load_start = time.perf_counter()
+    past_leads = cached_past_leads(days, version)
+    st.caption(f"{len(past_leads)} leads loaded in {(time.perf_counter() - load_start) * 1000:.0f} ms")
+    
+    if len(past_leads):
+        st.dataframe(past_leads.drop(columns=["lead_id"]), use_container_width=True, hide_index=True)
+        
+        # Flagged reviews are only read for the lead being looked at
+        choice = st.selectbox(
+            "Flagged reviews for",
+            range(len(past_leads)),
+            format_func=lambda i: f"{past_leads.iloc[i]['name']} ({past_leads.iloc[i]['run_id']})",
+        )
+        selected = past_leads.iloc[choice]
+        reviews = load_flagged_reviews(OUTPUT_DIR, selected["run_id"], int(selected["lead_id"]))
+        st.dataframe(reviews[["rank", "rating", "text", "reasoning", "confidence", "reviewer_name", "date"]], use_container_width=True, hide_index=True)
+    else:
+        st.info("No exported runs in this period yet.")
+
+# Every run and lead recorded in the results store, queried by its indexes
+st.divider()
+st.subheader("🗄️ Run History")
+
+if st.checkbox("Show runs and leads from the results store", value=False):
+    store = get_results_store()
+    runs = store.runs()
+    if len(runs):
+        st.dataframe(runs.drop(columns=["stats"]), use_container_width=True, hide_index=True)
+        
+        run_filter = st.selectbox("Run", [""] + runs["run_id"].tolist(), format_func=lambda r: r or "All runs")
+        render_leads_table(store, run_filter or None, "history")
+    else:
+        st.info("No runs recorded yet.")
@@ -14,5 +14,9 @@ fi
 # Export the actual port number
 export STREAMLIT_SERVER_PORT=$PORT
 
+# Start the scraping worker next to the dashboard
+mkdir -p output
+python worker.py >> output/worker.log 2>&1 &
+
 # Run Streamlit with explicit port argument
 exec streamlit run dashboard.py --server.port=$PORT --server.address=0.0.0.0
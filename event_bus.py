@@ -0,0 +1,167 @@
+"""
+VARDA Event Bus
+Progress events of each job go to their own channel: every event is stamped with
+its job ID and a per-job offset, the channel keeps a bounded log for replay, and
+each subscriber reads from its own bounded buffer. A slow subscriber loses its
+oldest events (and is told how many) instead of holding up the job or other viewers.
+"""
+
+import itertools
+import threading
+import time
+from collections import deque
+
+EVENT_LOG_SIZE = 5000  # Events kept per job for replay from an offset
+SUBSCRIBER_BUFFER_SIZE = 2000  # Events a subscriber may fall behind before its oldest are dropped
+SUBSCRIBER_IDLE_SECONDS = 300  # Subscriptions not read for this long are removed (closed browser tabs)
+
+
+class Subscription:
+    """One viewer's bounded, drop-oldest buffer on a job channel"""
+
+    def __init__(self, subscriber_id: str, job_id: str, buffer_size: int):
+        self.subscriber_id = subscriber_id
+        self.job_id = job_id
+        self.buffer = deque(maxlen=buffer_size)
+        self.dropped = 0  # Since the last read
+        self.last_read = time.monotonic()
+
+    def push(self, event: dict):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append(event)
+
+
+class JobChannel:
+    """Event log and subscribers of one job, with its own lock so jobs don't contend"""
+
+    def __init__(self, job_id: str, log_size: int = EVENT_LOG_SIZE):
+        self.job_id = job_id
+        self.log = deque(maxlen=log_size)
+        self.next_offset = 0
+        self.closed = False
+        self.subscribers = {}
+        self._changed = threading.Condition()
+
+    def publish(self, event: dict) -> dict:
+        with self._changed:
+            event = {**event, "job_id": self.job_id, "offset": self.next_offset}
+            self.next_offset += 1
+            self.log.append(event)
+            for subscription in self.subscribers.values():
+                subscription.push(event)
+            self._changed.notify_all()
+        return event
+
+    def close(self):
+        """No more events - wakes every waiting reader"""
+        with self._changed:
+            self.closed = True
+            self._changed.notify_all()
+
+    def _retained_from(self, offset: int) -> tuple:
+        """Logged events from offset on, and how many before them were already evicted"""
+        first = self.log[0]["offset"] if self.log else self.next_offset
+        start = max(offset, first)
+        return list(itertools.islice(self.log, start - first, None)), start - offset
+
+    def replay(self, offset: int, wait: float = 0.0, limit: int = 500) -> tuple:
+        """(events from offset on, events missed because they left the log), waiting up to `wait` for new ones"""
+        with self._changed:
+            if wait > 0 and offset >= self.next_offset and not self.closed:
+                self._changed.wait_for(lambda: offset < self.next_offset or self.closed, timeout=wait)
+            events, missed = self._retained_from(offset)
+        return events[:limit], missed
+
+    def subscribe(self, subscriber_id: str, offset: int = None, buffer_size: int = SUBSCRIBER_BUFFER_SIZE) -> Subscription:
+        """New subscription, pre-filled from offset when given (None = only new events)"""
+        subscription = Subscription(subscriber_id, self.job_id, buffer_size)
+        with self._changed:
+            if offset is not None:
+                events, missed = self._retained_from(offset)
+                subscription.dropped = missed
+                for event in events:
+                    subscription.push(event)
+            self.subscribers[subscriber_id] = subscription
+        return subscription
+
+    def read(self, subscription: Subscription, wait: float = 0.0, limit: int = 500) -> dict:
+        with self._changed:
+            if wait > 0 and not subscription.buffer and not self.closed:
+                self._changed.wait_for(lambda: subscription.buffer or self.closed, timeout=wait)
+            events = [subscription.buffer.popleft() for _ in range(min(limit, len(subscription.buffer)))]
+            dropped, subscription.dropped = subscription.dropped, 0
+            subscription.last_read = time.monotonic()
+            return {"events": events, "dropped": dropped, "closed": self.closed and not subscription.buffer}
+
+    def unsubscribe(self, subscriber_id: str):
+        with self._changed:
+            self.subscribers.pop(subscriber_id, None)
+
+
+class EventBus:
+    """Job channels and the subscriptions on them"""
+
+    def __init__(self, log_size: int = EVENT_LOG_SIZE, idle_seconds: float = SUBSCRIBER_IDLE_SECONDS):
+        self.log_size = log_size
+        self.idle_seconds = idle_seconds
+        self._channels = {}
+        self._subscriptions = {}  # subscriber_id -> channel
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def channel(self, job_id: str) -> JobChannel:
+        with self._lock:
+            channel = self._channels.get(job_id)
+            if channel is None:
+                channel = self._channels[job_id] = JobChannel(job_id, self.log_size)
+            return channel
+
+    def get_channel(self, job_id: str) -> JobChannel:
+        with self._lock:
+            return self._channels.get(job_id)
+
+    def remove_channel(self, job_id: str):
+        """Close a job's channel and drop it with its log and subscriptions"""
+        with self._lock:
+            channel = self._channels.pop(job_id, None)
+            if channel is None:
+                return
+            for subscriber_id in [s for s, c in self._subscriptions.items() if c is channel]:
+                del self._subscriptions[subscriber_id]
+        channel.close()
+
+    def publish(self, job_id: str, event: dict) -> dict:
+        return self.channel(job_id).publish(event)
+
+    def subscribe(self, job_id: str, offset: int = None, buffer_size: int = SUBSCRIBER_BUFFER_SIZE) -> Subscription:
+        self.expire_idle()
+        channel = self.channel(job_id)
+        with self._lock:
+            subscriber_id = f"{job_id}.{next(self._ids)}"
+            self._subscriptions[subscriber_id] = channel
+        return channel.subscribe(subscriber_id, offset, buffer_size)
+
+    def read(self, subscriber_id: str, wait: float = 0.0, limit: int = 500):
+        """Buffered events of a subscription, or None if it doesn't exist (anymore)"""
+        with self._lock:
+            channel = self._subscriptions.get(subscriber_id)
+        subscription = channel.subscribers.get(subscriber_id) if channel else None
+        if subscription is None:
+            return None
+        return channel.read(subscription, wait, limit)
+
+    def unsubscribe(self, subscriber_id: str):
+        with self._lock:
+            channel = self._subscriptions.pop(subscriber_id, None)
+        if channel is not None:
+            channel.unsubscribe(subscriber_id)
+
+    def expire_idle(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            subscriptions = list(self._subscriptions.items())
+        for subscriber_id, channel in subscriptions:
+            subscription = channel.subscribers.get(subscriber_id)
+            if subscription is None or subscription.last_read < cutoff:
+                self.unsubscribe(subscriber_id)
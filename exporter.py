@@ -0,0 +1,330 @@
+"""
+VARDA Exporter
+Columnar export of run results: a leads table and a flagged-reviews table, both
+normalized, compressed Parquet written in column batches. Past runs are read back
+lazily through a pyarrow dataset, so only the requested columns and runs are loaded.
+
+The wide CSV layout (one row per lead with its top flagged reviews side by side) is
+built from the same normalized tables with a pivot over violation rank. export_leads
+and the dashboard download use it; the live lead files write the same row per lead
+with wide_row.
+
+    output/parquet/leads/run_<timestamp>.parquet
+    output/parquet/flagged_reviews/run_<timestamp>.parquet
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+PARQUET_DIR = "parquet"
+PARQUET_COMPRESSION = "zstd"
+EXPORT_BATCH_SIZE = 5000  # Leads per record batch
+TOP_VIOLATIONS = 3  # Flagged reviews flattened into each wide row
+
+# Wide CSV columns: lead fields, then review_<rank>_<field> for each top violation
+LEAD_FIELDS = {
+    "business_name": "name",
+    "website_url": "website",
+    "email": "email",
+    "phone": "phone",
+    "rating": "rating",
+    "review_count": "review_count",
+    "violations_count": "violations_count",
+    "zip_code": "zip_code",
+    "category": "category",
+}
+REVIEW_FIELDS = {
+    "text": "text",
+    "reasoning": "reason",
+    "confidence": "confidence",
+    "rating": "rating",
+    "reviewer_name": "reviewer",
+    "date": "date",
+}
+LEAD_COLUMNS = list(LEAD_FIELDS) + [
+    f"review_{rank}_{suffix}"
+    for rank in range(1, TOP_VIOLATIONS + 1)
+    for suffix in REVIEW_FIELDS.values()
+]
+
+LEADS_SCHEMA = pa.schema([
+    ("run_id", pa.string()),
+    ("lead_id", pa.int32()),
+    ("exported_at", pa.timestamp("s")),
+    ("name", pa.string()),
+    ("website", pa.string()),
+    ("email", pa.string()),
+    ("phone", pa.string()),
+    ("rating", pa.float32()),
+    ("review_count", pa.int32()),
+    ("zip_code", pa.string()),
+    ("category", pa.string()),
+    ("url", pa.string()),
+    ("violations_count", pa.int32()),
+    ("duplicate_evidence_count", pa.int32()),
+])
+
+REVIEWS_SCHEMA = pa.schema([
+    ("run_id", pa.string()),
+    ("lead_id", pa.int32()),
+    ("rank", pa.int16()),  # Position among the lead's flagged reviews, from 1
+    ("text", pa.string()),
+    ("reasoning", pa.string()),
+    ("confidence", pa.float32()),
+    ("violation_types", pa.list_(pa.string())),
+    ("rating", pa.int8()),
+    ("reviewer_name", pa.string()),
+    ("date", pa.string()),
+    ("source", pa.string()),
+])
+
+
+def _lead_columns(leads: list, run_id: str, exported_at: datetime, batch_size: int = EXPORT_BATCH_SIZE):
+    """Yield (leads, flagged_reviews) column dicts per batch, filling each column as one list"""
+    for start in range(0, len(leads), batch_size):
+        chunk = leads[start:start + batch_size]
+        lead_ids = list(range(start, start + len(chunk)))
+        lead_columns = {
+            "run_id": [run_id] * len(chunk),
+            "lead_id": lead_ids,
+            "exported_at": [exported_at] * len(chunk),
+            "name": [lead.get("name", "") for lead in chunk],
+            "website": [lead.get("website", "") for lead in chunk],
+            "email": [lead.get("email", "") for lead in chunk],
+            "phone": [lead.get("phone", "") for lead in chunk],
+            "rating": [lead.get("rating") or 0.0 for lead in chunk],
+            "review_count": [lead.get("review_count") or 0 for lead in chunk],
+            "zip_code": [str(lead.get("zip_code", "")) for lead in chunk],
+            "category": [lead.get("category", "") for lead in chunk],
+            "url": [lead.get("url", "") for lead in chunk],
+            "violations_count": [len(lead.get("flagged_reviews", [])) for lead in chunk],
+            "duplicate_evidence_count": [lead.get("duplicate_evidence_count", 0) for lead in chunk],
+        }
+
+        flagged = [
+            (lead_id, rank, review)
+            for lead_id, lead in zip(lead_ids, chunk)
+            for rank, review in enumerate(lead.get("flagged_reviews", []), start=1)
+        ]
+        classifications = [review.get("classification", {}) for _, _, review in flagged]
+        review_columns = {
+            "run_id": [run_id] * len(flagged),
+            "lead_id": [lead_id for lead_id, _, _ in flagged],
+            "rank": [rank for _, rank, _ in flagged],
+            "text": [review.get("text", "") for _, _, review in flagged],
+            "reasoning": [c.get("reasoning", "") for c in classifications],
+            "confidence": [c.get("confidence", 0.0) for c in classifications],
+            "violation_types": [c.get("violation_types") or [] for c in classifications],
+            "rating": [review.get("rating") or 0 for _, _, review in flagged],
+            "reviewer_name": [review.get("reviewer_name", "") for _, _, review in flagged],
+            "date": [review.get("date", "") for _, _, review in flagged],
+            "source": [c.get("source", "") for c in classifications],
+        }
+
+        yield lead_columns, review_columns
+
+
+def normalize_leads(leads: list, run_id: str = "") -> tuple:
+    """(leads, flagged_reviews) DataFrames with one row per lead and per flagged review"""
+    # One batch: the frames are built column by column straight from the lists
+    exported_at = datetime.now().replace(microsecond=0)
+    lead_columns, review_columns = next(_lead_columns(leads, run_id, exported_at, max(len(leads), 1)), ({}, {}))
+    leads_df = pd.DataFrame(lead_columns, columns=LEADS_SCHEMA.names)
+    reviews_df = pd.DataFrame(review_columns, columns=REVIEWS_SCHEMA.names)
+    return leads_df, reviews_df
+
+
+def wide_frame(leads_df: pd.DataFrame, reviews_df: pd.DataFrame, top: int = TOP_VIOLATIONS) -> pd.DataFrame:
+    """
+    One row per lead in LEAD_COLUMNS order, its top flagged reviews pivoted into columns by rank.
+    Missing reviews are left as NA, which CSV writers render as blank cells.
+    """
+    index = pd.Index(leads_df["lead_id"].to_numpy())
+    columns = {column: leads_df[field].to_numpy() for column, field in LEAD_FIELDS.items()}
+    # Float32 storage -> the short decimals users typed or the model returned
+    columns["rating"] = leads_df["rating"].astype("float64").round(2).to_numpy()
+
+    # Pivot over rank: each rank is one slice of the reviews table, scattered into lead positions
+    top_reviews = reviews_df[reviews_df["rank"] <= top]
+    ranks = top_reviews["rank"].to_numpy()
+    positions = index.get_indexer(top_reviews["lead_id"].to_numpy())
+    fields = {field: top_reviews[field].to_numpy() for field in REVIEW_FIELDS}
+    fields["confidence"] = fields["confidence"].astype("float64").round(2)
+    for rank in range(1, top + 1):
+        in_rank = ranks == rank
+        at = positions[in_rank]
+        for field, suffix in REVIEW_FIELDS.items():
+            if field == "rating":
+                values = np.zeros(len(index), dtype="int64")
+                values[at] = fields[field][in_rank]
+                missing = np.ones(len(index), dtype=bool)
+                missing[at] = False
+                column = pd.arrays.IntegerArray(values, missing)
+            elif field == "confidence":
+                column = np.full(len(index), np.nan)
+                column[at] = fields[field][in_rank]
+            else:
+                column = np.full(len(index), None, dtype=object)
+                column[at] = fields[field][in_rank]
+            columns[f"review_{rank}_{suffix}"] = column
+
+    return pd.DataFrame(columns, columns=LEAD_COLUMNS)
+
+
+def wide_row(lead: dict, top: int = TOP_VIOLATIONS) -> list:
+    """One lead as a plain wide CSV row in LEAD_COLUMNS order, formatted like wide_frame (no pandas on the per-lead path)"""
+    values = {
+        "name": lead.get("name", ""),
+        "website": lead.get("website", ""),
+        "email": lead.get("email", ""),
+        "phone": lead.get("phone", ""),
+        "rating": round(float(np.float32(lead.get("rating") or 0.0)), 2),
+        "review_count": lead.get("review_count") or 0,
+        "violations_count": len(lead.get("flagged_reviews", [])),
+        "zip_code": str(lead.get("zip_code", "")),
+        "category": lead.get("category", ""),
+    }
+    row = [values[field] for field in LEAD_FIELDS.values()]
+    reviews = lead.get("flagged_reviews", [])[:top]
+    for rank in range(top):
+        if rank >= len(reviews):
+            row.extend([""] * len(REVIEW_FIELDS))
+            continue
+        review = reviews[rank]
+        classification = review.get("classification", {})
+        review_values = {
+            "text": review.get("text", ""),
+            "reasoning": classification.get("reasoning", ""),
+            "confidence": round(float(np.float32(classification.get("confidence", 0.0))), 2),
+            "rating": int(review.get("rating") or 0),
+            "reviewer_name": review.get("reviewer_name", ""),
+            "date": review.get("date", ""),
+        }
+        row.extend(review_values[field] for field in REVIEW_FIELDS)
+    return row
+
+
+def leads_to_wide(leads: list) -> pd.DataFrame:
+    """Wide CSV frame straight from lead dicts"""
+    if not leads:
+        return pd.DataFrame(columns=LEAD_COLUMNS)
+    return wide_frame(*normalize_leads(leads))
+
+
+def export_parquet(leads: list, output_dir: str, run_id: str) -> dict:
+    """Write the run's leads and flagged reviews as two Parquet files. Returns their paths."""
+    paths = {}
+    for table in ("leads", "flagged_reviews"):
+        os.makedirs(os.path.join(output_dir, PARQUET_DIR, table), exist_ok=True)
+        paths[table] = os.path.join(output_dir, PARQUET_DIR, table, f"run_{run_id}.parquet")
+
+    exported_at = datetime.now().replace(microsecond=0)
+    with pq.ParquetWriter(paths["leads"], LEADS_SCHEMA, compression=PARQUET_COMPRESSION) as leads_writer, \
+            pq.ParquetWriter(paths["flagged_reviews"], REVIEWS_SCHEMA, compression=PARQUET_COMPRESSION) as reviews_writer:
+        for lead_columns, review_columns in _lead_columns(leads, run_id, exported_at):
+            leads_writer.write_batch(pa.RecordBatch.from_pydict(lead_columns, schema=LEADS_SCHEMA))
+            if review_columns["lead_id"]:
+                reviews_writer.write_batch(pa.RecordBatch.from_pydict(review_columns, schema=REVIEWS_SCHEMA))
+    return paths
+
+
+#######################################################################
+# LOADING
+#######################################################################
+
+def _dataset(output_dir: str, table: str):
+    directory = os.path.join(output_dir, PARQUET_DIR, table)
+    if not os.path.isdir(directory) or not any(name.endswith(".parquet") for name in os.listdir(directory)):
+        return None
+    schema = LEADS_SCHEMA if table == "leads" else REVIEWS_SCHEMA
+    return ds.dataset(directory, format="parquet", schema=schema)
+
+
+def load_leads(output_dir: str, days: int = 7, columns: list = None) -> pd.DataFrame:
+    """Leads exported in the last `days` days (all if None), reading only the requested columns"""
+    dataset = _dataset(output_dir, "leads")
+    if dataset is None:
+        return pd.DataFrame(columns=columns or LEADS_SCHEMA.names)
+    where = None
+    if days:
+        since = pa.scalar(datetime.now() - timedelta(days=days), type=pa.timestamp("s"))
+        where = ds.field("exported_at") >= since
+    return dataset.to_table(columns=columns, filter=where).to_pandas()
+
+
+def load_flagged_reviews(output_dir: str, run_id: str, lead_id: int = None) -> pd.DataFrame:
+    """Flagged reviews of one run (or one lead of it), in rank order"""
+    dataset = _dataset(output_dir, "flagged_reviews")
+    if dataset is None:
+        return pd.DataFrame(columns=REVIEWS_SCHEMA.names)
+    where = ds.field("run_id") == run_id
+    if lead_id is not None:
+        where &= ds.field("lead_id") == lead_id
+    return dataset.to_table(filter=where).to_pandas().sort_values(["lead_id", "rank"])
+
+
+#######################################################################
+# BENCHMARK
+#######################################################################
+
+def _synthetic_leads(n: int) -> list:
+    review = {
+        "text": "The owner insulted me when I asked for the bill. " * 6,
+        "classification": {"is_violation": True, "confidence": 0.87, "violation_types": ["harassment"],
+                           "reasoning": "Describes abusive behaviour by staff", "source": "llm"},
+        "rating": 1,
+        "reviewer_name": "Reviewer",
+        "date": "2 weeks ago",
+    }
+    return [
+        {"name": f"Business {i}", "website": "https://example.com", "email": "", "phone": "+33 1 23 45 67 89",
+         "rating": 3.4, "review_count": 120, "zip_code": "92100", "category": "restaurant",
+         "flagged_reviews": [review] * (1 + i % 5)}
+        for i in range(n)
+    ]
+
+
+def benchmark(n_leads: int = 100_000) -> dict:
+    """Time the wide export on synthetic leads"""
+    leads = _synthetic_leads(n_leads)
+
+    start = time.perf_counter()
+    leads_df, reviews_df = normalize_leads(leads)
+    normalized = time.perf_counter()
+    wide = wide_frame(leads_df, reviews_df)
+    pivoted = time.perf_counter()
+    wide.to_csv(os.devnull, index=False)
+    written = time.perf_counter()
+
+    return {
+        "leads": n_leads,
+        "flagged_reviews": len(reviews_df),
+        "normalize_s": round(normalized - start, 3),
+        "pivot_s": round(pivoted - normalized, 3),
+        "csv_s": round(written - pivoted, 3),
+        "leads_per_sec": round(n_leads / (written - start)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the wide lead export")
+    parser.add_argument("command", choices=["benchmark"])
+    parser.add_argument("--leads", type=int, default=100_000)
+    args = parser.parse_args()
+
+    results = benchmark(args.leads)
+    print(f"\n📊 Wide export of {results['leads']} leads ({results['flagged_reviews']} flagged reviews)")
+    for key, value in results.items():
+        print(f"   {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+VARDA Lead Sink
+Long-lived writer for leads as they are found: one CSV per zip code with a fixed
+schema, plus a JSONL file holding every lead with all its flagged reviews.
+Writes go through buffered file handles that are flushed per lead (so the files
+can be watched live) and fsynced periodically, under a lock so concurrent
+workers can share one sink.
+"""
+
+import csv
+import json
+import os
+import threading
+import time
+
+from exporter import LEAD_COLUMNS, wide_row
+
+FSYNC_EVERY = 20  # Leads between fsyncs
+FSYNC_SECONDS = 5.0  # ...or seconds, whichever comes first
+
+
+class LeadSink:
+    """Append-only CSV + JSONL output for one run"""
+
+    def __init__(self, output_dir: str, timestamp: str, fsync_every: int = FSYNC_EVERY,
+                 fsync_seconds: float = FSYNC_SECONDS):
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.timestamp = timestamp
+        self.fsync_every = fsync_every
+        self.fsync_seconds = fsync_seconds
+        self.jsonl_path = os.path.join(output_dir, f"violations_leads_{timestamp}.jsonl")
+        self.csv_paths = {}
+        self.count = 0
+        self._lock = threading.Lock()
+        self._csv_files = {}
+        self._csv_writers = {}
+        self._jsonl = open(self.jsonl_path, "a", encoding="utf-8", buffering=1 << 16)
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    @staticmethod
+    def _area_key(lead: dict) -> str:
+        area = str(lead.get("zip_code", "") or "")
+        return area.replace(",", "").replace(" ", "_")[:30]
+
+    def _csv_writer(self, safe_area: str):
+        if safe_area not in self._csv_files:
+            filename = f"violations_leads_{safe_area}_{self.timestamp}.csv" if safe_area else f"violations_leads_{self.timestamp}.csv"
+            path = os.path.join(self.output_dir, filename)
+            f = open(path, "a", encoding="utf-8", newline="", buffering=1 << 16)
+            writer = csv.writer(f, lineterminator="\n")
+            if f.tell() == 0:
+                writer.writerow(LEAD_COLUMNS)
+            self._csv_files[safe_area] = f
+            self._csv_writers[safe_area] = writer
+            self.csv_paths[safe_area] = path
+        return self._csv_writers[safe_area]
+
+    def write(self, lead: dict):
+        # Same wide row as export_leads and the dashboard download
+        row = wide_row(lead)
+        line = json.dumps(lead, ensure_ascii=False, default=str) + "\n"
+        area = self._area_key(lead)
+        with self._lock:
+            self._csv_writer(area).writerow(row)
+            self._jsonl.write(line)
+            self.count += 1
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_seconds:
+                self._sync()
+            else:
+                self._csv_files[area].flush()
+                self._jsonl.flush()
+
+    def _sync(self):
+        for f in [*self._csv_files.values(), self._jsonl]:
+            f.flush()
+            os.fsync(f.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def flush(self):
+        """Flush and fsync everything written so far"""
+        with self._lock:
+            if not self._jsonl.closed:
+                self._sync()
+
+    def close(self):
+        with self._lock:
+            if self._jsonl.closed:
+                return
+            self._sync()
+            for f in self._csv_files.values():
+                f.close()
+            self._jsonl.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,254 @@
+"""
+VARDA Local Classifier
+CPU-only linear review classifier trained on the LLM labels in training_data.jsonl.
+
+Train:     python local_classifier.py train
+Benchmark: python local_classifier.py benchmark [--llm-sample 50]
+"""
+
+import argparse
+import os
+import re
+import time
+import zlib
+
+import numpy as np
+
+from training_data import TRAINING_DATA_FILE, load_training_data
+
+# Hashed feature space for word unigrams/bigrams and the star rating
+N_FEATURES = 2 ** 18
+MODEL_FILE = "local_classifier.npz"
+MIN_TEXT_LENGTH = 10  # Same cut-off as classify_review
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+#######################################################################
+# FEATURES
+#######################################################################
+
+def _hash_token(token: str) -> int:
+    """Stable across processes, unlike hash()"""
+    return zlib.crc32(token.encode("utf-8")) % N_FEATURES
+
+
+def _feature_ids(text: str, rating) -> list:
+    tokens = _TOKEN_RE.findall((text or "").lower())
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    features.append(f"__rating_{int(rating or 0)}")
+    if len(text or "") > 600:
+        features.append("__long")
+    return [_hash_token(f) for f in features]
+
+
+def vectorize(texts: list, ratings: list):
+    """Build a sparse batch as (row, column, value) arrays with L2-normalized rows"""
+    rows, cols, vals = [], [], []
+    for i, (text, rating) in enumerate(zip(texts, ratings)):
+        ids = _feature_ids(text, rating)
+        weight = 1.0 / np.sqrt(len(ids))
+        rows.extend([i] * len(ids))
+        cols.extend(ids)
+        vals.extend([weight] * len(ids))
+    return (
+        np.asarray(rows, dtype=np.int64),
+        np.asarray(cols, dtype=np.int64),
+        np.asarray(vals, dtype=np.float32),
+    )
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-np.clip(x, -30, 30)))
+
+
+#######################################################################
+# MODEL
+#######################################################################
+
+class LocalClassifier:
+    """Hashed bag-of-words logistic regression, scored in vectorized batches"""
+
+    def __init__(self, weights: np.ndarray, bias: float, threshold: float = 0.5, prompt_version: str = ""):
+        self.weights = weights.astype(np.float32)
+        self.bias = float(bias)
+        self.threshold = threshold
+        self.prompt_version = prompt_version  # Labels the model was trained on
+
+    @classmethod
+    def load(cls, path: str) -> "LocalClassifier":
+        data = np.load(path, allow_pickle=False)
+        return cls(
+            data["weights"],
+            float(data["bias"]),
+            float(data["threshold"]),
+            str(data["prompt_version"]),
+        )
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(
+            path,
+            weights=self.weights,
+            bias=np.float32(self.bias),
+            threshold=np.float32(self.threshold),
+            prompt_version=np.array(self.prompt_version),
+        )
+
+    def predict_proba(self, texts: list, ratings: list) -> np.ndarray:
+        """Violation probability for each review"""
+        if not texts:
+            return np.zeros(0, dtype=np.float32)
+        rows, cols, vals = vectorize(texts, ratings)
+        scores = np.bincount(rows, weights=self.weights[cols] * vals, minlength=len(texts))
+        return _sigmoid(scores + self.bias)
+
+    def classify_batch(self, reviews: list) -> list:
+        """Classify review dicts at once. Returns the same verdict dicts as classify_review."""
+        results = [None] * len(reviews)
+        scored = [i for i, r in enumerate(reviews) if len((r.get("text") or "").strip()) >= MIN_TEXT_LENGTH]
+
+        probabilities = self.predict_proba(
+            [reviews[i]["text"] for i in scored],
+            [reviews[i].get("rating", 0) for i in scored],
+        )
+        for i, p in zip(scored, probabilities):
+            p = float(p)
+            is_violation = p >= self.threshold
+            results[i] = {
+                "is_violation": is_violation,
+                "confidence": round(p if is_violation else 1.0 - p, 3),
+                "violation_types": [],
+                "reasoning": f"Local model violation score {p:.2f}",
+                "source": "local",
+                "violation_probability": p,
+            }
+
+        for i, result in enumerate(results):
+            if result is None:
+                results[i] = {
+                    "is_violation": False,
+                    "confidence": 0.0,
+                    "violation_types": [],
+                    "reasoning": "Review text too short or empty",
+                    "source": "rules",
+                }
+        return results
+
+
+def train(records: list, epochs: int = 200, learning_rate: float = 2.0, l2: float = 1e-6) -> LocalClassifier:
+    """Fit the model with full-batch gradient descent, balancing violations against clean reviews"""
+    records = [r for r in records if len((r.get("text") or "").strip()) >= MIN_TEXT_LENGTH]
+    if not records:
+        raise ValueError("No labeled reviews to train on")
+
+    y = np.asarray([1.0 if r.get("is_violation") else 0.0 for r in records], dtype=np.float32)
+    rows, cols, vals = vectorize([r["text"] for r in records], [r.get("rating", 0) for r in records])
+
+    # Violations are rare - weight both classes equally
+    positives = max(y.sum(), 1.0)
+    negatives = max(len(y) - y.sum(), 1.0)
+    sample_weight = np.where(y == 1.0, len(y) / (2 * positives), len(y) / (2 * negatives)).astype(np.float32)
+
+    weights = np.zeros(N_FEATURES, dtype=np.float32)
+    bias = 0.0
+    for _ in range(epochs):
+        scores = np.bincount(rows, weights=weights[cols] * vals, minlength=len(y)) + bias
+        error = (_sigmoid(scores) - y) * sample_weight / len(y)
+        weights -= learning_rate * (np.bincount(cols, weights=vals * error[rows], minlength=N_FEATURES) + l2 * weights)
+        bias -= learning_rate * float(error.sum())
+
+    versions = {r.get("prompt_version", "") for r in records}
+    return LocalClassifier(weights, bias, prompt_version=",".join(sorted(v for v in versions if v)))
+
+
+#######################################################################
+# LOADING
+#######################################################################
+
+_model = None
+_model_path = None
+
+
+def get_local_classifier(path: str) -> LocalClassifier:
+    """Load the model once per process"""
+    global _model, _model_path
+    if _model is None or _model_path != path:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Local classifier not found at {path}. Train it with: python local_classifier.py train")
+        _model = LocalClassifier.load(path)
+        _model_path = path
+    return _model
+
+
+#######################################################################
+# BENCHMARK
+#######################################################################
+
+def benchmark(model: LocalClassifier, records: list, llm_sample: int = 0) -> dict:
+    """Compare throughput and agreement of the local model against the LLM labels"""
+    records = [r for r in records if len((r.get("text") or "").strip()) >= MIN_TEXT_LENGTH]
+    if not records:
+        raise ValueError("No labeled reviews to benchmark on")
+
+    start = time.perf_counter()
+    verdicts = model.classify_batch(records)
+    elapsed = time.perf_counter() - start
+
+    predicted = np.asarray([v["is_violation"] for v in verdicts])
+    labels = np.asarray([bool(r.get("is_violation")) for r in records])
+    true_positives = int((predicted & labels).sum())
+
+    results = {
+        "reviews": len(records),
+        "violations": int(labels.sum()),
+        "local_reviews_per_sec": round(len(records) / max(elapsed, 1e-9), 1),
+        "agreement": round(float((predicted == labels).mean()), 4),
+        "precision": round(true_positives / max(int(predicted.sum()), 1), 4),
+        "recall": round(true_positives / max(int(labels.sum()), 1), 4),
+    }
+
+    if llm_sample:
+        # Live LLM timing on a sample (costs API calls)
+        from varda_scraper import _classify_with_llm
+
+        sample = records[:llm_sample]
+        start = time.perf_counter()
+        for r in sample:
+            _classify_with_llm(r["text"], r.get("rating", 0))
+        results["llm_reviews_per_sec"] = round(len(sample) / max(time.perf_counter() - start, 1e-9), 2)
+
+    return results
+
+
+def main():
+    output_dir = os.getenv("OUTPUT_DIR", "./output")
+    parser = argparse.ArgumentParser(description="Train or benchmark the local review classifier")
+    parser.add_argument("command", choices=["train", "benchmark"])
+    parser.add_argument("--data", default=os.path.join(output_dir, TRAINING_DATA_FILE))
+    parser.add_argument("--model", default=os.path.join(output_dir, MODEL_FILE))
+    parser.add_argument("--prompt-version", default=None, help="Only use labels from this prompt version")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of labels held out for benchmarking")
+    parser.add_argument("--llm-sample", type=int, default=0, help="Also time this many live LLM calls")
+    args = parser.parse_args()
+
+    records = load_training_data(args.data, args.prompt_version)
+    print(f"📚 Loaded {len(records)} labeled reviews from {args.data}")
+
+    if args.command == "train":
+        model = train(records)
+        model.save(args.model)
+        print(f"✅ Saved local classifier to {args.model}")
+        return
+
+    # Hold out the most recent labels so the benchmark measures generalization
+    split = int(len(records) * (1 - args.holdout))
+    model = train(records[:split])
+    results = benchmark(model, records[split:], args.llm_sample)
+    print(f"\n📊 Benchmark on {results['reviews']} held-out reviews ({results['violations']} violations)")
+    for key, value in results.items():
+        print(f"   {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+VARDA Maps Payloads
+Decodes the structured responses Google Maps fetches for search results and
+review pages, so businesses and reviews can be read straight off the network
+instead of walking the rendered DOM.
+
+Record raw payloads during a run with filters["record_payloads"] = True, then replay them:
+    python maps_payloads.py decode output/payloads/*.txt
+"""
+
+import argparse
+import json
+import os
+import threading
+
+SEARCH_URL_MARKERS = ("/search?tbm=map",)
+REVIEW_URL_MARKERS = ("/maps/rpc/listugcposts", "/maps/preview/review/listentitiesreviews")
+XSSI_PREFIX = ")]}'"
+
+
+#######################################################################
+# DECODING
+#######################################################################
+
+def _get(data, *path):
+    """Nested index lookup that returns None instead of raising"""
+    for key in path:
+        try:
+            data = data[key]
+        except (IndexError, KeyError, TypeError):
+            return None
+    return data
+
+
+def parse_payload(body: str):
+    """JSON from a Maps response body: strips the XSSI guard and unwraps {"d": "..."} envelopes"""
+    text = (body or "").strip()
+    if text.endswith('/*""*/'):
+        text = text[:-6].rstrip()
+    if text.startswith(XSSI_PREFIX):
+        text = text[len(XSSI_PREFIX):].lstrip()
+    if not text:
+        return None
+    data = json.loads(text)
+    if isinstance(data, dict) and isinstance(data.get("d"), str):
+        return parse_payload(data["d"])
+    return data
+
+
+def place_url(feature_id: str, place_id: str) -> str:
+    """Place URL in the same shape as feed links, so extract_place_id keys both paths alike"""
+    if feature_id and place_id:
+        return f"https://www.google.com/maps/place/data=!4m3!3m2!1s{feature_id}!19s{place_id}"
+    if feature_id:
+        return f"https://www.google.com/maps/place/data=!4m2!3m1!1s{feature_id}"
+    return f"https://www.google.com/maps/place/?q=place_id:{place_id}"
+
+
+def _decode_place(place: list):
+    name = _get(place, 11)
+    feature_id = _get(place, 10)
+    place_id = _get(place, 78)
+    if not isinstance(name, str) or not name or not (feature_id or place_id):
+        return None
+    rating = _get(place, 4, 7)
+    review_count = _get(place, 4, 8)
+    return {
+        "place_id": place_id if isinstance(place_id, str) else (feature_id or ""),
+        "name": name,
+        "url": place_url(feature_id if isinstance(feature_id, str) else "", place_id if isinstance(place_id, str) else ""),
+        "rating": float(rating) if isinstance(rating, (int, float)) else 0.0,
+        "review_count": int(review_count) if isinstance(review_count, (int, float)) else 0,
+        "website": _get(place, 7, 0) or "",
+        "phone": _get(place, 178, 0, 0) or "",
+    }
+
+
+def _find_place_lists(data, depth: int = 0):
+    """Yield place arrays: list entries whose element 14 looks like a place (name at 11)"""
+    if not isinstance(data, list) or depth > 6:
+        return
+    for item in data:
+        place = _get(item, 14)
+        if isinstance(place, list) and isinstance(_get(place, 11), str):
+            yield place
+        elif isinstance(item, list):
+            yield from _find_place_lists(item, depth + 1)
+
+
+def decode_search_results(data) -> list:
+    """Business dicts from a search payload, in feed order"""
+    results = []
+    seen = set()
+    for place in _find_place_lists(data):
+        result = _decode_place(place)
+        if result and result["url"] not in seen:
+            seen.add(result["url"])
+            results.append(result)
+    return results
+
+
+def _decode_ugc_review(entry):
+    """listugcposts layout"""
+    review = _get(entry, 0)
+    rating = _get(review, 2, 0, 0)
+    if not isinstance(rating, (int, float)):
+        return None
+    return {
+        "review_id": _get(review, 0) or "",
+        "reviewer_name": _get(review, 1, 4, 5, 0) or "",
+        "rating": int(rating),
+        "text": _get(review, 2, 15, 0, 0) or "",
+        "date": _get(review, 1, 6) or "",
+    }
+
+
+def _decode_legacy_review(entry):
+    """listentitiesreviews layout"""
+    rating = _get(entry, 4)
+    if not isinstance(rating, (int, float)):
+        return None
+    return {
+        "review_id": _get(entry, 10) or "",
+        "reviewer_name": _get(entry, 0, 1) or "",
+        "rating": int(rating),
+        "text": _get(entry, 3) or "",
+        "date": _get(entry, 1) or "",
+    }
+
+
+def decode_reviews(data) -> list:
+    """Review dicts from a review page payload (same keys as the DOM path, plus review_id)"""
+    reviews = []
+    for entry in _get(data, 2) or []:
+        review = _decode_ugc_review(entry) or _decode_legacy_review(entry)
+        if review and 1 <= review["rating"] <= 5:
+            review["text"] = review["text"].strip() if isinstance(review["text"], str) else ""
+            review["reviewer_name"] = review["reviewer_name"].strip() if isinstance(review["reviewer_name"], str) else ""
+            review["date"] = review["date"] if isinstance(review["date"], str) else ""
+            reviews.append(review)
+    return reviews
+
+
+def payload_kind(url: str) -> str:
+    if any(marker in url for marker in REVIEW_URL_MARKERS):
+        return "reviews"
+    if any(marker in url for marker in SEARCH_URL_MARKERS):
+        return "search"
+    return ""
+
+
+#######################################################################
+# COLLECTOR
+#######################################################################
+
+class PayloadCollector:
+    """Listens to a page's responses and keeps decoded places and reviews until the caller takes them"""
+
+    def __init__(self, page, record_dir: str = None):
+        self.page = page
+        self.record_dir = record_dir
+        self.places = []
+        self.reviews = []
+        self.payloads = {"search": 0, "reviews": 0}
+        self.fallbacks = {"search": 0, "reviews": 0}  # Times the caller had to read the DOM instead
+        self.decode_errors = 0
+        self._lock = threading.Lock()
+        if record_dir:
+            os.makedirs(record_dir, exist_ok=True)
+        page.on("response", self._on_response)
+
+    def detach(self):
+        self.page.remove_listener("response", self._on_response)
+
+    def reset(self, kind: str):
+        with self._lock:
+            if kind == "search":
+                self.places = []
+            else:
+                self.reviews = []
+
+    def summary(self) -> dict:
+        return {
+            "search_payloads": self.payloads["search"],
+            "review_payloads": self.payloads["reviews"],
+            "search_dom_fallbacks": self.fallbacks["search"],
+            "review_dom_fallbacks": self.fallbacks["reviews"],
+            "decode_errors": self.decode_errors,
+        }
+
+    def take_reviews(self) -> list:
+        with self._lock:
+            reviews, self.reviews = self.reviews, []
+        return reviews
+
+    async def _on_response(self, response):
+        kind = payload_kind(response.url)
+        if not kind:
+            return
+        try:
+            body = await response.text()
+        except Exception:
+            return  # Navigated away before the body arrived
+
+        with self._lock:
+            self.payloads[kind] += 1
+            count = self.payloads[kind]
+        if self.record_dir:
+            with open(os.path.join(self.record_dir, f"{kind}_{count:05d}.txt"), "w", encoding="utf-8") as f:
+                f.write(body)
+
+        try:
+            data = parse_payload(body)
+            decoded = decode_search_results(data) if kind == "search" else decode_reviews(data)
+        except (ValueError, TypeError):
+            self.decode_errors += 1
+            return
+
+        with self._lock:
+            if kind == "search":
+                self.places.extend(decoded)
+            else:
+                self.reviews.extend(decoded)
+
+
+#######################################################################
+# REPLAY
+#######################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode recorded Maps payloads")
+    parser.add_argument("command", choices=["decode"])
+    parser.add_argument("paths", nargs="+", help="Files recorded as search_*.txt or reviews_*.txt")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        with open(path, "r", encoding="utf-8") as f:
+            data = parse_payload(f.read())
+        kind = "reviews" if os.path.basename(path).startswith("reviews") else "search"
+        records = decode_reviews(data) if kind == "reviews" else decode_search_results(data)
+        print(f"📦 {path}: {len(records)} {kind}")
+        for record in records:
+            print(json.dumps(record, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+VARDA Near-Duplicate Detection
+Run-wide MinHash/LSH index of classified reviews. Near-identical text (spam and
+fake-review campaigns posted across many places) reuses the first verdict
+instead of paying for another classification.
+"""
+
+import re
+import zlib
+
+import numpy as np
+
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16  # 16 bands x 4 rows: pairs above ~0.6 Jaccard almost always share a bucket
+SHINGLE_SIZE = 3  # Word shingles
+SIMILARITY_THRESHOLD = 0.7  # Estimated Jaccard needed to reuse a verdict
+MIN_WORDS = 6  # Shorter reviews ("great food, nice staff") match too easily to be evidence
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class NearDuplicateIndex:
+    """MinHash signatures bucketed with LSH. Each entry keeps its verdict and the places it was seen."""
+
+    def __init__(self, num_permutations: int = NUM_PERMUTATIONS, bands: int = LSH_BANDS,
+                 threshold: float = SIMILARITY_THRESHOLD, seed: int = 1):
+        if num_permutations % bands:
+            raise ValueError("num_permutations must be divisible by bands")
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=num_permutations, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=num_permutations, dtype=np.uint64)
+        self.bands = bands
+        self.rows = num_permutations // bands
+        self.threshold = threshold
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = []
+        self.entries = []  # {"text", "classification", "occurrences": [{"business_name", "business_url", ...}]}
+
+    def signature(self, text: str):
+        """MinHash signature of the text's word shingles, or None if the text is too short"""
+        tokens = _TOKEN_RE.findall((text or "").lower())
+        if len(tokens) < MIN_WORDS:
+            return None
+        shingles = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        # (a * x + b) mod p for every permutation and shingle, then the minimum per permutation
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def find(self, text: str, signature=None):
+        """Return (entry_id, similarity) of the closest indexed review above the threshold, else (None, 0.0)"""
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None:
+            return None, 0.0
+
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get(key, ()))
+
+        best_id, best_similarity = None, 0.0
+        for entry_id in candidates:
+            similarity = float((self._signatures[entry_id] == signature).mean())
+            if similarity > best_similarity:
+                best_id, best_similarity = entry_id, similarity
+
+        if best_similarity >= self.threshold:
+            return best_id, best_similarity
+        return None, 0.0
+
+    def add(self, text: str, classification: dict, occurrence: dict, signature=None):
+        """Index a classified review. Returns its entry id, or None if the text is too short."""
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None:
+            return None
+
+        entry_id = len(self.entries)
+        self._signatures.append(signature)
+        self.entries.append({"text": text, "classification": classification, "occurrences": [occurrence]})
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(key, []).append(entry_id)
+        return entry_id
+
+    def add_occurrence(self, entry_id: int, occurrence: dict):
+        self.entries[entry_id]["occurrences"].append(occurrence)
+
+    def cluster(self, entry_id: int) -> list:
+        """Every place where this review (or a near copy of it) was seen"""
+        return list(self.entries[entry_id]["occurrences"])
+
+    def __len__(self) -> int:
+        return len(self.entries)
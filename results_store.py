@@ -0,0 +1,290 @@
+"""
+VARDA Results Store
+Local SQLite database (WAL mode) holding every run, the businesses it processed,
+their reviews with the verdict each one got, and the leads found. The scraper
+writes one transaction per business; the dashboard reads it for cross-run
+questions without loading every CSV, and in WAL mode readers never wait on a writer.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+RESULTS_DB_FILE = "results.sqlite"
+BUSY_TIMEOUT_MS = 5000  # Writers from other processes wait this long for the write lock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    status TEXT NOT NULL,
+    zip_codes TEXT,
+    filters TEXT,
+    stats TEXT
+);
+CREATE TABLE IF NOT EXISTS businesses (
+    place_key TEXT PRIMARY KEY,
+    place_id TEXT,
+    name TEXT,
+    url TEXT,
+    website TEXT,
+    phone TEXT,
+    rating REAL,
+    review_count INTEGER,
+    zip_code TEXT,
+    category TEXT,
+    last_run_id TEXT,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS reviews (
+    review_key TEXT PRIMARY KEY,
+    place_key TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    reviewer_name TEXT,
+    rating INTEGER,
+    text TEXT,
+    date TEXT,
+    scraped_at TEXT
+);
+CREATE TABLE IF NOT EXISTS classifications (
+    review_key TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    is_violation INTEGER NOT NULL,
+    confidence REAL,
+    violation_types TEXT,
+    reasoning TEXT,
+    source TEXT,
+    classified_at TEXT,
+    PRIMARY KEY (review_key, run_id)
+);
+CREATE TABLE IF NOT EXISTS leads (
+    lead_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    place_key TEXT NOT NULL,
+    name TEXT,
+    website TEXT,
+    email TEXT,
+    phone TEXT,
+    rating REAL,
+    review_count INTEGER,
+    zip_code TEXT,
+    category TEXT,
+    url TEXT,
+    violations_count INTEGER,
+    duplicate_evidence_count INTEGER,
+    found_at TEXT,
+    UNIQUE (run_id, place_key)
+);
+CREATE INDEX IF NOT EXISTS idx_businesses_place_id ON businesses (place_id);
+CREATE INDEX IF NOT EXISTS idx_businesses_zip_category ON businesses (zip_code, category);
+CREATE INDEX IF NOT EXISTS idx_businesses_category ON businesses (category);
+CREATE INDEX IF NOT EXISTS idx_reviews_place ON reviews (place_key);
+CREATE INDEX IF NOT EXISTS idx_reviews_run ON reviews (run_id);
+CREATE INDEX IF NOT EXISTS idx_classifications_run ON classifications (run_id, is_violation);
+CREATE INDEX IF NOT EXISTS idx_leads_run ON leads (run_id);
+CREATE INDEX IF NOT EXISTS idx_leads_place ON leads (place_key);
+CREATE INDEX IF NOT EXISTS idx_leads_zip_category ON leads (zip_code, category);
+CREATE INDEX IF NOT EXISTS idx_leads_category ON leads (category);
+CREATE INDEX IF NOT EXISTS idx_leads_run_rating ON leads (run_id, rating);
+CREATE INDEX IF NOT EXISTS idx_leads_run_violations ON leads (run_id, violations_count);
+"""
+
+# Columns the results table can be sorted by
+LEAD_SORT_COLUMNS = ("found_at", "name", "rating", "review_count", "violations_count", "zip_code", "category")
+
+# Filter entries that are not settings (preset business lists, injected clients)
+UNSTORED_FILTERS = ("businesses", "batch_client")
+
+
+def place_key(business: dict) -> str:
+    """Place ID, or the URL when the feed item has none (same key as the business table)"""
+    return business.get("place_id") or business.get("url") or business.get("name", "")
+
+
+def review_key(key: str, review: dict) -> str:
+    """Stable review identity: the Maps review ID when known, else place + reviewer + text"""
+    if review.get("review_id"):
+        return review["review_id"]
+    raw = "\x1f".join([key, review.get("reviewer_name", ""), review.get("text", "")])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class ResultsStore:
+    """Runs, businesses, reviews, classifications and leads in one SQLite file"""
+
+    def __init__(self, output_dir: str, filename: str = RESULTS_DB_FILE):
+        os.makedirs(output_dir, exist_ok=True)
+        self.path = os.path.join(output_dir, filename)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+
+    #######################################################################
+    # WRITES
+    #######################################################################
+
+    def start_run(self, run_id: str, zip_codes: list, filters: dict):
+        settings = {k: v for k, v in (filters or {}).items() if k not in UNSTORED_FILTERS}
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO runs (run_id, started_at, status, zip_codes, filters) VALUES (?, ?, 'running', ?, ?)"
+                " ON CONFLICT (run_id) DO UPDATE SET status = 'running', zip_codes = excluded.zip_codes, filters = excluded.filters",
+                (run_id, _now(), json.dumps(zip_codes or []), json.dumps(settings, default=str)),
+            )
+
+    def finish_run(self, run_id: str, status: str, stats: dict = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET finished_at = ?, status = ?, stats = ? WHERE run_id = ?",
+                (_now(), status, json.dumps(stats or {}, default=str), run_id),
+            )
+
+    def record_business(self, run_id: str, business: dict, classified: list = None, lead: dict = None):
+        """A processed business with its classified (review, classification) pairs and its lead, in one transaction"""
+        key = place_key(business)
+        now = _now()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO businesses (place_key, place_id, name, url, website, phone, rating, review_count,"
+                " zip_code, category, last_run_id, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, business.get("place_id", ""), business.get("name", ""), business.get("url", ""),
+                 business.get("website", ""), business.get("phone", ""), business.get("rating", 0.0),
+                 business.get("review_count", 0), str(business.get("zip_code", "")), business.get("category", ""),
+                 run_id, now),
+            )
+            review_rows = []
+            classification_rows = []
+            for review, classification in classified or []:
+                rkey = review_key(key, review)
+                review_rows.append((rkey, key, run_id, review.get("reviewer_name", ""), review.get("rating"),
+                                    review.get("text", ""), review.get("date", ""), now))
+                classification_rows.append((
+                    rkey, run_id, int(bool(classification.get("is_violation"))), classification.get("confidence"),
+                    json.dumps(classification.get("violation_types", [])), classification.get("reasoning", ""),
+                    classification.get("source", "llm"), now,
+                ))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO reviews (review_key, place_key, run_id, reviewer_name, rating, text, date, scraped_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", review_rows,
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO classifications (review_key, run_id, is_violation, confidence, violation_types,"
+                " reasoning, source, classified_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", classification_rows,
+            )
+            if lead is not None:
+                self._insert_lead(run_id, key, lead, now)
+
+    def _insert_lead(self, run_id: str, key: str, lead: dict, found_at: str):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO leads (run_id, place_key, name, website, email, phone, rating, review_count, zip_code,"
+            " category, url, violations_count, duplicate_evidence_count, found_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (run_id, key, lead.get("name", ""), lead.get("website", ""), lead.get("email", ""), lead.get("phone", ""),
+             lead.get("rating", 0.0), lead.get("review_count", 0), str(lead.get("zip_code", "")), lead.get("category", ""),
+             lead.get("url", ""), len(lead.get("flagged_reviews", [])), lead.get("duplicate_evidence_count", 0), found_at),
+        )
+
+    def update_duplicate_evidence(self, run_id: str, leads: list):
+        """Evidence counts attached after the leads were first stored"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE leads SET duplicate_evidence_count = ? WHERE run_id = ? AND place_key = ?",
+                [(lead.get("duplicate_evidence_count", 0), run_id, place_key(lead)) for lead in leads],
+            )
+
+    #######################################################################
+    # READS
+    #######################################################################
+
+    def _query(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=params)
+
+    def runs(self, limit: int = 50) -> pd.DataFrame:
+        """Most recent runs first, with their lead counts"""
+        return self._query(
+            "SELECT r.run_id, r.started_at, r.finished_at, r.status, r.zip_codes, r.stats,"
+            " (SELECT COUNT(*) FROM leads l WHERE l.run_id = r.run_id) AS leads"
+            " FROM runs r ORDER BY r.started_at DESC LIMIT ?", (limit,),
+        )
+
+    @staticmethod
+    def _lead_filters(run_id=None, zip_code=None, category=None, place_id=None, min_rating=None, max_rating=None,
+                      min_violations=None) -> tuple:
+        clauses, params = [], []
+        for column, value in (("l.run_id", run_id), ("l.zip_code", zip_code), ("l.category", category), ("b.place_id", place_id)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(str(value))
+        for clause, value in (("l.rating >= ?", min_rating), ("l.rating <= ?", max_rating), ("l.violations_count >= ?", min_violations)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    _LEAD_SELECT = (
+        "SELECT l.lead_id, l.run_id, l.place_key, l.found_at, l.name, l.zip_code, l.category, l.rating, l.review_count,"
+        " l.violations_count, l.duplicate_evidence_count, l.email, l.phone, l.website, l.url"
+        " FROM leads l LEFT JOIN businesses b ON b.place_key = l.place_key"
+    )
+
+    def leads(self, run_id: str = None, zip_code: str = None, category: str = None, place_id: str = None,
+              limit: int = 500) -> pd.DataFrame:
+        """Leads across runs, newest first, narrowed by any of the indexed columns"""
+        where, params = self._lead_filters(run_id, zip_code, category, place_id)
+        return self._query(f"{self._LEAD_SELECT}{where} ORDER BY l.found_at DESC, l.lead_id DESC LIMIT ?", (*params, limit))
+
+    def leads_page(self, run_id: str = None, zip_code: str = None, category: str = None, min_rating: float = None,
+                   max_rating: float = None, min_violations: int = None, sort: str = "found_at", descending: bool = True,
+                   page: int = 0, page_size: int = 25) -> tuple:
+        """One page of leads filtered and sorted in SQL, and the number of leads matching in total"""
+        if sort not in LEAD_SORT_COLUMNS:
+            raise ValueError(f"Not a lead sort column: {sort}")
+        where, params = self._lead_filters(run_id, zip_code, category, None, min_rating, max_rating, min_violations)
+        order = "DESC" if descending else "ASC"
+        with self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM leads l LEFT JOIN businesses b ON b.place_key = l.place_key{where}", params
+            ).fetchone()[0]
+        rows = self._query(
+            f"{self._LEAD_SELECT}{where} ORDER BY l.{sort} {order}, l.lead_id {order} LIMIT ? OFFSET ?",
+            (*params, page_size, page * page_size),
+        )
+        return rows, total
+
+    def flagged_reviews(self, run_id: str, key: str) -> pd.DataFrame:
+        """Reviews of one place that were flagged in one run"""
+        return self._query(
+            "SELECT r.rating, r.text, c.reasoning, c.confidence, c.violation_types, c.source, r.reviewer_name, r.date"
+            " FROM classifications c JOIN reviews r ON r.review_key = c.review_key"
+            " WHERE c.run_id = ? AND r.place_key = ? AND c.is_violation = 1 ORDER BY c.confidence DESC",
+            (run_id, key),
+        )
+
+    def filter_values(self, column: str, run_id: str = None) -> list:
+        """Distinct zip codes or categories that have leads (in one run, if given), for filter widgets"""
+        if column not in ("zip_code", "category"):
+            raise ValueError(f"Not a lead filter column: {column}")
+        where, params = (" AND run_id = ?", (run_id,)) if run_id else ("", ())
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT {column} FROM leads WHERE {column} != ''{where} ORDER BY {column}", params
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,151 @@
+"""
+VARDA Scheduler
+Scores businesses by expected lead yield and serves them from one priority queue
+across the whole zip code x category grid. For budgeted runs, a Thompson-sampling
+bandit splits the businesses-processed budget between grid cells.
+"""
+
+import heapq
+import json
+import math
+import os
+import threading
+
+import numpy as np
+
+YIELD_HISTORY_FILE = "yield_history.json"
+PRIOR_LEAD_RATE = 0.1  # Assumed lead rate before we have any history
+PRIOR_WEIGHT = 10  # Pseudo-businesses of prior behind each smoothed rate
+
+# Score weights - rating and review volume come from the feed, rates from past runs
+WEIGHT_RATING = 0.35
+WEIGHT_VOLUME = 0.15
+WEIGHT_CATEGORY = 0.25
+WEIGHT_ZIP = 0.25
+
+EXPLORATION_SHARE = 0.1  # Share of a budget spread uniformly so unproductive cells still get re-tested
+
+
+class YieldHistory:
+    """Businesses processed and leads found per category and per zip code, persisted across runs"""
+
+    def __init__(self, output_dir: str, filename: str = YIELD_HISTORY_FILE):
+        self.path = os.path.join(output_dir, filename)
+        self._lock = threading.Lock()
+        self.data = {"category": {}, "zip": {}, "cell": {}}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.data.update(json.load(f))
+            except (OSError, json.JSONDecodeError):
+                pass  # Start fresh rather than fail the run
+
+    def counts(self, kind: str, key: str) -> tuple:
+        entry = self.data[kind].get(key, {})
+        return entry.get("processed", 0), entry.get("leads", 0)
+
+    def global_rate(self) -> float:
+        processed = sum(e.get("processed", 0) for e in self.data["category"].values())
+        leads = sum(e.get("leads", 0) for e in self.data["category"].values())
+        return (leads + PRIOR_LEAD_RATE * PRIOR_WEIGHT) / (processed + PRIOR_WEIGHT)
+
+    def lead_rate(self, kind: str, key: str) -> float:
+        """Lead rate smoothed towards the global rate so rarely seen keys aren't extreme"""
+        processed, leads = self.counts(kind, key)
+        return (leads + self.global_rate() * PRIOR_WEIGHT) / (processed + PRIOR_WEIGHT)
+
+    def cell_prior(self, zip_code: str, category: str) -> tuple:
+        """Beta(alpha, beta) for a cell: its own history on top of a prior from its category and zip rates"""
+        global_rate = self.global_rate()
+        prior_mean = self.lead_rate("category", category) * self.lead_rate("zip", zip_code) / global_rate
+        prior_mean = min(max(prior_mean, 0.01), 0.99)
+        processed, leads = self.counts("cell", f"{zip_code}|{category}")
+        alpha = prior_mean * PRIOR_WEIGHT + leads
+        beta = (1.0 - prior_mean) * PRIOR_WEIGHT + (processed - leads)
+        return alpha, beta
+
+    def record(self, category: str, zip_code: str, is_lead: bool):
+        with self._lock:
+            for kind, key in (("category", category), ("zip", zip_code), ("cell", f"{zip_code}|{category}")):
+                entry = self.data[kind].setdefault(key, {"processed": 0, "leads": 0})
+                entry["processed"] += 1
+                entry["leads"] += int(is_lead)
+
+    def save(self):
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f)
+            os.replace(tmp_path, self.path)
+
+
+def score_business(business: dict, history: YieldHistory) -> float:
+    """Expected lead yield score in [0, 1]: low rating, many reviews, productive category and zip"""
+    rating = business.get("rating") or 0.0
+    rating_score = min(max((5.0 - rating) / 4.0, 0.0), 1.0) if rating else 0.5
+    volume_score = min(math.log10((business.get("review_count") or 0) + 1) / 3.0, 1.0)  # 1000+ reviews = 1
+
+    # Rates relative to the global rate, capped at 3x
+    global_rate = history.global_rate()
+    category_score = min(history.lead_rate("category", business.get("category", "")) / global_rate, 3.0) / 3.0
+    zip_score = min(history.lead_rate("zip", business.get("zip_code", "")) / global_rate, 3.0) / 3.0
+
+    return (
+        WEIGHT_RATING * rating_score
+        + WEIGHT_VOLUME * volume_score
+        + WEIGHT_CATEGORY * category_score
+        + WEIGHT_ZIP * zip_score
+    )
+
+
+class BusinessQueue:
+    """Max-priority queue of businesses; ties keep discovery order"""
+
+    def __init__(self):
+        self._heap = []
+        self._counter = 0
+
+    def push(self, business: dict, score: float):
+        business["priority"] = round(score, 4)
+        heapq.heappush(self._heap, (-score, self._counter, business))
+        self._counter += 1
+
+    def pop(self) -> dict:
+        return heapq.heappop(self._heap)[2]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+def allocate_budget(cells: list, budget: int, history: YieldHistory, exploration_share: float = EXPLORATION_SHARE,
+                    seed: int = None) -> dict:
+    """
+    Split a businesses-processed budget across (zip_code, category) cells.
+
+    An `exploration_share` of the budget is dealt round-robin in random order; each remaining
+    unit goes to the cell with the highest draw from its Beta posterior (Thompson sampling).
+    Returns {(zip_code, category): businesses}.
+    """
+    if not cells or budget <= 0:
+        return {cell: 0 for cell in cells}
+
+    rng = np.random.default_rng(seed)
+    allocation = np.zeros(len(cells), dtype=np.int64)
+
+    explore = min(int(round(budget * exploration_share)), budget)
+    order = rng.permutation(len(cells))
+    for i in range(explore):
+        allocation[order[i % len(cells)]] += 1
+
+    exploit = budget - explore
+    if exploit:
+        priors = np.array([history.cell_prior(zip_code, category) for zip_code, category in cells])
+        draws = rng.beta(priors[:, 0], priors[:, 1], size=(exploit, len(cells)))
+        allocation += np.bincount(draws.argmax(axis=1), minlength=len(cells))
+
+    return {cell: int(n) for cell, n in zip(cells, allocation)}
+
+
+def expected_cell_rate(history: YieldHistory, zip_code: str, category: str) -> float:
+    alpha, beta = history.cell_prior(zip_code, category)
+    return alpha / (alpha + beta)
@@ -0,0 +1,84 @@
+"""
+VARDA Search Cache
+Persistent cache of Google Maps search feeds keyed by normalized query.
+Stores every feed item unfiltered (place ID, name, URL, rating, review count), so
+reruns with different rating or review filters skip the search entirely.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+SEARCH_CACHE_FILE = "search_cache.sqlite"
+
+
+def normalize_query(query: str) -> str:
+    """Case, accent and whitespace insensitive cache key"""
+    text = unicodedata.normalize("NFKD", query or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def extract_place_id(url: str) -> str:
+    """Stable place identifier from a Maps place URL (ChIJ place ID, else the hex feature ID)"""
+    match = re.search(r"!19s(ChIJ[\w-]+)", url or "")
+    if match:
+        return match.group(1)
+    match = re.search(r"!1s(0x[0-9a-f]+:0x[0-9a-f]+)", url or "")
+    if match:
+        return match.group(1)
+    return ""
+
+
+class SearchCache:
+    """SQLite-backed query -> feed items cache with a TTL"""
+
+    def __init__(self, output_dir: str, ttl_hours: float, filename: str = SEARCH_CACHE_FILE):
+        os.makedirs(output_dir, exist_ok=True)
+        self.path = os.path.join(output_dir, filename)
+        self.ttl_seconds = ttl_hours * 3600
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            " query TEXT PRIMARY KEY,"
+            " fetched_at REAL NOT NULL,"
+            " results TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query: str):
+        """Cached feed items for the query, or None if missing or older than the TTL"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, results FROM search_cache WHERE query = ?", (normalize_query(query),)
+            ).fetchone()
+        if row is None or time.time() - row[0] > self.ttl_seconds:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[1])
+
+    def put(self, query: str, results: list):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache (query, fetched_at, results) VALUES (?, ?, ?)",
+                (normalize_query(query), time.time(), json.dumps(results, ensure_ascii=False)),
+            )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM search_cache WHERE fetched_at < ?", (time.time() - self.ttl_seconds,))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,139 @@
+"""
+VARDA Selector Memory
+Maps class names change often, so each field is read through a chain of selector
+variants. The registry counts hits per variant, tries the current winner first and
+only re-probes the alternates every so often, and keeps what it learned between runs.
+"""
+
+import json
+import os
+import threading
+
+SELECTOR_MEMORY_FILE = "selector_memory.json"
+REPROBE_EVERY = 50  # Lookups of a field between re-probes that try the runner-up first
+SCORE_DECAY = 0.9  # Recent hits count more, so a layout change takes over within a few lookups
+
+# Known variants per field, most likely first
+SELECTOR_CHAINS = {
+    # Review cards
+    "review.reviewer": ["div.d4r55", "div.TSUbDb", "span.X43Kjb"],
+    "review.rating": ["span.kvMYJc", "span[aria-label*='star']", "span[role='img'][aria-label]"],
+    "review.text": ["span.wiI7pd", "span[data-value]", "div.MyEned"],
+    "review.date": ["span.rsqaWe", "span.xRkPPb"],
+    # Place page
+    "details.rating": ['div.F7nice span[aria-hidden="true"]', 'div.F7nice span'],
+    "details.review_count": ['div.F7nice button[aria-label*="review"]', 'div.F7nice span[aria-label*="review"]'],
+    "details.website": ['a[data-item-id="authority"]', 'a[aria-label^="Website"]'],
+    "details.phone": ['button[data-item-id*="phone"]', 'button[aria-label^="Phone"]'],
+    # Search feed
+    "search.item": ['div[role="feed"] > div > div > a[href*="/maps/place/"]', 'div[role="feed"] a[href*="/maps/place/"]'],
+    "search.rating": ["span.kvMYJc", "span[role='img'][aria-label*='star']"],
+}
+
+
+class SelectorMemory:
+    """Per-field selector variants ordered by recent hit rate, persisted as JSON"""
+
+    def __init__(self, output_dir: str = None, chains: dict = None, reprobe_every: int = REPROBE_EVERY,
+                 filename: str = SELECTOR_MEMORY_FILE):
+        self.path = os.path.join(output_dir, filename) if output_dir else None
+        self.reprobe_every = reprobe_every
+        self._lock = threading.Lock()
+        self._lookups = {}
+        self.stats = {}  # {field: {selector: {"hits", "misses", "score"}}}
+
+        saved = {}
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    saved = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                pass  # Relearn rather than fail the run
+
+        for field, selectors in (chains or SELECTOR_CHAINS).items():
+            self.stats[field] = {
+                selector: saved.get(field, {}).get(selector, {"hits": 0, "misses": 0, "score": 0.0})
+                for selector in selectors
+            }
+
+    def candidates(self, field: str) -> list:
+        """Variants to try, best recent score first; periodically the runner-up leads instead"""
+        with self._lock:
+            variants = self.stats[field]
+            lookup = self._lookups.get(field, 0) + 1
+            self._lookups[field] = lookup
+        ordered = sorted(variants, key=lambda s: -variants[s]["score"])
+        if len(ordered) > 1 and lookup % self.reprobe_every == 0:
+            ordered[0], ordered[1] = ordered[1], ordered[0]
+        return ordered
+
+    def record(self, field: str, selector: str, hit: bool):
+        with self._lock:
+            entry = self.stats[field][selector]
+            entry["hits" if hit else "misses"] += 1
+            entry["score"] = round(entry["score"] * SCORE_DECAY + (1.0 if hit else 0.0), 4)
+
+    def record_chain(self, field: str, tried: list, matched: str = None):
+        """Record a lookup done outside Playwright locators (e.g. in one page.evaluate)"""
+        for selector in tried:
+            self.record(field, selector, selector == matched)
+            if selector == matched:
+                break
+
+    def winner(self, field: str) -> str:
+        variants = self.stats[field]
+        return max(variants, key=lambda s: variants[s]["score"])
+
+    async def text(self, scope, field: str, timeout: int = 100) -> str:
+        """Text of the first variant that is visible and not blank"""
+        for selector in self.candidates(field):
+            try:
+                element = scope.locator(selector).first
+                if await element.is_visible(timeout=timeout):
+                    text = (await element.text_content() or "").strip()
+                    if text:
+                        self.record(field, selector, True)
+                        return text
+            except:
+                pass
+            self.record(field, selector, False)
+        return ""
+
+    async def attribute(self, scope, field: str, name: str, timeout: int = 100) -> str:
+        """Attribute of the first variant that is visible and has it set"""
+        for selector in self.candidates(field):
+            try:
+                element = scope.locator(selector).first
+                if await element.is_visible(timeout=timeout):
+                    value = await element.get_attribute(name) or ""
+                    if value:
+                        self.record(field, selector, True)
+                        return value
+            except:
+                pass
+            self.record(field, selector, False)
+        return ""
+
+    async def all(self, scope, field: str) -> list:
+        """Every element matched by the first variant that matches any"""
+        for selector in self.candidates(field):
+            try:
+                elements = await scope.locator(selector).all()
+            except:
+                elements = []
+            self.record(field, selector, bool(elements))
+            if elements:
+                return elements
+        return []
+
+    def summary(self) -> dict:
+        return {field: self.winner(field) for field in self.stats}
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.stats, f, indent=2)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,121 @@
+"""
+Batch mode end to end against LocalBatchClient: reviews queued into PendingBatch,
+submitted, polled and merged back into leads by classify_deferred_batch
+"""
+
+import asyncio
+import json
+
+import batch_classifier
+import varda_scraper
+from batch_classifier import LocalBatchClient, PendingBatch
+
+FILTERS = {"max_reviews_per_business": 10, "prefilter_threshold": 0.2, "batch_poll_seconds": 0}
+
+BUSINESSES = {
+    "Luigi's Trattoria": [
+        {"text": "The owner is a crook and a liar, he screamed at my kid!!!", "rating": 1},
+        {"text": "Cold pasta and a long wait, will not come back.", "rating": 2},
+        {"text": "Lovely dinner, friendly staff and great tiramisu.", "rating": 5},
+    ],
+    "Harbor Dental Care": [
+        {"text": "Rude receptionist, total scam, they are all liars!!!", "rating": 1},
+        {"text": "ok", "rating": 3},
+    ],
+    "Sunset Bakery": [
+        {"text": "Bread was stale and overpriced this morning.", "rating": 2},
+    ],
+}
+
+
+def responder(body: dict) -> str:
+    """Flags reviews that call someone a liar"""
+    prompt = body["messages"][-1]["content"]
+    is_violation = "liar" in prompt
+    return json.dumps({
+        "is_violation": is_violation,
+        "confidence": 0.9 if is_violation else 0.8,
+        "violation_types": ["Restricted content"] if is_violation else [],
+        "reasoning": "Personal attack" if is_violation else "Ordinary complaint",
+    })
+
+
+class RecordingBatchClient(LocalBatchClient):
+    """Keeps the order of batch creates and retrieves"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = []
+        create, retrieve = self.batches.create, self.batches.retrieve
+        self.batches.create = lambda **kw: self.calls.append("create") or create(**kw)
+        self.batches.retrieve = lambda batch_id: self.calls.append("retrieve") or retrieve(batch_id)
+
+
+def new_stats() -> dict:
+    return {"total_reviews_scraped": 0, "reviews_classified": 0, "prefilter_skipped": 0, "llm_calls": 0,
+            "total_violations_found": 0, "total_leads": 0}
+
+
+def run_batch_mode(tmp_path, monkeypatch, client):
+    async def fake_batches(page, max_reviews, *args):
+        yield [{"reviewer_name": "Dana R.", "date": "a week ago", **review} for review in BUSINESSES[page]]
+
+    async def no_sleep(*args):
+        pass
+
+    monkeypatch.setattr(varda_scraper, "iter_review_batches", fake_batches)
+    monkeypatch.setattr(asyncio, "sleep", no_sleep)
+
+    stats = new_stats()
+    pending = PendingBatch(str(tmp_path), "test")
+    deferred = []
+    leads = []
+    events = []
+
+    async def run():
+        for name in BUSINESSES:
+            business = {"name": name, "zip_code": "92101", "category": "restaurant"}
+            # The fake page is the business name, so fake_batches knows which reviews to serve
+            await varda_scraper.queue_business_reviews(name, business, FILTERS, stats, pending, deferred)
+        await varda_scraper.classify_deferred_batch(None, client, pending, deferred, FILTERS, stats, leads, "test",
+                                                    progress_callback=events.append)
+
+    asyncio.run(run())
+    return stats, pending, leads, events
+
+
+def test_batch_mode_merges_verdicts_into_leads(tmp_path, monkeypatch):
+    stats, pending, leads, _ = run_batch_mode(tmp_path, monkeypatch, LocalBatchClient(responder, pending_polls=2))
+
+    # "ok" is too short and the 5-star review is pre-filtered; everything else was queued
+    assert len(pending) == 4
+    assert stats["reviews_queued"] == 4
+    assert stats["prefilter_skipped"] == 1
+    assert stats["reviews_classified"] == 6
+    assert stats["llm_calls"] == 4
+
+    assert [lead["name"] for lead in leads] == ["Luigi's Trattoria", "Harbor Dental Care"]
+    assert [len(lead["flagged_reviews"]) for lead in leads] == [1, 1]
+    flagged = leads[0]["flagged_reviews"][0]
+    assert flagged["text"].startswith("The owner is a crook")
+    assert flagged["classification"]["is_violation"] is True
+    assert flagged["classification"]["reasoning"] == "Personal attack"
+    assert flagged["classification"]["source"] == "llm"
+    assert stats["total_leads"] == 2
+    assert stats["total_violations_found"] == 2
+
+
+def test_batch_files_are_submitted_before_waiting(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_classifier, "MAX_REQUESTS_PER_BATCH", 2)
+    client = RecordingBatchClient(responder, pending_polls=3)
+
+    stats, pending, leads, events = run_batch_mode(tmp_path, monkeypatch, client)
+
+    assert len(pending.paths) == 2
+    assert pending.counts == [2, 2]
+    # Both batches exist before the first poll, so they run side by side
+    assert client.calls[:2] == ["create", "create"]
+    assert "create" not in client.calls[2:]
+    submitted = [event["message"] for event in events if event["status"] == "batch_submitted"]
+    assert len(submitted) == 2 and all(message.startswith("Submitted 2 reviews") for message in submitted)
+    assert [lead["name"] for lead in leads] == ["Luigi's Trattoria", "Harbor Dental Care"]
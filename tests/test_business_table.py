@@ -0,0 +1,90 @@
+"""
+BusinessTable: unfiltered search feeds stored once, re-filtered without a rescrape,
+and places queued only until they have been processed
+"""
+
+import pandas as pd
+
+from business_table import BusinessTable
+
+FEED = [
+    {"place_id": "ChIJluigi", "name": "Luigi's Trattoria", "url": "https://maps/luigi", "rating": 3.4, "review_count": 128},
+    {"place_id": "ChIJharbor", "name": "Harbor Dental Care", "url": "https://maps/harbor", "rating": 4.1, "review_count": 57},
+    {"place_id": "", "name": "Sunset Bakery", "url": "https://maps/sunset", "rating": 2.8, "review_count": 9},
+    {"place_id": "ChIJnew", "name": "Brand New Cafe", "url": "https://maps/new", "rating": None, "review_count": None},
+]
+
+
+def names(df: pd.DataFrame) -> list:
+    return sorted(df["name"])
+
+
+def test_upsert_keys_places_and_fills_gaps(tmp_path):
+    table = BusinessTable(str(tmp_path))
+    table.upsert(FEED, 92101, "restaurant")
+
+    assert len(table) == 4
+    rows = table.df.set_index("name")
+    assert rows.loc["Sunset Bakery", "place_key"] == "https://maps/sunset"  # No place ID, keyed by URL
+    assert rows.loc["Luigi's Trattoria", "place_key"] == "ChIJluigi"
+    assert rows.loc["Brand New Cafe", "rating"] == 0.0
+    assert rows.loc["Brand New Cafe", "review_count"] == 0
+    assert (table.df["zip_code"] == "92101").all()
+    assert table.df["processed_at"].isna().all()
+
+
+def test_upsert_refreshes_known_places_per_cell(tmp_path):
+    table = BusinessTable(str(tmp_path))
+    table.upsert(FEED[:2], "92101", "restaurant")
+    table.upsert([{**FEED[0], "rating": 3.1, "review_count": 140}], "92101", "restaurant")
+    table.upsert(FEED[:1], "92101", "dentist")  # Same place in another search is another row
+
+    assert len(table) == 3
+    luigi = table.df[table.df["place_key"] == "ChIJluigi"].set_index("category")
+    assert luigi.loc["restaurant", "rating"] == 3.1
+    assert luigi.loc["restaurant", "review_count"] == 140
+    assert luigi.loc["dentist", "rating"] == 3.4
+
+
+def test_new_candidates_apply_filters(tmp_path):
+    table = BusinessTable(str(tmp_path))
+    table.upsert(FEED, "92101", "restaurant")
+    table.upsert(FEED[1:2], "92102", "dentist")
+
+    assert names(table.new_candidates(1.0, 4.0, 10)) == ["Luigi's Trattoria"]
+    assert names(table.new_candidates(1.0, 4.5, 0)) == ["Harbor Dental Care", "Luigi's Trattoria", "Sunset Bakery"]
+    assert names(table.new_candidates(1.0, 4.5, 0, categories=["dentist"])) == ["Harbor Dental Care"]
+    assert names(table.new_candidates(1.0, 4.5, 0, zip_codes=[92102])) == ["Harbor Dental Care"]
+    # A place seen in two cells is queued once
+    assert len(table.new_candidates(1.0, 4.5, 50)) == 2
+
+
+def test_mark_processed_drops_a_place_from_every_cell(tmp_path):
+    table = BusinessTable(str(tmp_path))
+    table.upsert(FEED, "92101", "restaurant")
+    table.upsert(FEED[:2], "92102", "restaurant")
+
+    table.mark_processed({"place_id": "ChIJluigi"})
+    table.mark_processed({"place_id": "", "url": "https://maps/sunset"})
+    table.mark_processed({"name": "Unknown"})  # No key, ignored
+
+    assert names(table.new_candidates(1.0, 4.5, 0)) == ["Harbor Dental Care"]
+    assert table.df.loc[table.df["place_key"] == "ChIJluigi", "processed_at"].notna().all()
+
+    # A later search of the same cell keeps the processed mark
+    table.upsert(FEED[:1], "92101", "restaurant")
+    assert names(table.new_candidates(1.0, 4.5, 0)) == ["Harbor Dental Care"]
+
+
+def test_table_round_trips_through_parquet(tmp_path):
+    table = BusinessTable(str(tmp_path))
+    table.upsert(FEED, "92101", "restaurant")
+    table.mark_processed({"place_id": "ChIJharbor"})
+    table.save()
+
+    reloaded = BusinessTable(str(tmp_path))
+    assert len(reloaded) == 4
+    assert names(reloaded.new_candidates(1.0, 4.5, 0)) == ["Luigi's Trattoria", "Sunset Bakery"]
+    businesses = reloaded.to_businesses(reloaded.new_candidates(3.0, 4.5, 0))
+    assert businesses == [{"place_id": "ChIJluigi", "name": "Luigi's Trattoria", "url": "https://maps/luigi",
+                           "rating": 3.4, "review_count": 128, "category": "restaurant", "zip_code": "92101"}]
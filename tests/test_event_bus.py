@@ -0,0 +1,130 @@
+"""
+EventBus: per-job offsets, replay from an offset out of a bounded log, drop-oldest
+subscriber buffers, and closing a channel
+"""
+
+import threading
+import time
+
+from event_bus import EventBus
+
+
+def publish(bus: EventBus, job_id: str, count: int, start: int = 0):
+    for i in range(start, start + count):
+        bus.publish(job_id, {"status": "business_done", "n": i})
+
+
+def ns(events: list) -> list:
+    return [event["n"] for event in events]
+
+
+def test_events_are_stamped_per_job():
+    bus = EventBus()
+    first = bus.publish("job_a", {"status": "started"})
+    bus.publish("job_b", {"status": "started"})
+    second = bus.publish("job_a", {"status": "searching"})
+
+    assert (first["job_id"], first["offset"]) == ("job_a", 0)
+    assert (second["job_id"], second["offset"]) == ("job_a", 1)
+    assert bus.channel("job_b").next_offset == 1
+
+
+def test_replay_from_an_offset():
+    bus = EventBus(log_size=5)
+    publish(bus, "job", 3)
+    channel = bus.get_channel("job")
+
+    events, missed = channel.replay(1)
+    assert (ns(events), missed) == ([1, 2], 0)
+    assert channel.replay(3) == ([], 0)
+    assert ns(channel.replay(0, limit=2)[0]) == [0, 1]
+
+    # Older events left the log: the reader is told how many it missed
+    publish(bus, "job", 5, start=3)
+    events, missed = channel.replay(1)
+    assert (ns(events), missed) == ([3, 4, 5, 6, 7], 2)
+    assert [event["offset"] for event in events] == [3, 4, 5, 6, 7]
+
+
+def test_subscription_drops_oldest_when_behind():
+    bus = EventBus()
+    subscription = bus.subscribe("job", buffer_size=3)
+    publish(bus, "job", 5)
+
+    result = bus.read(subscription.subscriber_id)
+    assert ns(result["events"]) == [2, 3, 4]
+    assert result["dropped"] == 2
+    assert result["closed"] is False
+
+    # The drop count is reported once
+    publish(bus, "job", 1, start=5)
+    result = bus.read(subscription.subscriber_id)
+    assert (ns(result["events"]), result["dropped"]) == ([5], 0)
+
+
+def test_slow_subscriber_does_not_affect_others():
+    bus = EventBus()
+    slow = bus.subscribe("job", buffer_size=2)
+    fast = bus.subscribe("job", buffer_size=100)
+    publish(bus, "job", 10)
+
+    assert bus.read(slow.subscriber_id)["dropped"] == 8
+    assert ns(bus.read(fast.subscriber_id)["events"]) == list(range(10))
+
+
+def test_subscribe_from_offset_prefills_the_buffer():
+    bus = EventBus()
+    publish(bus, "job", 4)
+    subscription = bus.subscribe("job", offset=2)
+    publish(bus, "job", 1, start=4)
+
+    assert ns(bus.read(subscription.subscriber_id)["events"]) == [2, 3, 4]
+    assert bus.read(bus.subscribe("job").subscriber_id)["events"] == []  # None = only new events
+
+
+def test_close_wakes_waiting_readers():
+    bus = EventBus()
+    subscription = bus.subscribe("job")
+    channel = bus.get_channel("job")
+    threading.Timer(0.05, channel.close).start()
+
+    start = time.monotonic()
+    result = bus.read(subscription.subscriber_id, wait=5.0)
+    assert time.monotonic() - start < 2.0
+    assert result == {"events": [], "dropped": 0, "closed": True}
+    assert channel.replay(0, wait=5.0) == ([], 0)
+
+
+def test_closed_is_reported_only_once_the_buffer_is_drained():
+    bus = EventBus()
+    subscription = bus.subscribe("job")
+    publish(bus, "job", 3)
+    bus.get_channel("job").close()
+
+    first = bus.read(subscription.subscriber_id, limit=2)
+    assert (ns(first["events"]), first["closed"]) == ([0, 1], False)
+    last = bus.read(subscription.subscriber_id)
+    assert (ns(last["events"]), last["closed"]) == ([2], True)
+
+
+def test_removed_channel_and_unsubscribed_readers_are_gone():
+    bus = EventBus()
+    kept = bus.subscribe("job_a")
+    gone = bus.subscribe("job_b")
+    channel = bus.get_channel("job_b")
+
+    bus.remove_channel("job_b")
+    assert channel.closed
+    assert bus.get_channel("job_b") is None
+    assert bus.read(gone.subscriber_id) is None
+
+    bus.unsubscribe(kept.subscriber_id)
+    assert bus.read(kept.subscriber_id) is None
+
+
+def test_idle_subscriptions_expire():
+    bus = EventBus(idle_seconds=0.0)
+    subscription = bus.subscribe("job")
+    time.sleep(0.01)
+    bus.expire_idle()
+    assert bus.read(subscription.subscriber_id) is None
@@ -0,0 +1,68 @@
+"""
+Wide CSV layout: the per-lead rows written live by LeadSink (wide_row) must match
+the frame export_leads and the dashboard download build (leads_to_wide)
+"""
+
+import csv
+import io
+
+from exporter import LEAD_COLUMNS, TOP_VIOLATIONS, leads_to_wide, wide_row
+
+
+def flagged(text: str, confidence: float, rating=1, reviewer="Dana R.") -> dict:
+    return {
+        "text": text,
+        "rating": rating,
+        "reviewer_name": reviewer,
+        "date": "2 weeks ago",
+        "classification": {"is_violation": True, "confidence": confidence, "reasoning": "Personal attack",
+                           "violation_types": ["harassment"], "source": "llm"},
+    }
+
+
+LEADS = [
+    {"name": "Luigi's Trattoria", "website": "https://luigis.example/", "email": "", "phone": "(619) 555-0142",
+     "rating": 3.4, "review_count": 128, "zip_code": 92101, "category": "restaurant",
+     "flagged_reviews": [flagged(f"Review {i}, with a comma", 0.87 + i / 100) for i in range(TOP_VIOLATIONS + 1)]},
+    {"name": "Harbor Dental Care", "rating": 4.1, "review_count": 57, "zip_code": "92102", "category": "dentist",
+     "flagged_reviews": [flagged('The "doctor" was rude\nand left', 0.7, rating=None, reviewer="")]},
+    {"name": "Sunset Bakery", "rating": None, "review_count": None, "zip_code": "92103", "category": "bakery",
+     "flagged_reviews": []},
+]
+
+
+def rows_as_csv(rows: list) -> str:
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(LEAD_COLUMNS)
+    writer.writerows(rows)
+    return out.getvalue()
+
+
+def test_wide_row_has_one_value_per_column():
+    for lead in LEADS:
+        assert len(wide_row(lead)) == len(LEAD_COLUMNS)
+
+
+def test_wide_row_matches_leads_to_wide_csv():
+    frame = leads_to_wide(LEADS)
+    assert list(frame.columns) == LEAD_COLUMNS
+    assert rows_as_csv([wide_row(lead) for lead in LEADS]) == frame.to_csv(index=False, lineterminator="\n")
+
+
+def test_wide_row_values():
+    row = dict(zip(LEAD_COLUMNS, wide_row(LEADS[0])))
+    assert row["business_name"] == "Luigi's Trattoria"
+    assert row["violations_count"] == TOP_VIOLATIONS + 1  # All flagged reviews counted, top ones flattened
+    assert row["zip_code"] == "92101"
+    assert row["rating"] == 3.4
+    assert row["review_1_confidence"] == 0.87
+    assert row[f"review_{TOP_VIOLATIONS}_text"] == f"Review {TOP_VIOLATIONS - 1}, with a comma"
+
+    empty = dict(zip(LEAD_COLUMNS, wide_row(LEADS[2])))
+    assert empty["rating"] == 0.0 and empty["review_count"] == 0
+    assert empty["review_1_text"] == "" and empty["review_1_confidence"] == ""
+
+
+def test_empty_export_keeps_the_header():
+    assert list(leads_to_wide([]).columns) == LEAD_COLUMNS
@@ -0,0 +1,64 @@
+"""
+LeadSink: leads appended live to one CSV per zip code and one JSONL for the run,
+readable while the run is still writing
+"""
+
+import csv
+import json
+import os
+
+from exporter import LEAD_COLUMNS, wide_row
+from lead_sink import LeadSink
+
+LEADS = [
+    {"name": "Luigi's Trattoria", "rating": 3.4, "review_count": 128, "zip_code": "92101", "category": "restaurant",
+     "flagged_reviews": [{"text": "The owner is a liar, he screamed at my kid", "rating": 1, "reviewer_name": "Dana R.",
+                          "date": "2 weeks ago", "classification": {"confidence": 0.9, "reasoning": "Personal attack"}}]},
+    {"name": "Harbor Dental Care", "rating": 4.1, "review_count": 57, "zip_code": "92102", "category": "dentist",
+     "flagged_reviews": []},
+    {"name": "Sunset Bakery", "rating": 2.8, "review_count": 9, "zip_code": "92101", "category": "bakery",
+     "flagged_reviews": []},
+]
+
+
+def read_csv(path: str) -> list:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_leads_split_by_zip_with_one_header(tmp_path):
+    with LeadSink(str(tmp_path), "20260101_120000", fsync_every=100, fsync_seconds=3600) as sink:
+        for lead in LEADS:
+            sink.write(lead)
+
+        # Flushed per lead, so the files are complete before close
+        assert sink.count == 3
+        assert set(sink.csv_paths) == {"92101", "92102"}
+        rows = read_csv(sink.csv_paths["92101"])
+        assert rows[0] == LEAD_COLUMNS
+        assert [row[0] for row in rows[1:]] == ["Luigi's Trattoria", "Sunset Bakery"]
+        assert rows[1] == [str(value) for value in wide_row(LEADS[0])]
+
+        with open(sink.jsonl_path, "r", encoding="utf-8") as f:
+            assert [json.loads(line)["name"] for line in f] == [lead["name"] for lead in LEADS]
+
+    assert os.path.basename(sink.csv_paths["92102"]) == "violations_leads_92102_20260101_120000.csv"
+    assert len(read_csv(sink.csv_paths["92102"])) == 2
+
+
+def test_reopened_sink_appends_without_a_second_header(tmp_path):
+    for lead in LEADS[:2]:
+        with LeadSink(str(tmp_path), "20260101_120000") as sink:
+            sink.write({**lead, "zip_code": "92101"})
+
+    rows = read_csv(sink.csv_paths["92101"])
+    assert rows.count(LEAD_COLUMNS) == 1
+    assert len(rows) == 3
+
+
+def test_close_is_idempotent(tmp_path):
+    sink = LeadSink(str(tmp_path), "20260101_120000")
+    sink.write(LEADS[0])
+    sink.close()
+    sink.close()
+    sink.flush()
@@ -0,0 +1,210 @@
+"""
+Decoding of recorded Maps payloads (tests/fixtures, in the format written by
+filters["record_payloads"]) and the DOM fallback when a payload can't be decoded
+"""
+
+import asyncio
+import os
+
+import pytest
+
+import varda_scraper
+from maps_payloads import PayloadCollector, decode_reviews, decode_search_results, parse_payload
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_fixture(name: str):
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return parse_payload(f.read())
+
+
+#######################################################################
+# DECODING
+#######################################################################
+
+def test_decode_search_results():
+    places = decode_search_results(load_fixture("search_payload.txt"))
+
+    assert [place["name"] for place in places] == ["Luigi's Trattoria", "Harbor Dental Care"]  # Repeated place dropped
+    luigi, harbor = places
+    assert luigi["place_id"] == "ChIJ3W8jn1FV2YARLuigi0001"
+    assert luigi["rating"] == 3.4
+    assert luigi["review_count"] == 128
+    assert luigi["website"] == "https://luigis.example/"
+    assert luigi["phone"] == "(619) 555-0142"
+    assert harbor["place_id"] == "ChIJq6qq1FV2YARHarbor0002"
+    assert harbor["rating"] == 4.1
+    assert harbor["website"] == ""
+
+
+def test_search_result_urls_key_like_feed_links():
+    for place in decode_search_results(load_fixture("search_payload.txt")):
+        assert varda_scraper.extract_place_id(place["url"]) == place["place_id"]
+
+
+def test_decode_reviews():
+    reviews = decode_reviews(load_fixture("reviews_payload.txt"))
+
+    # The 0-star owner entry is skipped; the review without text is kept with empty text
+    assert [review["rating"] for review in reviews] == [1, 2, 1]
+    first = reviews[0]
+    assert first["text"] == "The manager screamed at my kid and told us to leave. Never again."
+    assert first["reviewer_name"] == "Dana R."
+    assert first["date"] == "2 weeks ago"
+    assert first["review_id"] == "ChdDSUhNMG9nS0VJQ0FnSURuMXBtcA"
+    assert reviews[1]["text"] == "Cold pasta, 45 minute wait, and they charged for bread."
+    assert reviews[1]["date"] == "a month ago"
+    assert reviews[2]["text"] == ""
+
+
+def test_decode_legacy_reviews():
+    reviews = decode_reviews(load_fixture("reviews_legacy_payload.txt"))
+
+    assert [(review["rating"], review["reviewer_name"], review["date"]) for review in reviews] == [
+        (2, "Sam K", "5 months ago"),
+        (5, "Ana", "a year ago"),
+    ]
+    assert reviews[0]["text"] == "Dirty tables and the staff ignored us."
+
+
+def test_unexpected_layout_decodes_to_nothing():
+    data = parse_payload(")]}'\n[null,\"CAESY0NB\",[[1,2],[\"x\",[null]]]]")
+    assert decode_reviews(data) == []
+    assert decode_search_results(data) == []
+
+
+#######################################################################
+# DOM FALLBACK
+#######################################################################
+
+class FakeNode:
+    """Just enough of a Playwright locator/element for the scraper's DOM paths"""
+
+    def __init__(self, text: str = "", attrs: dict = None, children: dict = None):
+        self.text = text
+        self.attrs = attrs or {}
+        self.children = children or {}
+
+    def locator(self, selector: str):
+        return FakeLocator(self.children.get(selector, []))
+
+    async def is_visible(self, timeout=None):
+        return True
+
+    async def text_content(self):
+        return self.text
+
+    async def get_attribute(self, name: str):
+        return self.attrs.get(name)
+
+
+class FakeLocator:
+    def __init__(self, nodes: list):
+        self.nodes = nodes
+
+    @property
+    def first(self):
+        return self.nodes[0] if self.nodes else FakeLocator([])
+
+    async def all(self):
+        return self.nodes
+
+    async def is_visible(self, timeout=None):
+        return False
+
+    async def count(self):
+        return len(self.nodes)
+
+    async def wait_for(self, timeout=None):
+        pass
+
+    async def fill(self, value):
+        pass
+
+    async def press(self, key):
+        pass
+
+
+class FakePage(FakeNode):
+    url = "https://www.google.com/maps?hl=en"
+
+    async def goto(self, url, **kwargs):
+        self.url = url
+
+    async def evaluate(self, script):
+        pass
+
+    async def wait_for_selector(self, selector, timeout=None):
+        pass
+
+    def on(self, event, handler):
+        pass
+
+    def remove_listener(self, event, handler):
+        pass
+
+
+class FakeResponse:
+    def __init__(self, url: str, body: str):
+        self.url = url
+        self.body = body
+
+    async def text(self):
+        return self.body
+
+
+@pytest.fixture(autouse=True)
+def no_waiting(monkeypatch):
+    async def sleep(*args):
+        pass
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+
+
+def test_malformed_search_payload_falls_back_to_dom():
+    item = FakeNode(
+        text="Harbor Dental Care 4.1 stars (57)",
+        attrs={"aria-label": "Harbor Dental Care",
+               "href": "https://www.google.com/maps/place/Harbor/data=!4m7!3m6!1s0x80d9551b2c3d4e5f:0x2a3b4c5d6e7f8091!19sChIJq6qq1FV2YARHarbor0002"},
+    )
+    page = FakePage(children={'div[role="feed"] > div > div > a[href*="/maps/place/"]': [item]})
+    collector = PayloadCollector(page)
+
+    async def run():
+        await collector._on_response(FakeResponse("https://www.google.com/search?tbm=map&q=dentist", ")]}'\n[\"dentist\",[[[null,"))
+        return await varda_scraper.search_businesses(page, "dentist 92101", collector=collector)
+
+    results = asyncio.run(run())
+
+    assert collector.decode_errors == 1
+    assert collector.fallbacks["search"] == 1
+    assert [(r["name"], r["place_id"], r["rating"], r["review_count"]) for r in results] == [
+        ("Harbor Dental Care", "ChIJq6qq1FV2YARHarbor0002", 4.1, 57),
+    ]
+
+
+def test_malformed_review_payload_falls_back_to_dom():
+    card = FakeNode(
+        attrs={"data-review-id": "dom-1"},
+        children={
+            "span.kvMYJc": [FakeNode(attrs={"aria-label": "1 star"})],
+            "div.d4r55": [FakeNode("Dana R.")],
+            "span.wiI7pd": [FakeNode("The manager screamed at my kid.")],
+            "span.rsqaWe": [FakeNode("2 weeks ago")],
+        },
+    )
+    page = FakePage(children={"div[data-review-id]": [card]})
+    collector = PayloadCollector(page)
+
+    async def run():
+        await collector._on_response(FakeResponse("https://www.google.com/maps/rpc/listugcposts?authuser=0", "<html>rate limited</html>"))
+        batches = []
+        async for batch in varda_scraper.iter_review_batches(page, 10, sort_lowest_first=False, collector=collector):
+            batches.append(batch)
+        return batches
+
+    batches = asyncio.run(run())
+
+    assert collector.decode_errors == 1
+    assert collector.fallbacks["reviews"] == 1
+    assert batches == [[{"reviewer_name": "Dana R.", "rating": 1, "text": "The manager screamed at my kid.", "date": "2 weeks ago"}]]
@@ -0,0 +1,65 @@
+"""
+NearDuplicateIndex: near-identical review text finds the first verdict, clusters
+collect every place a copy was seen
+"""
+
+from near_duplicates import NearDuplicateIndex
+
+CAMPAIGN = "Worst service ever, the owner insulted my family and refused to refund our order"
+VERDICT = {"is_violation": True, "confidence": 0.9, "reasoning": "Personal attack", "source": "llm"}
+
+
+def occurrence(name: str) -> dict:
+    return {"business_name": name, "business_url": f"https://maps/{name}", "zip_code": "92101", "category": "restaurant"}
+
+
+def test_empty_index_finds_nothing():
+    index = NearDuplicateIndex()
+    assert len(index) == 0
+    assert index.find(CAMPAIGN) == (None, 0.0)
+
+
+def test_near_copy_finds_the_original():
+    index = NearDuplicateIndex()
+    entry_id = index.add(CAMPAIGN, VERDICT, occurrence("Luigi's"))
+
+    # Case, punctuation and one changed word don't hide a copy
+    found_id, similarity = index.find("WORST service ever!!! The owner insulted my family and refused to refund our meal.")
+    assert found_id == entry_id
+    assert index.threshold <= similarity <= 1.0
+    assert index.find(CAMPAIGN) == (entry_id, 1.0)
+    assert index.entries[found_id]["classification"] is VERDICT
+
+
+def test_different_text_is_not_a_duplicate():
+    index = NearDuplicateIndex()
+    index.add(CAMPAIGN, VERDICT, occurrence("Luigi's"))
+    assert index.find("Parking was hard to find but the pasta and the tiramisu were both excellent tonight") == (None, 0.0)
+
+
+def test_short_text_is_not_indexed():
+    index = NearDuplicateIndex()
+    assert index.signature("great food nice staff") is None
+    assert index.add("great food nice staff", VERDICT, occurrence("Luigi's")) is None
+    assert len(index) == 0
+
+
+def test_cluster_ids_collect_every_occurrence():
+    index = NearDuplicateIndex()
+    first = index.add(CAMPAIGN, VERDICT, occurrence("Luigi's"))
+    other = index.add("The dentist kept us waiting two hours and then charged a missed appointment fee", VERDICT,
+                      occurrence("Harbor Dental"))
+    assert (first, other) == (0, 1)
+
+    found_id, _ = index.find(CAMPAIGN + "!")
+    index.add_occurrence(found_id, occurrence("Sunset Bakery"))
+
+    assert [o["business_name"] for o in index.cluster(first)] == ["Luigi's", "Sunset Bakery"]
+    assert [o["business_name"] for o in index.cluster(other)] == ["Harbor Dental"]
+    # cluster() is a copy
+    index.cluster(first).clear()
+    assert len(index.cluster(first)) == 2
+
+
+def test_signatures_are_deterministic_per_seed():
+    assert (NearDuplicateIndex(seed=7).signature(CAMPAIGN) == NearDuplicateIndex(seed=7).signature(CAMPAIGN)).all()
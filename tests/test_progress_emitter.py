@@ -0,0 +1,119 @@
+"""
+ProgressEmitter: per-item statuses coalesced into one snapshot per interval with
+live counters, milestones passed straight through in order
+"""
+
+import asyncio
+import types
+
+import pytest
+
+import varda_scraper
+from varda_scraper import ProgressEmitter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(varda_scraper, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def processing(name: str) -> dict:
+    return {"status": "business_processing", "message": f"Processing {name}", "business": name}
+
+
+def test_per_item_statuses_are_coalesced(clock):
+    sent = []
+    emitter = ProgressEmitter(sent.append, interval=1.0)
+    for name in ("a", "b", "c"):
+        emitter(processing(name))
+    emitter({"status": "scraping_reviews", "message": "Reviews of c"})
+    assert sent == []
+
+    clock.now += 1.5
+    emitter(processing("d"))
+
+    # One snapshot per status: the latest event with the count it stands for
+    assert sent == [
+        {**processing("d"), "coalesced": 4},
+        {"status": "scraping_reviews", "message": "Reviews of c"},
+    ]
+    assert emitter.summary() == {"received": 5, "sent": 2}
+
+
+def test_milestones_flush_held_events_first(clock):
+    sent = []
+    emitter = ProgressEmitter(sent.append, interval=1.0)
+    emitter(processing("a"))
+    emitter(processing("b"))
+    emitter({"status": "lead_found", "message": "Lead: b"})
+    emitter({"status": "error", "message": "Timeout"})
+
+    assert [event["status"] for event in sent] == ["business_processing", "lead_found", "error"]
+    assert sent[0]["business"] == "b"
+    assert sent[0]["coalesced"] == 2
+    assert "coalesced" not in sent[1]
+
+
+def test_counters_follow_the_run_stats(clock):
+    sent = []
+    stats = {"total_businesses_found": 12, "total_businesses_processed": 3, "total_leads": 1}
+    emitter = ProgressEmitter(sent.append, stats=stats, interval=1.0)
+
+    emitter(processing("a"))
+    emitter.flush()
+    assert [event["status"] for event in sent] == ["business_processing", "counters"]
+    assert sent[-1]["counters"] == {"found": 12, "processed": 3, "reviews": 0, "violations": 0, "leads": 1}
+    assert "coalesced" not in sent[0]  # A single held event goes out as it was
+
+    # Nothing held and nothing changed: no counters event
+    emitter.flush()
+    assert len(sent) == 2
+
+    stats["total_businesses_processed"] = 4
+    emitter.flush()
+    assert sent[-1]["counters"]["processed"] == 4
+
+
+def test_zero_interval_sends_everything(clock):
+    sent = []
+    emitter = ProgressEmitter(sent.append, interval=0)
+    for name in ("a", "b"):
+        emitter(processing(name))
+    assert sent == [processing("a"), processing("b")]
+
+
+def test_failing_callback_does_not_raise(clock):
+    def callback(update):
+        raise RuntimeError("viewer went away")
+
+    emitter = ProgressEmitter(callback, interval=0)
+    emitter({"status": "lead_found", "message": "Lead"})
+    assert emitter.summary() == {"received": 1, "sent": 1}
+
+
+def test_run_flushes_during_quiet_stretches(clock, monkeypatch):
+    sent = []
+    emitter = ProgressEmitter(sent.append, interval=1.0)
+    emitter(processing("a"))
+    emitter(processing("b"))
+
+    async def sleep(seconds):
+        clock.now += seconds
+        if sent:
+            raise asyncio.CancelledError
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(emitter.run())
+
+    assert sent == [{**processing("b"), "coalesced": 2}]
@@ -0,0 +1,107 @@
+"""
+ResultsStore: leads filtered, sorted and paged in SQL for the dashboard results
+table, and the flagged reviews behind each lead
+"""
+
+import pytest
+
+from results_store import ResultsStore
+
+BUSINESSES = [
+    # name, rating, zip_code, category, flagged
+    ("Luigi's Trattoria", 3.4, "92101", "restaurant", 3),
+    ("Harbor Dental Care", 4.1, "92101", "dentist", 1),
+    ("Sunset Bakery", 2.8, "92102", "restaurant", 2),
+    ("Bay Pizza", 1.9, "92102", "restaurant", 1),
+    ("Coast Smiles", 3.9, "92102", "dentist", 4),
+]
+
+
+def review(text: str, rating: int = 1) -> dict:
+    return {"reviewer_name": "Dana R.", "rating": rating, "text": text, "date": "2 weeks ago"}
+
+
+def verdict(is_violation: bool, confidence: float = 0.9) -> dict:
+    return {"is_violation": is_violation, "confidence": confidence, "violation_types": ["harassment"] if is_violation else [],
+            "reasoning": "Personal attack" if is_violation else "Ordinary complaint", "source": "llm"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    store.start_run("run_a", ["92101", "92102"], {"min_rating": 1.0, "businesses": [{"name": "not stored"}]})
+    for i, (name, rating, zip_code, category, flagged) in enumerate(BUSINESSES):
+        business = {"place_id": f"place_{i}", "name": name, "rating": rating, "review_count": 10 * (i + 1),
+                    "zip_code": zip_code, "category": category}
+        classified = [(review(f"{name} violation {n}"), verdict(True, 0.6 + n / 10)) for n in range(flagged)]
+        classified.append((review(f"{name} was fine", rating=5), verdict(False)))
+        lead = {**business, "flagged_reviews": [r for r, c in classified if c["is_violation"]]}
+        store.record_business("run_a", business, classified, lead)
+    store.start_run("run_b", ["92101"], {})
+    store.record_business("run_b", {"place_id": "place_9", "name": "Other Run Cafe", "rating": 3.0, "zip_code": "92101",
+                                    "category": "restaurant"}, [], {"name": "Other Run Cafe", "flagged_reviews": [review("x")]})
+    yield store
+    store.close()
+
+
+def names(rows) -> list:
+    return list(rows["name"])
+
+
+def test_filters_narrow_one_run(store):
+    rows, total = store.leads_page(run_id="run_a")
+    assert total == 5
+    assert "Other Run Cafe" not in names(rows)
+
+    rows, total = store.leads_page(run_id="run_a", zip_code="92102", category="restaurant")
+    assert (total, sorted(names(rows))) == (2, ["Bay Pizza", "Sunset Bakery"])
+
+    rows, total = store.leads_page(run_id="run_a", min_rating=2.0, max_rating=4.0)
+    assert (total, sorted(names(rows))) == (3, ["Coast Smiles", "Luigi's Trattoria", "Sunset Bakery"])
+
+    rows, total = store.leads_page(run_id="run_a", min_violations=2)
+    assert (total, sorted(names(rows))) == (3, ["Coast Smiles", "Luigi's Trattoria", "Sunset Bakery"])
+
+    assert store.leads_page(run_id="run_a", zip_code="99999")[1] == 0
+
+
+def test_sorting(store):
+    rows, _ = store.leads_page(run_id="run_a", sort="rating", descending=False)
+    assert list(rows["rating"]) == sorted(rating for _, rating, _, _, _ in BUSINESSES)
+
+    rows, _ = store.leads_page(run_id="run_a", sort="violations_count")
+    assert list(rows["violations_count"]) == [4, 3, 2, 1, 1]
+    # Ties fall back to insertion order in the same direction
+    assert names(rows)[-2:] == ["Bay Pizza", "Harbor Dental Care"]
+
+    with pytest.raises(ValueError):
+        store.leads_page(run_id="run_a", sort="rating; DROP TABLE leads")
+
+
+def test_paging(store):
+    pages = [store.leads_page(run_id="run_a", sort="name", descending=False, page=page, page_size=2) for page in range(4)]
+
+    assert [total for _, total in pages] == [5, 5, 5, 5]
+    assert [len(rows) for rows, _ in pages] == [2, 2, 1, 0]
+    assert sum((names(rows) for rows, _ in pages), []) == sorted(name for name, *_ in BUSINESSES)
+
+
+def test_flagged_reviews_and_filter_values(store):
+    rows, _ = store.leads_page(run_id="run_a", zip_code="92101", category="restaurant")
+    flagged = store.flagged_reviews("run_a", rows["place_key"][0])
+    assert len(flagged) == 3
+    assert list(flagged["confidence"]) == sorted(flagged["confidence"], reverse=True)
+    assert "was fine" not in " ".join(flagged["text"])
+
+    assert store.filter_values("zip_code", "run_a") == ["92101", "92102"]
+    assert store.filter_values("category") == ["dentist", "restaurant"]
+    with pytest.raises(ValueError):
+        store.filter_values("name")
+
+
+def test_finished_runs_keep_their_stats(store):
+    store.finish_run("run_a", "completed", {"total_leads": 5})
+    runs = store.runs().set_index("run_id")
+    assert runs.loc["run_a", "status"] == "completed"
+    assert runs.loc["run_a", "leads"] == 5
+    assert runs.loc["run_b", "status"] == "running"
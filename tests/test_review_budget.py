@@ -0,0 +1,70 @@
+"""
+Per-business review budgets and the sequential test that stops reading a business
+once another violation has become unlikely
+"""
+
+import pytest
+
+from varda_scraper import MIN_REVIEW_BUDGET, REVIEW_BUDGET_MARGIN, more_violations_probability, review_budget_for
+
+HISTOGRAM = {5: 100, 4: 30, 3: 5, 2: 10, 1: 20}
+
+
+#######################################################################
+# REVIEW BUDGET
+#######################################################################
+
+def test_budget_covers_low_star_reviews_plus_margin():
+    business = {"rating": 3.9, "review_count": 165, "rating_histogram": HISTOGRAM}
+    assert review_budget_for(business, 100) == 20 + 10 + REVIEW_BUDGET_MARGIN
+
+
+def test_budget_is_capped_by_max_reviews_and_review_count():
+    assert review_budget_for({"review_count": 165, "rating_histogram": HISTOGRAM}, 25) == 25
+    assert review_budget_for({"review_count": 4, "rating_histogram": {1: 1, 5: 3}}, 100) == 4
+
+
+def test_budget_never_drops_below_minimum():
+    business = {"review_count": 300, "rating_histogram": {5: 300, 1: 0, 2: 0}}
+    assert review_budget_for(business, 100) == MIN_REVIEW_BUDGET
+
+
+def test_budget_estimated_from_average_rating_without_histogram():
+    # (4.7 - 2.2) / 3 of 100 reviews are expected at 1-2 stars
+    assert review_budget_for({"rating": 2.2, "review_count": 100, "rating_histogram": {}}, 200) == 83 + REVIEW_BUDGET_MARGIN
+    # High averages still assume a 5% floor
+    assert review_budget_for({"rating": 4.8, "review_count": 400}, 200) == 20 + REVIEW_BUDGET_MARGIN
+
+
+def test_budget_without_any_signal_is_max_reviews():
+    assert review_budget_for({"name": "Luigi's"}, 60) == 60
+    assert review_budget_for({"rating": 3.0, "review_count": 0}, 60) == 60
+
+
+#######################################################################
+# SEQUENTIAL TEST
+#######################################################################
+
+def test_nothing_remaining_means_no_more_violations():
+    assert more_violations_probability(10, 3, 0, 0.2) == 0.0
+
+
+def test_first_review_matches_the_prior():
+    assert more_violations_probability(0, 0, 1, 0.2) == pytest.approx(0.2)
+
+
+def test_clean_reviews_lower_the_probability():
+    probabilities = [more_violations_probability(classified, 0, 20, 0.1) for classified in (0, 10, 40, 160)]
+    assert probabilities == sorted(probabilities, reverse=True)
+    assert probabilities[-1] < 0.1
+
+
+def test_violations_and_remaining_reviews_raise_the_probability():
+    assert more_violations_probability(20, 4, 20, 0.1) > more_violations_probability(20, 0, 20, 0.1)
+    assert more_violations_probability(20, 0, 80, 0.1) > more_violations_probability(20, 0, 5, 0.1)
+    assert 0.0 < more_violations_probability(20, 20, 1, 0.9) < 1.0
+
+
+def test_prior_rate_is_clamped():
+    assert more_violations_probability(0, 0, 1, 0.0) == pytest.approx(0.005)
+    assert more_violations_probability(0, 0, 1, 1.0) == pytest.approx(0.95)
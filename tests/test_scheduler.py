@@ -0,0 +1,123 @@
+"""
+Yield-driven scheduling: business scores from rating, volume and past category/zip
+yield, the priority queue that orders businesses by score, and the Thompson-sampled
+split of a budget across (zip, category) cells
+"""
+
+import pytest
+
+from scheduler import BusinessQueue, YieldHistory, allocate_budget, score_business
+
+
+def history_with(tmp_path, outcomes: list) -> YieldHistory:
+    """outcomes: (category, zip_code, leads, processed)"""
+    history = YieldHistory(str(tmp_path))
+    for category, zip_code, leads, processed in outcomes:
+        for i in range(processed):
+            history.record(category, zip_code, i < leads)
+    return history
+
+
+def business(rating=3.0, review_count=100, category="restaurant", zip_code="92101") -> dict:
+    return {"name": "Luigi's", "rating": rating, "review_count": review_count, "category": category, "zip_code": zip_code}
+
+
+#######################################################################
+# SCORING
+#######################################################################
+
+def test_score_without_history(tmp_path):
+    history = YieldHistory(str(tmp_path))
+
+    # Worst rating, 1000+ reviews, category and zip at the global rate (1/3 of their cap)
+    assert score_business(business(rating=1.0, review_count=999), history) == pytest.approx(0.35 + 0.15 + 0.25 / 3 + 0.25 / 3)
+    # No rating counts as halfway, no reviews as zero volume
+    assert score_business(business(rating=None, review_count=0), history) == pytest.approx(0.35 * 0.5 + 0.5 / 3)
+
+
+def test_score_ranks_rating_and_volume(tmp_path):
+    history = YieldHistory(str(tmp_path))
+    assert score_business(business(rating=2.0), history) > score_business(business(rating=4.5), history)
+    assert score_business(business(review_count=800), history) > score_business(business(review_count=5), history)
+    assert 0.0 <= score_business(business(rating=5.0, review_count=0), history) <= 1.0
+
+
+def test_score_follows_past_yield(tmp_path):
+    history = history_with(tmp_path, [("restaurant", "92101", 8, 20), ("dentist", "92101", 0, 20)])
+
+    assert score_business(business(category="restaurant"), history) > score_business(business(category="dentist"), history)
+    # An unseen category sits at the global rate, between the two
+    unseen = score_business(business(category="plumber"), history)
+    assert score_business(business(category="dentist"), history) < unseen < score_business(business(category="restaurant"), history)
+
+
+def test_history_round_trips(tmp_path):
+    history = history_with(tmp_path, [("restaurant", "92101", 2, 5)])
+    history.save()
+
+    reloaded = YieldHistory(str(tmp_path))
+    assert reloaded.counts("category", "restaurant") == (5, 2)
+    assert reloaded.counts("zip", "92101") == (5, 2)
+    assert reloaded.counts("cell", "92101|restaurant") == (5, 2)
+
+
+#######################################################################
+# QUEUE
+#######################################################################
+
+def test_queue_pops_highest_score_first_and_keeps_discovery_order_on_ties():
+    queue = BusinessQueue()
+    for name, score in [("a", 0.2), ("b", 0.7), ("c", 0.2), ("d", 0.7), ("e", 0.5)]:
+        queue.push({"name": name}, score)
+
+    assert len(queue) == 5
+    popped = [queue.pop() for _ in range(5)]
+    assert [b["name"] for b in popped] == ["b", "d", "e", "a", "c"]
+    assert popped[0]["priority"] == 0.7
+    assert len(queue) == 0
+
+
+#######################################################################
+# BUDGET ALLOCATION
+#######################################################################
+
+CELLS = [("92101", "restaurant"), ("92101", "dentist"), ("92102", "restaurant"), ("92102", "dentist")]
+
+
+def test_allocation_spends_the_whole_budget(tmp_path):
+    history = YieldHistory(str(tmp_path))
+    allocation = allocate_budget(CELLS, 40, history, seed=3)
+
+    assert set(allocation) == set(CELLS)
+    assert sum(allocation.values()) == 40
+    assert all(isinstance(n, int) and n >= 0 for n in allocation.values())
+
+
+def test_allocation_is_reproducible_with_a_seed(tmp_path):
+    history = history_with(tmp_path, [("restaurant", "92101", 3, 10), ("dentist", "92102", 1, 10)])
+    assert allocate_budget(CELLS, 50, history, seed=11) == allocate_budget(CELLS, 50, history, seed=11)
+
+
+def test_allocation_favours_productive_cells(tmp_path):
+    history = history_with(tmp_path, [
+        ("restaurant", "92101", 30, 40),
+        ("dentist", "92101", 0, 40),
+        ("restaurant", "92102", 0, 40),
+        ("dentist", "92102", 0, 40),
+    ])
+    allocation = allocate_budget(CELLS, 100, history, seed=5)
+
+    assert allocation[("92101", "restaurant")] == max(allocation.values())
+    assert allocation[("92101", "restaurant")] > 50
+    # The exploration share still reaches every cell
+    assert all(n >= 2 for n in allocation.values())
+
+
+def test_allocation_without_exploration_or_budget(tmp_path):
+    history = history_with(tmp_path, [("restaurant", "92101", 30, 40), ("dentist", "92102", 0, 40)])
+
+    assert allocate_budget(CELLS, 0, history, seed=1) == {cell: 0 for cell in CELLS}
+    assert allocate_budget([], 10, history, seed=1) == {}
+    greedy = allocate_budget(CELLS, 20, history, exploration_share=0.0, seed=1)
+    assert sum(greedy.values()) == 20
+    assert greedy[("92102", "dentist")] == 0
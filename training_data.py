@@ -0,0 +1,105 @@
+"""
+VARDA Training Data
+Append-only JSONL dataset of classified reviews, deduplicated by content hash.
+Used to train local classifiers and for offline evaluation without re-paying for labels.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+TRAINING_DATA_FILE = "training_data.jsonl"
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of a review's normalized text (case and whitespace insensitive)"""
+    normalized = re.sub(r'\s+', ' ', (text or "").strip().lower())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class TrainingDataset:
+    """Append-only writer that skips reviews whose text was already labeled in this or a previous run"""
+
+    def __init__(self, output_dir: str, filename: str = TRAINING_DATA_FILE):
+        os.makedirs(output_dir, exist_ok=True)
+        self.path = os.path.join(output_dir, filename)
+        self._lock = threading.Lock()
+        self._seen = set()
+
+        if os.path.exists(self.path):
+            for record in iter_training_records(self.path):
+                self._seen.add(record.get("hash"))
+
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def __contains__(self, text: str) -> bool:
+        return content_hash(text) in self._seen
+
+    def add(self, review: dict, classification: dict, business: dict, prompt_version: str, model: str):
+        """Append one labeled review. Returns the stored record, or None if it was a duplicate."""
+        record_hash = content_hash(review.get("text", ""))
+
+        with self._lock:
+            if record_hash in self._seen:
+                return None
+            self._seen.add(record_hash)
+
+            record = {
+                "hash": record_hash,
+                "text": review.get("text", ""),
+                "rating": review.get("rating", 0),
+                "date": review.get("date", ""),
+                "is_violation": bool(classification.get("is_violation", False)),
+                "confidence": round(float(classification.get("confidence", 0.0)), 3),
+                "violation_types": classification.get("violation_types", []),
+                "reasoning": classification.get("reasoning", ""),
+                "source": classification.get("source", "llm"),
+                "prefilter_score": classification.get("prefilter_score"),
+                "business_name": business.get("name", ""),
+                "business_url": business.get("url", ""),
+                "business_rating": business.get("rating", 0.0),
+                "business_review_count": business.get("review_count", 0),
+                "category": business.get("category", ""),
+                "zip_code": business.get("zip_code", ""),
+                "prompt_version": prompt_version,
+                "model": model,
+                "labeled_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+        return record
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def iter_training_records(path: str):
+    """Yield records from a training data JSONL file, skipping corrupt lines"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partial line from an interrupted run
+
+
+def load_training_data(path: str, prompt_version: str = None) -> list:
+    """Load labeled records, optionally only those produced by a given prompt version"""
+    if not os.path.exists(path):
+        return []
+    return [
+        r for r in iter_training_records(path)
+        if prompt_version is None or r.get("prompt_version") == prompt_version
+    ]
@@ -6,13 +6,27 @@ Run locally: python varda_scraper.py
 import asyncio
 import os
 import json
+import math
+import random
 import re
 import time
+from collections import deque
 from datetime import datetime
 from typing import Optional
 from playwright.async_api import async_playwright
 from openai import OpenAI
-import pandas as pd
+from training_data import TrainingDataset
+from local_classifier import LocalClassifier, MODEL_FILE, get_local_classifier
+from near_duplicates import NearDuplicateIndex
+from business_table import BusinessTable
+from maps_payloads import PayloadCollector
+from selector_memory import SelectorMemory
+from lead_sink import LeadSink
+from exporter import export_parquet, leads_to_wide
+from results_store import ResultsStore
+from search_cache import SearchCache, extract_place_id
+from scheduler import BusinessQueue, YieldHistory, allocate_budget, expected_cell_rate, score_business
+from batch_classifier import PendingBatch, submit_batch, wait_for_batch, download_batch_results
 
 # Load environment variables from .env file (for local use)
 try:
@@ -50,6 +64,23 @@ MIN_REVIEWS = 10
 # Scraping limits
 MAX_REVIEWS_PER_BUSINESS = 50
 MIN_VIOLATIONS_TO_STOP = 3  # Stop classifying once we find this many violations
+MAX_CLEAN_REVIEWS_TO_STOP = 25  # Stop scrolling a business after this many reviews without any violation
+ADAPTIVE_REVIEW_BUDGET = True  # Size each business's review budget from its review count and rating distribution
+MIN_REVIEW_BUDGET = 10  # Never plan fewer reviews than this (unless the business has fewer)
+REVIEW_BUDGET_MARGIN = 10  # Reviews planned beyond the expected number of 1-2 star reviews
+SEQUENTIAL_STOP_PROBABILITY = 0.1  # Stop once the chance of another violation in the remaining budget drops below this
+SEQUENTIAL_MIN_REVIEWS = 8  # Reviews classified before the sequential test may stop a business
+SEQUENTIAL_PRIOR_STRENGTH = 5  # Pseudo-reviews behind the run-wide violation rate in the sequential test
+BUSINESSES_PER_SEARCH = 5  # Highest-priority businesses processed after each search before searching the next cell
+EXPLORATION_SHARE = 0.1  # Share of a max_businesses budget spread evenly across zip x category cells
+
+# Classification
+LLM_MODEL = "gpt-4o-mini"
+PROMPT_VERSION = "v1"  # Bump whenever the classification prompt changes (stored with every training label)
+PREFILTER_THRESHOLD = 0.2  # Reviews scoring below this skip the LLM (0 sends every review)
+PREFILTER_AUDIT_RATE = 0.05  # Share of skipped reviews still sent to the LLM to measure agreement
+REUSABLE_SOURCES = ("llm", "local")  # Verdicts near-duplicate reviews may reuse (pre-filter skips depend on the rating)
+REUSE_EXCLUDED_FIELDS = ("prefilter_agreed", "cascade_audit_agreed")  # Audit outcomes stay with the original review
 
 # Browser - Auto-detect headless mode based on environment
 # Set HEADLESS_MODE=true environment variable to force headless, or HEADLESS_MODE=false to force GUI
@@ -60,6 +91,43 @@ HEADLESS = os.getenv("HEADLESS_MODE", str(_is_cloud_env)).lower() == "true"
 # Output - Use environment variable or default
 OUTPUT_DIR = os.getenv("OUTPUT_DIR", "./output")
 
+# Search feeds are cached per query so reruns with other filters skip the Maps search (0 disables)
+SEARCH_CACHE_TTL_HOURS = float(os.getenv("SEARCH_CACHE_TTL_HOURS", "24"))
+
+# Classifier backend: "openai" (gpt-4o-mini), "local" (CPU model trained with: python local_classifier.py train)
+# or "cascade" (local model decides clear cases, only uncertain reviews go to gpt-4o-mini)
+CLASSIFIER_BACKEND = os.getenv("CLASSIFIER_BACKEND", "openai")
+LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH", os.path.join(OUTPUT_DIR, MODEL_FILE))
+
+# Classification mode: "realtime" classifies while scraping, "batch" defers all reviews to the
+# OpenAI Batch API (half price, no rate limits) and assembles leads once the batch completes
+CLASSIFICATION_MODE = os.getenv("CLASSIFICATION_MODE", "realtime")
+BATCH_POLL_SECONDS = 60
+
+# Extraction mode: "dom" reads rendered elements, "network" decodes the search and review
+# responses Maps fetches (falls back to the DOM when no payload can be decoded)
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "dom")
+
+# Progress events: per-item statuses are coalesced into one snapshot per status (plus live counters)
+# at most this often; milestones such as lead_found, errors and completion always go out at once (0 sends everything)
+PROGRESS_INTERVAL_SECONDS = float(os.getenv("PROGRESS_INTERVAL_SECONDS", "0.5"))
+COALESCED_STATUSES = {
+    "business_found_filtered", "business_filtered_out", "business_processing",
+    "scraping_reviews", "classifying_reviews", "reviews_collected", "violation_found",
+}
+
+# Export formats: "csv", "parquet" (columnar leads + flagged reviews) and "json" (indented, slow for big runs).
+# run_scraper writes the run's Parquet itself, keyed by its run_id; export_leads writes the others
+EXPORT_FORMATS = [f.strip() for f in os.getenv("EXPORT_FORMATS", "csv,parquet").split(",") if f.strip()]
+
+# Cascade: local violation probabilities inside [LOW, HIGH) are sent to the LLM
+CASCADE_LOW = 0.2
+CASCADE_HIGH = 0.9
+CASCADE_AUDIT_RATE = 0.02  # Share of locally decided reviews re-checked by the LLM
+CASCADE_DRIFT_WINDOW = 200  # Audits kept for the rolling agreement rate
+CASCADE_DRIFT_MIN_AGREEMENT = 0.85  # Warn when local/LLM agreement drops below this
+CASCADE_DRIFT_MIN_AUDITS = 20
+
 #######################################################################
 # CATEGORIES
 #######################################################################
@@ -133,23 +201,107 @@ def get_openai_client():
 # Lazy client initialization
 _client = None
 
-def classify_review(review_text: str, rating: float) -> dict:
+#######################################################################
+# LOCAL PRE-FILTER
+#######################################################################
+
+# (pattern, weight) - English and French since most runs target France
+PREFILTER_RULES = [
+    # Spam / advertising: links, emails, phone numbers, promo codes
+    (re.compile(r'https?://|www\.|\b[\w.+-]+@[\w-]+\.\w{2,}\b', re.I), 0.5),
+    (re.compile(r'(?:\+33|\b0)[1-9](?:[\s.-]?\d{2}){4}\b|\+\d{10,}'), 0.5),
+    (re.compile(r'\b(promo ?code|code promo|discount code|use my code|follow me|abonnez[- ]vous|check out my)\b', re.I), 0.4),
+    # Conflict of interest / incentivized reviews
+    (re.compile(r'\b(in exchange for|for (?:a|this|my) review|free \w+ for (?:a|the) review|asked (?:us|me) to (?:leave|write)|contre (?:un|cet) avis|en échange)\b', re.I), 0.6),
+    (re.compile(r'\b(i am the owner|i\'m the owner|i work (?:here|there)|my (?:boss|employer)|competitor|je suis (?:le|la) (?:gérant|gérante|patron|patronne|propriétaire)|je travaille (?:ici|là)|concurrent)\b', re.I), 0.5),
+    # Offensive content, threats, hate speech
+    (re.compile(r'\b(fuck\w*|shit\w*|bitch\w*|asshole|bastard|idiot\w*|moron|retard\w*|connard\w*|connasse|salop\w*|putain|merde|encul\w*|bâtard\w*|pute)\b', re.I), 0.5),
+    (re.compile(r'\b(kill|burn (?:it|this place) down|i will find you|tuer|brûler|je vais (?:te|vous) retrouver)\b', re.I), 0.6),
+    (re.compile(r'\b(racist\w*|raciste\w*|nazi\w*|terroris\w*|sale (?:arabe|noir|juif|étranger)s?)\b', re.I), 0.4),
+    # Accusations and off-topic content
+    (re.compile(r'\b(scam\w*|fraud\w*|thie(?:f|ves)|crook\w*|arnaque\w*|escro\w*|voleur\w*|voleuse\w*)\b', re.I), 0.3),
+    (re.compile(r'\b(election\w*|politic\w*|government|vaccin\w*|élection\w*|politique|gouvernement|macron)\b', re.I), 0.3),
+    (re.compile(r'\b(wrong (?:place|business|address)|never (?:been|went) (?:here|there)|jamais (?:allé|venu|mis les pieds))\b', re.I), 0.4),
+]
+
+# Star rating prior - low-star reviews carry most violations
+PREFILTER_RATING_WEIGHTS = {1: 0.3, 2: 0.25, 3: 0.1}
+
+
+def prefilter_score(review_text: str, rating: float) -> float:
+    """Cheap CPU-only score in [0, 1] estimating how likely a review is worth sending to the LLM"""
+    text = review_text or ""
+    score = PREFILTER_RATING_WEIGHTS.get(int(rating or 0), 0.0)
+    
+    for pattern, weight in PREFILTER_RULES:
+        if pattern.search(text):
+            score += weight
+    
+    # Lightweight text features
+    letters = [c for c in text if c.isalpha()]
+    if len(letters) >= 20 and sum(c.isupper() for c in letters) / len(letters) > 0.5:
+        score += 0.15  # Shouting
+    if text.count("!") >= 3:
+        score += 0.1
+    if re.search(r'(.)\1{4,}', text):
+        score += 0.05  # Repeated characters ("!!!!!", "nooooo")
+    if len(text) > 600:
+        score += 0.1  # Long rants are more likely to go off-topic
+    
+    return min(score, 1.0)
+
+
+#######################################################################
+# CLASSIFICATION
+#######################################################################
+
+def classify_review(review_text: str, rating: float, prefilter_threshold: float = 0.0, audit_rate: float = 0.0) -> dict:
     """
     Classify a review to determine if it contains Google review policy violations.
-    Returns a dict with 'is_violation', 'confidence', 'violation_types', and 'reasoning'.
+    Returns a dict with 'is_violation', 'confidence', 'violation_types', and 'reasoning',
+    plus 'source' (rules, prefilter, llm, or error when the LLM call failed) and 'prefilter_score'.
+    
+    Reviews scoring below `prefilter_threshold` are returned as clean without an LLM call,
+    except for a random `audit_rate` share that is still classified to measure agreement.
     """
     if not review_text or len(review_text.strip()) < 10:
         return {
             "is_violation": False,
             "confidence": 0.0,
             "violation_types": [],
-            "reasoning": "Review text too short or empty"
+            "reasoning": "Review text too short or empty",
+            "source": "rules",
+            "prefilter_score": 0.0,
         }
     
-    try:
-        client = get_openai_client()
+    score = prefilter_score(review_text, rating)
+    
+    if score < prefilter_threshold:
+        if random.random() >= audit_rate:
+            return {
+                "is_violation": False,
+                "confidence": round(1.0 - score, 2),
+                "violation_types": [],
+                "reasoning": f"Skipped by local pre-filter (score {score:.2f} < {prefilter_threshold:.2f})",
+                "source": "prefilter",
+                "prefilter_score": score,
+            }
         
-        prompt = f"""You are an expert at detecting Google review policy violations. Analyze the following review and determine if it violates Google's review policies.
+        # Audit sample: classify anyway and record whether the skip would have been right
+        result = _classify_with_llm(review_text, rating)
+        result["prefilter_score"] = score
+        if result["source"] == "llm":
+            result["prefilter_agreed"] = not result["is_violation"]
+        return result
+    
+    result = _classify_with_llm(review_text, rating)
+    result["prefilter_score"] = score
+    return result
+
+
+def build_classification_request(review_text: str, rating: float) -> dict:
+    """Chat completion request body for one review (shared by live calls and the Batch API)"""
+    prompt = f"""You are an expert at detecting Google review policy violations. Analyze the following review and determine if it violates Google's review policies.
 
 Review Text: "{review_text}"
 Rating: {rating}/5
@@ -171,108 +323,269 @@ Analyze this review and respond ONLY with valid JSON in this exact format:
 
 Be strict but fair. Only flag clear violations. If unsure, set is_violation to false and lower confidence."""
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are an expert at detecting Google review policy violations. Always respond with valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=300
-        )
+    return {
+        "model": LLM_MODEL,
+        "messages": [
+            {"role": "system", "content": "You are an expert at detecting Google review policy violations. Always respond with valid JSON only."},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.3,
+        "max_tokens": 300,
+    }
+
+
+def parse_classification_response(result_text: str) -> dict:
+    """Turn the model's JSON answer into a verdict dict"""
+    result_text = (result_text or "").strip()
+    
+    # Try to extract JSON from response
+    json_match = re.search(r'\{[^}]+\}', result_text, re.DOTALL)
+    if json_match:
+        result = json.loads(json_match.group())
+    else:
+        # Fallback: try parsing the whole response
+        result = json.loads(result_text)
+    
+    # Validate result structure
+    if not isinstance(result, dict):
+        raise ValueError("Invalid response format")
+    
+    return {
+        "is_violation": result.get("is_violation", False),
+        "confidence": float(result.get("confidence", 0.0)),
+        "violation_types": result.get("violation_types", []),
+        "reasoning": result.get("reasoning", "No reasoning provided"),
+        "source": "llm",
+    }
+
+
+def classification_error(e: Exception) -> dict:
+    """Verdict used when classification fails - not a violation, and not a label to learn from or reuse"""
+    print(f"      Warning: Classification error for review: {str(e)[:100]}")
+    return {
+        "is_violation": False,
+        "confidence": 0.0,
+        "violation_types": [],
+        "reasoning": f"Classification error: {str(e)[:100]}",
+        "source": "error",
+    }
+
+
+def _classify_with_llm(review_text: str, rating: float) -> dict:
+    """Classify a review with gpt-4o-mini"""
+    try:
+        client = get_openai_client()
+        response = client.chat.completions.create(**build_classification_request(review_text, rating))
+        return parse_classification_response(response.choices[0].message.content)
+    except Exception as e:
+        return classification_error(e)
+
+
+class ClassifierCascade:
+    """
+    Confidence-gated cascade in front of the LLM classifier.
+    
+    The local model decides clear negatives (probability < low) and clear positives
+    (probability >= high); only the uncertainty band in between is sent to the LLM.
+    A random `audit_rate` share of local decisions is re-checked by the LLM to detect drift.
+    """
+    
+    def __init__(self, local_model: LocalClassifier, low: float = CASCADE_LOW, high: float = CASCADE_HIGH,
+                 audit_rate: float = CASCADE_AUDIT_RATE):
+        self.local_model = local_model
+        self.low = low
+        self.high = high
+        self.audit_rate = audit_rate
+        self.tiers = {tier: {"count": 0, "seconds": 0.0} for tier in ("local_negative", "local_positive", "llm", "audit")}
+        self.audits = deque(maxlen=CASCADE_DRIFT_WINDOW)
+        self.audits_total = 0
+        self.drift_alerted = False
+        self._local_seconds_per_review = 0.0
+    
+    def score_batch(self, reviews: list) -> list:
+        """Run the local model on a whole scroll round at once"""
+        start = time.perf_counter()
+        verdicts = self.local_model.classify_batch(reviews)
+        self._local_seconds_per_review = (time.perf_counter() - start) / max(len(reviews), 1)
+        return verdicts
+    
+    def decide(self, review: dict, local_verdict: dict) -> dict:
+        """Return the local verdict for confident cases, otherwise the LLM verdict"""
+        if local_verdict.get("source") != "local":
+            return local_verdict  # Too short to classify
         
-        result_text = response.choices[0].message.content.strip()
+        probability = local_verdict["violation_probability"]
         
-        # Try to extract JSON from response
-        json_match = re.search(r'\{[^}]+\}', result_text, re.DOTALL)
-        if json_match:
-            result = json.loads(json_match.group())
-        else:
-            # Fallback: try parsing the whole response
-            result = json.loads(result_text)
+        if self.low <= probability < self.high:
+            # Straight to the LLM - the local model already judged these uncertain, so no keyword pre-filter
+            start = time.perf_counter()
+            result = _classify_with_llm(review["text"], review["rating"])
+            if result["source"] == "llm":
+                self._record("llm", time.perf_counter() - start)
+            result["cascade_tier"] = "llm"
+            result["violation_probability"] = probability
+            return result
         
-        # Validate result structure
-        if not isinstance(result, dict):
-            raise ValueError("Invalid response format")
+        tier = "local_positive" if probability >= self.high else "local_negative"
+        self._record(tier, self._local_seconds_per_review)
+        local_verdict["cascade_tier"] = tier
         
-        return {
-            "is_violation": result.get("is_violation", False),
-            "confidence": float(result.get("confidence", 0.0)),
-            "violation_types": result.get("violation_types", []),
-            "reasoning": result.get("reasoning", "No reasoning provided")
-        }
+        if random.random() < self.audit_rate:
+            start = time.perf_counter()
+            audit = _classify_with_llm(review["text"], review["rating"])
+            self._record("audit", time.perf_counter() - start)
+            if audit["source"] == "error":
+                return local_verdict  # Nothing to compare against
+            agreed = audit["is_violation"] == local_verdict["is_violation"]
+            self.audits.append(agreed)
+            self.audits_total += 1
+            # We paid for the LLM verdict, so it wins
+            audit["cascade_tier"] = tier
+            audit["cascade_audit_agreed"] = agreed
+            audit["violation_probability"] = probability
+            return audit
         
-    except Exception as e:
-        # If classification fails, default to not a violation
-        print(f"      Warning: Classification error for review: {str(e)[:100]}")
-        return {
-            "is_violation": False,
-            "confidence": 0.0,
-            "violation_types": [],
-            "reasoning": f"Classification error: {str(e)[:100]}"
+        return local_verdict
+    
+    def _record(self, tier: str, seconds: float):
+        self.tiers[tier]["count"] += 1
+        self.tiers[tier]["seconds"] += seconds
+    
+    def agreement_rate(self):
+        return sum(self.audits) / len(self.audits) if self.audits else None
+    
+    def check_drift(self) -> bool:
+        """True once each time the rolling local/LLM agreement falls below the alert level"""
+        rate = self.agreement_rate()
+        if rate is None or len(self.audits) < CASCADE_DRIFT_MIN_AUDITS:
+            return False
+        if rate < CASCADE_DRIFT_MIN_AGREEMENT and not self.drift_alerted:
+            self.drift_alerted = True
+            return True
+        if rate >= CASCADE_DRIFT_MIN_AGREEMENT:
+            self.drift_alerted = False
+        return False
+    
+    def summary(self) -> dict:
+        """Per-tier volumes and average latency (audit LLM calls as their own tier), plus audit agreement"""
+        summary = {}
+        for tier, data in self.tiers.items():
+            summary[f"{tier}_count"] = data["count"]
+            summary[f"{tier}_avg_ms"] = round(1000 * data["seconds"] / data["count"], 2) if data["count"] else 0.0
+        rate = self.agreement_rate()
+        summary["audits"] = self.audits_total
+        summary["audit_agreement_rate"] = round(rate, 3) if rate is not None else None
+        return summary
+
+
+# Reads the whole details panel in one round trip. Each field takes the first selector
+# variant (in SelectorMemory order) that yields a value, so a missing field costs nothing.
+DETAILS_SNAPSHOT_JS = """
+(chains) => {
+    const readers = {
+        "details.rating": el => (el.textContent || "").trim(),
+        "details.review_count": el => el.getAttribute("aria-label") || "",
+        "details.website": el => el.getAttribute("href") || "",
+        "details.phone": el => el.getAttribute("data-item-id") || el.getAttribute("aria-label") || "",
+    };
+    const fields = {};
+    for (const [field, selectors] of Object.entries(chains)) {
+        const start = performance.now();
+        fields[field] = {value: "", selector: null};
+        for (const selector of selectors) {
+            const el = document.querySelector(selector);
+            const value = el ? readers[field](el) : "";
+            if (value) {
+                fields[field] = {value: value, selector: selector};
+                break;
+            }
         }
+        fields[field].ms = performance.now() - start;
+    }
+    const histogram = Array.from(document.querySelectorAll('tr[aria-label*="star"]'), row => row.getAttribute("aria-label") || "");
+    return {fields: fields, histogram: histogram};
+}
+"""
+DETAILS_READY_SELECTOR = 'div[role="main"] h1'
+DETAILS_RATING_SELECTOR = 'div.F7nice'  # Rating block, rendered after the header
+DETAILS_RATING_TIMEOUT_MS = 3000  # Places without reviews have no rating block
 
 
-async def scrape_business_details(page, business_url: str) -> dict:
+def record_timing(timings: dict, field: str, ms: float):
+    """Accumulate a duration into {field: {"count", "total_ms"}}"""
+    if timings is None:
+        return
+    entry = timings.setdefault(field, {"count": 0, "total_ms": 0.0})
+    entry["count"] += 1
+    entry["total_ms"] += ms
+
+
+async def scrape_business_details(page, business_url: str, selectors: SelectorMemory = None, timings: dict = None) -> dict:
     """Scrape detailed information from a business page"""
+    selectors = selectors or SelectorMemory()
+    details = {
+        "website": "",
+        "phone": "",
+        "email": "",
+        "rating": 0.0,
+        "review_count": 0,
+        "rating_histogram": {},
+    }
     try:
-        await page.goto(business_url, wait_until="networkidle", timeout=30000)
-        await asyncio.sleep(2)  # Give page time to load
-        
-        details = {
-            "website": "",
-            "phone": "",
-            "email": "",
-            "rating": 0.0,
-            "review_count": 0
-        }
+        start = time.perf_counter()
+        await page.goto(business_url, wait_until="domcontentloaded", timeout=30000)
+        record_timing(timings, "navigate", (time.perf_counter() - start) * 1000)
         
-        # Get rating and review count
+        # One readiness condition: the place header is rendered with the panel around it
+        start = time.perf_counter()
         try:
-            rating_elem = page.locator('div.F7nice span[aria-hidden="true"]').first
-            if await rating_elem.is_visible(timeout=2000):
-                rating_text = await rating_elem.text_content() or ""
-                rating_match = re.search(r'(\d[,\.]\d)', rating_text)
-                if rating_match:
-                    details["rating"] = float(rating_match.group(1).replace(",", "."))
+            await page.wait_for_selector(DETAILS_READY_SELECTOR, timeout=15000)
+            await page.wait_for_selector(DETAILS_RATING_SELECTOR, timeout=DETAILS_RATING_TIMEOUT_MS)
         except:
-            pass
+            pass  # Read whatever rendered
+        record_timing(timings, "ready", (time.perf_counter() - start) * 1000)
         
-        try:
-            review_count_elem = page.locator('div.F7nice button[aria-label*="review"]').first
-            if await review_count_elem.is_visible(timeout=2000):
-                review_text = await review_count_elem.get_attribute("aria-label") or ""
-                review_match = re.search(r'([\d,\.]+)', review_text)
-                if review_match:
-                    num_str = review_match.group(1).replace(",", "").replace(".", "")
-                    details["review_count"] = int(num_str) if num_str.isdigit() else 0
-        except:
-            pass
+        # Snapshot every field at once
+        start = time.perf_counter()
+        chains = {field: selectors.candidates(field) for field in ("details.rating", "details.review_count", "details.website", "details.phone")}
+        snapshot = await page.evaluate(DETAILS_SNAPSHOT_JS, chains)
+        record_timing(timings, "snapshot", (time.perf_counter() - start) * 1000)
+        
+        fields = snapshot["fields"]
+        for field, tried in chains.items():
+            selectors.record_chain(field, tried, fields[field]["selector"])
+            record_timing(timings, field.split(".", 1)[1], fields[field]["ms"])
+        
+        # Get rating and review count
+        rating_match = re.search(r'(\d[,\.]\d)', fields["details.rating"]["value"])
+        if rating_match:
+            details["rating"] = float(rating_match.group(1).replace(",", "."))
+        
+        review_match = re.search(r'([\d,\.]+)', fields["details.review_count"]["value"])
+        if review_match:
+            num_str = review_match.group(1).replace(",", "").replace(".", "")
+            details["review_count"] = int(num_str) if num_str.isdigit() else 0
+        
+        # Get rating distribution ("5 stars, 1,234 reviews" per histogram row)
+        for label in snapshot["histogram"]:
+            row_match = re.search(r'(\d)\s*stars?,\s*([\d,\.\s]+)', label)
+            if row_match:
+                count = re.sub(r'\D', '', row_match.group(2))
+                details["rating_histogram"][int(row_match.group(1))] = int(count) if count else 0
         
         # Get website
-        try:
-            website_button = page.locator('a[data-item-id="authority"]').first
-            if await website_button.is_visible(timeout=3000):
-                details["website"] = await website_button.get_attribute("href") or ""
-        except:
-            pass
+        details["website"] = fields["details.website"]["value"]
         
         # Get phone
-        try:
-            phone_button = page.locator('button[data-item-id*="phone"]').first
-            if await phone_button.is_visible(timeout=2000):
-                phone_text = await phone_button.get_attribute("data-item-id") or ""
-                phone_match = re.search(r'tel:([+\d\s\-\(\)]+)', phone_text)
-                if phone_match:
-                    details["phone"] = phone_match.group(1)
-        except:
-            pass
+        phone_match = re.search(r'(?:tel:|:\s*)([+\d][\d\s\-\(\)]+)', fields["details.phone"]["value"])
+        if phone_match:
+            details["phone"] = phone_match.group(1).strip()
         
         return details
         
     except Exception as e:
         print(f"      Error scraping business details: {e}")
-        return {"website": "", "phone": "", "email": "", "rating": 0.0, "review_count": 0}
+        return details
 
 
 async def scrape_email_from_website(page, website_url: str) -> str:
@@ -302,15 +615,67 @@ async def scrape_email_from_website(page, website_url: str) -> str:
         return ""
 
 
-async def scrape_all_businesses(page, zip_code: str, category: str, country: str, min_rating: float, max_rating: float, min_reviews: int, progress_callback=None) -> list:
-    """Scrape all businesses from search results for a zip code and category"""
-    businesses = []
+async def search_businesses_from_network(page, query: str, collector: PayloadCollector) -> list:
+    """Search from the Maps search box and read places from the decoded search responses"""
+    collector.reset("search")
+    try:
+        if "/maps" not in page.url:
+            await page.goto("https://www.google.com/maps?hl=en", wait_until="domcontentloaded", timeout=30000)
+        search_box = page.locator('input#searchboxinput, input[name="q"]').first
+        await search_box.wait_for(timeout=10000)
+        await search_box.fill(query)
+        await search_box.press("Enter")
+    except Exception as e:
+        print(f"      Warning: Could not use the Maps search box: {str(e)[:100]}")
+        return []
     
-    # Build search query
-    query = f"{category} {zip_code} {country}"
+    # First page of results
+    for _ in range(20):
+        if collector.places:
+            break
+        await asyncio.sleep(0.5)
     
-    if progress_callback:
-        progress_callback({"status": "searching", "message": f"Searching for {category} in {zip_code}..."})
+    # Each scroll of the feed fetches the next page of results
+    scroll_attempt = 0
+    no_new_count = 0
+    while collector.places and no_new_count < 3 and scroll_attempt < 20:
+        places_before = len(collector.places)
+        try:
+            await page.evaluate("""
+                const feed = document.querySelector('div[role="feed"]');
+                if (feed) {
+                    feed.scrollTop = feed.scrollHeight;
+                }
+            """)
+        except:
+            break
+        await asyncio.sleep(1.5)
+        no_new_count = no_new_count + 1 if len(collector.places) == places_before else 0
+        scroll_attempt += 1
+    
+    results = []
+    seen = set()
+    for place in collector.places:
+        key = place["place_id"] or place["name"]
+        if key not in seen:
+            seen.add(key)
+            results.append(place)
+    return results
+
+
+async def search_businesses(page, query: str, progress_callback=None, collector: PayloadCollector = None,
+                            selectors: SelectorMemory = None) -> list:
+    """Run a Maps search and collect every feed item, unfiltered"""
+    selectors = selectors or SelectorMemory()
+    if collector is not None:
+        results = await search_businesses_from_network(page, query, collector)
+        if results:
+            return results
+        collector.fallbacks["search"] += 1
+        print(f"      ⚠️ No search payload decoded for '{query}' - reading the DOM instead")
+    
+    results = []
+    seen = set()
     
     # Navigate to Google Maps search
     search_url = f"https://www.google.com/maps/search/{query.replace(' ', '+')}"
@@ -323,36 +688,41 @@ async def scrape_all_businesses(page, zip_code: str, category: str, country: str
     no_new_count = 0
     
     while no_new_count < 10 and scroll_attempt < max_scroll_attempts:
-        items_before = len(businesses)
-        items = await page.locator('div[role="feed"] > div > div > a[href*="/maps/place/"]').all()
+        items_before = len(results)
+        items = await selectors.all(page, "search.item")
         
         for item in items:
             try:
                 name = await item.get_attribute("aria-label")
                 href = await item.get_attribute("href")
+                if not name or not href:
+                    continue
+                
+                place_id = extract_place_id(href)
+                key = place_id or name
+                if key in seen:
+                    continue
                 
                 # Extract rating and review count from the search result item
                 rating = 0.0
                 review_count = 0
                 
                 # Try to find rating from aria-label of the star span
-                rating_span = item.locator('span.kvMYJc')
-                if await rating_span.is_visible(timeout=100):
-                    rating_attr = await rating_span.get_attribute("aria-label")
-                    if rating_attr:
-                        match = re.search(r'(\d[,\.]\d)', rating_attr)
-                        if match:
-                            rating = float(match.group(1).replace(",", "."))
+                rating_attr = await selectors.attribute(item, "search.rating", "aria-label")
+                match = re.search(r'(\d[,\.]\d)', rating_attr)
+                if match:
+                    rating = float(match.group(1).replace(",", "."))
+                
+                item_text = await item.text_content() or ""
                 
                 # Fallback: search for rating pattern in the item's text content
                 if rating == 0.0:
-                    item_text = await item.text_content() or ""
                     rating_match = re.search(r'(\d[,\.]\d)\s*stars?', item_text)
                     if rating_match:
                         rating = float(rating_match.group(1).replace(",", "."))
 
                 # Extract review count
-                review_match = re.search(r'\(([\d,\.]+)\)', await item.text_content() or "")
+                review_match = re.search(r'\(([\d,\.]+)\)', item_text)
                 if review_match:
                     num_str = review_match.group(1)
                     if '.' in num_str and ',' not in num_str: # Handle 1.234 for 1,234
@@ -360,28 +730,21 @@ async def scrape_all_businesses(page, zip_code: str, category: str, country: str
                     else:
                         num_str = num_str.replace(',', '')
                     review_count = int(num_str)
-
-                # Filter immediately
-                if name and href and not any(b["name"] == name for b in businesses):
-                    if min_rating <= rating <= max_rating and review_count >= min_reviews:
-                        businesses.append({
-                            "name": name,
-                            "url": href,
-                            "category": category,
-                            "rating": rating,
-                            "review_count": review_count
-                        })
-                        if progress_callback:
-                            progress_callback({"status": "business_found_filtered", "business_name": name, "rating": rating, "review_count": review_count, "message": f"Found & filtered: {name} ({rating}⭐, {review_count} reviews)"})
-                    else:
-                        if progress_callback:
-                            progress_callback({"status": "business_filtered_out", "business_name": name, "rating": rating, "review_count": review_count, "message": f"Filtered out: {name} ({rating}⭐, {review_count} reviews) - outside criteria"})
+                
+                seen.add(key)
+                results.append({
+                    "place_id": place_id,
+                    "name": name,
+                    "url": href,
+                    "rating": rating,
+                    "review_count": review_count,
+                })
             except Exception as e:
                 # print(f"Error processing item: {e}")
                 pass
         
         # Check if we found new businesses
-        if len(businesses) == items_before:
+        if len(results) == items_before:
             no_new_count += 1
         else:
             no_new_count = 0
@@ -399,102 +762,244 @@ async def scrape_all_businesses(page, zip_code: str, category: str, country: str
         except:
             break
     
+    return results
+
+
+async def scrape_all_businesses(page, zip_code: str, category: str, country: str, min_rating: float, max_rating: float, min_reviews: int, progress_callback=None, search_cache: SearchCache = None,
+                                business_table: BusinessTable = None, collector: PayloadCollector = None,
+                                selectors: SelectorMemory = None) -> list:
+    """Scrape all businesses from search results for a zip code and category"""
+    businesses = []
+    
+    # Build search query
+    query = f"{category} {zip_code} {country}"
+    
+    results = search_cache.get(query) if search_cache else None
+    if results is not None:
+        if progress_callback:
+            progress_callback({"status": "searching", "message": f"Using cached search for {category} in {zip_code} ({len(results)} places)"})
+    else:
+        if progress_callback:
+            progress_callback({"status": "searching", "message": f"Searching for {category} in {zip_code}..."})
+        results = await search_businesses(page, query, progress_callback, collector, selectors)
+        if search_cache and results:
+            search_cache.put(query, results)
+    
+    # Keep the unfiltered feed so other filters can be re-applied without a rescrape
+    if business_table is not None:
+        business_table.upsert(results, zip_code, category)
+    
+    # Filter - the feed itself is filter-independent so it can be cached
+    for result in results:
+        name, rating, review_count = result["name"], result["rating"], result["review_count"]
+        if min_rating <= rating <= max_rating and review_count >= min_reviews:
+            businesses.append({**result, "category": category})
+            if progress_callback:
+                progress_callback({"status": "business_found_filtered", "business_name": name, "rating": rating, "review_count": review_count, "message": f"Found & filtered: {name} ({rating}⭐, {review_count} reviews)"})
+        else:
+            if progress_callback:
+                progress_callback({"status": "business_filtered_out", "business_name": name, "rating": rating, "review_count": review_count, "message": f"Filtered out: {name} ({rating}⭐, {review_count} reviews) - outside criteria"})
+    
     if progress_callback:
         progress_callback({"status": "businesses_found", "count": len(businesses), "message": f"Found {len(businesses)} businesses matching criteria"})
     
     return businesses
 
 
-async def scrape_reviews(page, max_reviews: int) -> list:
-    """Scrape reviews from a business page"""
-    reviews = []
+# Localized labels for the reviews tab, the sort button and the "Lowest rating" option
+REVIEWS_TAB_LABELS = ["Reviews", "Avis", "Reseñas", "Rezensionen", "Recensioni", "Avaliações"]
+SORT_BUTTON_LABELS = ["Sort reviews", "Sort", "Trier", "Ordenar", "Sortieren", "Ordina"]
+LOWEST_RATING_LABELS = [
+    "Lowest rating",
+    "Note la plus basse",
+    "Puntuación más baja",
+    "Niedrigste Bewertung",
+    "Valutazione più bassa",
+    "Classificação mais baixa",
+]
+LOWEST_RATING_MENU_INDEX = 3  # Most relevant, Newest, Highest rating, Lowest rating
+
+
+async def sort_reviews_by_lowest_rating(page, collector: PayloadCollector = None) -> bool:
+    """Open the reviews tab and switch its order to lowest rating first. Returns True if sorted."""
+    try:
+        # Open the reviews tab if the sort button isn't on screen yet
+        sort_button = None
+        for attempt in range(2):
+            for label in SORT_BUTTON_LABELS:
+                candidate = page.locator(f'button[aria-label*="{label}"], button[data-value="{label}"]').first
+                if await candidate.count() > 0:
+                    sort_button = candidate
+                    break
+            if sort_button or attempt > 0:
+                break
+            
+            for label in REVIEWS_TAB_LABELS:
+                tab = page.locator(f'button[role="tab"][aria-label*="{label}"]').first
+                if await tab.count() > 0:
+                    await tab.click()
+                    await page.wait_for_selector('div[data-review-id]', timeout=5000)
+                    break
+            else:
+                # Unknown language - the reviews tab is the second tab on a place page
+                tabs = page.locator('button[role="tab"]')
+                if await tabs.count() > 1:
+                    await tabs.nth(1).click()
+                    await page.wait_for_selector('div[data-review-id]', timeout=5000)
+        
+        if not sort_button:
+            return False
+        
+        await sort_button.click()
+        menu_items = page.locator('div[role="menuitemradio"]')
+        await menu_items.first.wait_for(timeout=3000)
+        
+        # Pick the option by label, falling back to its fixed position for other locales
+        option = None
+        for label in LOWEST_RATING_LABELS:
+            candidate = menu_items.filter(has_text=label).first
+            if await candidate.count() > 0:
+                option = candidate
+                break
+        if option is None and await menu_items.count() > LOWEST_RATING_MENU_INDEX:
+            option = menu_items.nth(LOWEST_RATING_MENU_INDEX)
+        if option is None:
+            await page.keyboard.press("Escape")
+            return False
+        
+        if collector is not None:
+            collector.reset("reviews")  # Only keep the re-sorted pages
+        await option.click()
+        await asyncio.sleep(1.5)  # Let the re-sorted list render
+        return True
+    except Exception as e:
+        print(f"      Warning: Could not sort reviews by lowest rating: {str(e)[:100]}")
+        return False
+
+
+async def iter_network_review_batches(page, max_reviews: int, collector: PayloadCollector):
+    """Yield reviews decoded from the review pages Maps fetches while the list is scrolled"""
+    seen_ids = set()
+    seen_texts = set()
+    collected = 0
+    idle_rounds = 0
+    
+    while collected < max_reviews and idle_rounds < 4:
+        batch = []
+        for review in collector.take_reviews():
+            if collected + len(batch) >= max_reviews:
+                break
+            review_id = review.pop("review_id", "")
+            if review_id and review_id in seen_ids:
+                continue
+            seen_ids.add(review_id)
+            if len(review["text"]) > 3 and review["text"] not in seen_texts:
+                seen_texts.add(review["text"])
+                batch.append(review)
+        
+        if batch:
+            idle_rounds = 0
+            collected += len(batch)
+            yield batch
+        else:
+            idle_rounds += 1
+        
+        # Scrolling the list fetches the next page of reviews
+        if collected < max_reviews:
+            try:
+                await page.evaluate("""
+                    const reviewList = document.querySelector('div[role="feed"]');
+                    if (reviewList) {
+                        reviewList.scrollTop = reviewList.scrollHeight;
+                    }
+                """)
+                await asyncio.sleep(1.0)
+            except:
+                break
+
+
+async def iter_review_batches(page, max_reviews: int, sort_lowest_first: bool = True, collector: PayloadCollector = None,
+                              selectors: SelectorMemory = None):
+    """Yield newly loaded reviews after each scroll round so callers can classify while scrolling"""
+    selectors = selectors or SelectorMemory()
+    if collector is not None:
+        collector.reset("reviews")
+    if sort_lowest_first:
+        await sort_reviews_by_lowest_rating(page, collector)
     
     try:
         # Wait for reviews section
         await page.wait_for_selector('div[data-review-id]', timeout=10000)
     except:
         # No reviews found
-        return reviews
+        return
+    
+    if collector is not None:
+        network_batches = iter_network_review_batches(page, max_reviews, collector)
+        decoded_any = False
+        try:
+            async for batch in network_batches:
+                decoded_any = True
+                yield batch
+        finally:
+            await network_batches.aclose()
+        if decoded_any:
+            return
+        collector.fallbacks["reviews"] += 1
+        print("      ⚠️ No review payload decoded - reading the DOM instead")
+    
+    seen_ids = set()
+    seen_texts = set()
+    collected = 0
     
     # Scroll to load more reviews
     scroll_attempts = 0
     max_scrolls = 15
     
-    while len(reviews) < max_reviews and scroll_attempts < max_scrolls:
+    while collected < max_reviews and scroll_attempts < max_scrolls:
         # Get all review elements
         review_elements = await page.locator('div[data-review-id]').all()
         
         if not review_elements:
             break
         
-        reviews_before = len(reviews)
+        batch = []
         
         for el in review_elements:
+            if collected + len(batch) >= max_reviews:
+                break
             try:
-                # Get reviewer name
-                reviewer = ""
-                reviewer_selectors = [
-                    "div.d4r55",
-                    "div.TSUbDb",
-                    "span.X43Kjb"
-                ]
-                for selector in reviewer_selectors:
-                    try:
-                        reviewer_elem = el.locator(selector).first
-                        if await reviewer_elem.is_visible(timeout=100):
-                            reviewer = await reviewer_elem.text_content() or ""
-                            if reviewer.strip():
-                                break
-                    except:
-                        continue
+                # Skip elements already parsed in a previous scroll round
+                review_id = await el.get_attribute("data-review-id") or ""
+                if review_id and review_id in seen_ids:
+                    continue
                 
                 # Get rating
                 rating = 0
-                rating_selectors = [
-                    "span.kvMYJc",
-                    "span[aria-label*='star']"
-                ]
-                for selector in rating_selectors:
-                    try:
-                        rating_elem = el.locator(selector).first
-                        if await rating_elem.is_visible(timeout=100):
-                            rating_attr = await rating_elem.get_attribute("aria-label")
-                            if rating_attr:
-                                rating_match = re.search(r'(\d)', rating_attr)
-                                if rating_match:
-                                    rating = int(rating_match.group(1))
-                                    break
-                    except:
-                        continue
+                rating_attr = await selectors.attribute(el, "review.rating", "aria-label")
+                rating_match = re.search(r'(\d)', rating_attr)
+                if rating_match:
+                    rating = int(rating_match.group(1))
                 
                 if rating == 0:
+                    # Not rendered yet - retry on the next scroll round
                     continue
-                    
-                # Get review text - try multiple selectors
-                text = ""
-                text_selectors = [
-                    "span.wiI7pd",
-                    "span[data-value]",
-                    "div.MyEned",
-                ]
-                for selector in text_selectors:
-                    try:
-                        text_elem = el.locator(selector).first
-                        if await text_elem.is_visible(timeout=100):
-                            text = await text_elem.text_content() or ""
-                            if text.strip():
-                                break
-                    except:
-                        continue
                 
-                date = await el.locator("span.rsqaWe").text_content() or ""
+                if review_id:
+                    seen_ids.add(review_id)
+                
+                # Each field tries the variant that matched most recently first
+                reviewer = await selectors.text(el, "review.reviewer")
+                text = await selectors.text(el, "review.text")
+                date = await selectors.text(el, "review.date")
 
                 # Only add reviews with actual text content (not empty/whitespace)
                 text_clean = text.strip() if text else ""
                 if text_clean and len(text_clean) > 3:  # Must have at least 3 characters
                     # Check for duplicates
-                    if not any(r["text"].strip() == text_clean for r in reviews):
-                        reviews.append({
+                    if text_clean not in seen_texts:
+                        seen_texts.add(text_clean)
+                        batch.append({
                             "reviewer_name": reviewer.strip(), 
                             "rating": rating, 
                             "text": text_clean, 
@@ -504,13 +1009,15 @@ async def scrape_reviews(page, max_reviews: int) -> list:
                 continue
         
         # Check if we got new reviews
-        if len(reviews) == reviews_before:
+        if not batch:
             scroll_attempts += 1
         else:
             scroll_attempts = 0
+            collected += len(batch)
+            yield batch
         
         # Scroll to load more reviews
-        if len(reviews) < max_reviews:
+        if collected < max_reviews:
             try:
                 # Scroll the reviews container
                 await page.evaluate("""
@@ -522,56 +1029,416 @@ async def scrape_reviews(page, max_reviews: int) -> list:
                 await asyncio.sleep(1.5)
             except:
                 break
+
+
+async def scrape_reviews(page, max_reviews: int) -> list:
+    """Scrape reviews from a business page"""
+    reviews = []
+    async for batch in iter_review_batches(page, max_reviews):
+        reviews.extend(batch)
     
     # Sort by rating (lowest first - most likely to be violations)
     reviews.sort(key=lambda x: x["rating"])
     
     print(f"      ✅ Collected {len(reviews)} reviews with text")
+    return reviews
+
+
+def record_training_label(review: dict, classification: dict, business: dict, training_data: dict = None, dataset: TrainingDataset = None):
+    """Keep a paid LLM verdict for training local classifiers"""
+    record = None
+    if dataset is not None:
+        record = dataset.add(review, classification, business, PROMPT_VERSION, LLM_MODEL)
+        if record is None:
+            return  # Already labeled in this or an earlier run
+    
+    if training_data is not None:
+        if record is None:
+            record = {"text": review["text"], "rating": review["rating"], "prompt_version": PROMPT_VERSION, **classification}
+        key = "violations" if classification["is_violation"] else "non_violations"
+        training_data[key].append(record)
+
+
+def record_classification_stats(stats: dict, classification: dict):
+    """Count which tier decided a review and keep the pre-filter skip and agreement rates current"""
+    source = classification.get("source", "llm")
+    stats["reviews_classified"] = stats.get("reviews_classified", 0) + 1
+    if source == "llm":
+        stats["llm_calls"] = stats.get("llm_calls", 0) + 1
+    elif source == "prefilter":
+        stats["prefilter_skipped"] = stats.get("prefilter_skipped", 0) + 1
+    elif source == "local":
+        stats["local_decisions"] = stats.get("local_decisions", 0) + 1
+    elif source == "near_duplicate":
+        stats["near_duplicate_reuses"] = stats.get("near_duplicate_reuses", 0) + 1
+    elif source == "error":
+        stats["classification_errors"] = stats.get("classification_errors", 0) + 1
+    
+    if "prefilter_agreed" in classification:
+        stats["prefilter_audited"] = stats.get("prefilter_audited", 0) + 1
+        stats["prefilter_agreed"] = stats.get("prefilter_agreed", 0) + int(classification["prefilter_agreed"])
+    
+    stats["prefilter_skip_rate"] = round(stats.get("prefilter_skipped", 0) / stats["reviews_classified"], 3)
+    if stats.get("prefilter_audited"):
+        stats["prefilter_agreement_rate"] = round(stats["prefilter_agreed"] / stats["prefilter_audited"], 3)
+
+
+def review_budget_for(business: dict, max_reviews: int) -> int:
+    """
+    Reviews worth loading for one business. Reviews are read lowest rating first, so the budget
+    covers the expected 1-2 star reviews plus a margin, capped by `max_reviews` and the review count.
+    """
+    review_count = business.get("review_count") or 0
+    histogram = business.get("rating_histogram") or {}
+    
+    if sum(histogram.values()):
+        low_star_reviews = histogram.get(1, 0) + histogram.get(2, 0)
+    elif review_count and business.get("rating"):
+        # No distribution - assume the share of 1-2 star reviews grows as the average rating falls
+        low_share = min(max((4.7 - business["rating"]) / 3.0, 0.05), 0.9)
+        low_star_reviews = int(review_count * low_share)
+    else:
+        return max_reviews
+    
+    budget = max(low_star_reviews + REVIEW_BUDGET_MARGIN, MIN_REVIEW_BUDGET)
+    if review_count:
+        budget = min(budget, review_count)
+    return max(min(budget, max_reviews), 1)
+
+
+def more_violations_probability(classified: int, violations: int, remaining: int, prior_rate: float) -> float:
+    """
+    Probability of at least one more violation among `remaining` reviews, from a Beta-binomial
+    posterior on this business's violation rate with a prior centred on the run-wide rate.
+    """
+    if remaining <= 0:
+        return 0.0
+    prior_rate = min(max(prior_rate, 0.005), 0.95)
+    alpha = prior_rate * SEQUENTIAL_PRIOR_STRENGTH + violations
+    beta = (1.0 - prior_rate) * SEQUENTIAL_PRIOR_STRENGTH + (classified - violations)
+    # P(no violation in remaining) = B(alpha, beta + remaining) / B(alpha, beta)
+    log_none = (math.lgamma(beta + remaining) + math.lgamma(alpha + beta)
+                - math.lgamma(beta) - math.lgamma(alpha + beta + remaining))
+    return 1.0 - math.exp(log_none)
+
+
+async def classify_business_reviews(page, business: dict, filters: dict, stats: dict, progress_callback=None,
+                                    training_data: dict = None, dataset: TrainingDataset = None,
+                                    local_model: LocalClassifier = None, cascade: ClassifierCascade = None,
+                                    duplicate_index: NearDuplicateIndex = None, collector: PayloadCollector = None,
+                                    selectors: SelectorMemory = None, classified: list = None) -> list:
+    """
+    Stream reviews from the business page into the classifier while scrolling.
+    
+    Scrolling stops as soon as `min_violations_to_stop` violations are found, or once
+    `max_clean_reviews` reviews were classified without a single violation.
+    With a `local_model`, each scroll round is classified in one vectorized batch instead of the LLM.
+    With a `cascade`, the local model only decides confident cases and the rest go to the LLM.
+    Near-duplicates of a review already in `duplicate_index` reuse its LLM or local verdict without classification.
+    LLM verdicts are appended to `dataset` and collected in `training_data`.
+    Every (review, classification) pair is appended to `classified` when given.
+    Returns the list of flagged reviews.
+    """
+    max_reviews = filters["max_reviews_per_business"]
+    if filters.get("adaptive_review_budget", ADAPTIVE_REVIEW_BUDGET):
+        max_reviews = review_budget_for(business, max_reviews)
+    stats["review_budget_total"] = stats.get("review_budget_total", 0) + max_reviews
+    min_violations = filters["min_violations_to_stop"]
+    max_clean_reviews = filters.get("max_clean_reviews", MAX_CLEAN_REVIEWS_TO_STOP)
+    stop_probability = filters.get("sequential_stop_probability", SEQUENTIAL_STOP_PROBABILITY)
+    # Run-wide violation rate so far, used as the prior for this business
+    prior_rate = (stats.get("total_violations_found", 0) + 1) / (stats.get("reviews_classified", 0) + 20)
+    prefilter_threshold = filters.get("prefilter_threshold", PREFILTER_THRESHOLD)
+    prefilter_audit_rate = filters.get("prefilter_audit_rate", PREFILTER_AUDIT_RATE)
+    
+    flagged_reviews = []
+    reviews_seen = 0
+    stop_reason = ""
+    
+    batches = iter_review_batches(page, max_reviews, filters.get("sort_reviews_lowest_first", True), collector, selectors)
+    try:
+        async for batch in batches:
+            if cascade:
+                local_verdicts = cascade.score_batch(batch)
+            elif local_model:
+                local_verdicts = local_model.classify_batch(batch)
+            else:
+                local_verdicts = None
+            
+            for batch_idx, review in enumerate(batch):
+                reviews_seen += 1
+                stats["total_reviews_scraped"] += 1
+                
+                if progress_callback:
+                    progress_callback({"status": "classifying_reviews", "current": reviews_seen, "total": max_reviews, "message": f"Classifying review {reviews_seen} (max {max_reviews})"})
+                
+                occurrence = {
+                    "business_name": business.get("name", ""),
+                    "business_url": business.get("url", ""),
+                    "zip_code": business.get("zip_code", ""),
+                    "category": business.get("category", ""),
+                    "reviewer_name": review.get("reviewer_name", ""),
+                    "date": review.get("date", ""),
+                }
+                signature = duplicate_index.signature(review["text"]) if duplicate_index is not None else None
+                duplicate_id, similarity = duplicate_index.find(review["text"], signature) if signature is not None else (None, 0.0)
+                
+                if duplicate_id is not None:
+                    # Same text was already classified elsewhere in this run - reuse the verdict
+                    original = duplicate_index.entries[duplicate_id]["classification"]
+                    classification = {
+                        # The original's audit outcome was already counted once
+                        **{k: val for k, val in original.items() if k not in REUSE_EXCLUDED_FIELDS},
+                        "source": "near_duplicate",
+                        "duplicate_similarity": round(similarity, 3),
+                        "reasoning": f"Near-duplicate ({similarity:.0%}) of a review seen at "
+                                     f"{duplicate_index.entries[duplicate_id]['occurrences'][0]['business_name']}: {original.get('reasoning', '')}",
+                    }
+                    duplicate_index.add_occurrence(duplicate_id, occurrence)
+                    review["duplicate_cluster_id"] = duplicate_id
+                elif cascade:
+                    classification = cascade.decide(review, local_verdicts[batch_idx])
+                    if cascade.check_drift():
+                        message = (f"⚠️ Cascade drift: local/LLM agreement {cascade.agreement_rate():.0%} over the last "
+                                   f"{len(cascade.audits)} audits - retrain with: python local_classifier.py train")
+                        print(f"      {message}")
+                        if progress_callback:
+                            progress_callback({"status": "info", "message": message})
+                elif local_verdicts is not None:
+                    classification = local_verdicts[batch_idx]
+                else:
+                    classification = classify_review(review["text"], review["rating"], prefilter_threshold, prefilter_audit_rate)
+                record_classification_stats(stats, classification)
+                if classified is not None:
+                    classified.append((review, classification))
+                
+                # Only verdicts on the text itself are reused - pre-filter skips depend on the rating too
+                if signature is not None and duplicate_id is None and classification.get("source") in REUSABLE_SOURCES:
+                    review["duplicate_cluster_id"] = duplicate_index.add(review["text"], classification, occurrence, signature)
+                
+                if classification.get("source") == "llm":
+                    record_training_label(review, classification, business, training_data, dataset)
+                
+                if classification["is_violation"]:
+                    review["classification"] = classification
+                    flagged_reviews.append(review)
+                    
+                    if progress_callback:
+                        progress_callback({"status": "violation_found", "violation_count": len(flagged_reviews), "message": f"Violation found! ({len(flagged_reviews)} total)"})
+                    
+                    # Stop if we found enough violations
+                    if len(flagged_reviews) >= min_violations:
+                        stop_reason = "violation threshold reached"
+                        break
+                elif not flagged_reviews and reviews_seen >= max_clean_reviews:
+                    # Enough clean reviews to rule this business out
+                    stop_reason = f"{reviews_seen} clean reviews"
+                    break
+                
+                # Sequential test: stop once another violation within the budget is unlikely
+                if stop_probability and reviews_seen >= SEQUENTIAL_MIN_REVIEWS:
+                    p_more = more_violations_probability(reviews_seen, len(flagged_reviews), max_reviews - reviews_seen, prior_rate)
+                    if p_more < stop_probability:
+                        stats["sequential_stops"] = stats.get("sequential_stops", 0) + 1
+                        stop_reason = f"P(more violations) = {p_more:.1%}"
+                        break
+            
+            if stop_reason:
+                break
+    finally:
+        await batches.aclose()
+    
+    if cascade:
+        stats["cascade"] = cascade.summary()
+    
+    if progress_callback:
+        message = f"Collected {reviews_seen} reviews" + (f" (stopped early: {stop_reason})" if stop_reason else "")
+        progress_callback({"status": "reviews_collected", "count": reviews_seen, "message": message})
+    
+    print(f"      ✅ Classified {reviews_seen} reviews{f' - stopped early: {stop_reason}' if stop_reason else ''}")
+    return flagged_reviews
+
+
+async def queue_business_reviews(page, business: dict, filters: dict, stats: dict, pending: PendingBatch,
+                                 deferred: list, progress_callback=None, collector: PayloadCollector = None,
+                                 selectors: SelectorMemory = None):
+    """
+    Batch mode: scroll a business's reviews and queue them for the Batch API instead of classifying.
+    The local pre-filter still drops clearly benign reviews before they are queued.
+    """
+    max_reviews = filters["max_reviews_per_business"]
+    prefilter_threshold = filters.get("prefilter_threshold", PREFILTER_THRESHOLD)
+    business_idx = len(deferred)
+    queued = []
+    
+    batches = iter_review_batches(page, max_reviews, filters.get("sort_reviews_lowest_first", True), collector, selectors)
+    try:
+        async for batch in batches:
+            for review in batch:
+                stats["total_reviews_scraped"] += 1
+                if len(review["text"].strip()) < 10:
+                    record_classification_stats(stats, {"source": "rules"})
+                    continue
+                if prefilter_score(review["text"], review["rating"]) < prefilter_threshold:
+                    record_classification_stats(stats, {"source": "prefilter"})
+                    continue
+                
+                pending.add(f"{business_idx}:{len(queued)}", build_classification_request(review["text"], review["rating"]))
+                queued.append(review)
+    finally:
+        await batches.aclose()
+    
+    deferred.append({"business": business, "reviews": queued})
+    stats["reviews_queued"] = stats.get("reviews_queued", 0) + len(queued)
+    
+    if progress_callback:
+        progress_callback({"status": "reviews_collected", "count": len(queued), "message": f"Queued {len(queued)} reviews for batch classification"})
 
 
+async def classify_deferred_batch(page, client, pending: PendingBatch, deferred: list, filters: dict, stats: dict,
+                                  leads: list, timestamp: str, progress_callback=None, training_data: dict = None,
+                                  dataset: TrainingDataset = None, history: YieldHistory = None, sink: LeadSink = None,
+                                  store: ResultsStore = None, run_id: str = None):
+    """Submit queued reviews to the Batch API, wait for the verdicts and turn flagged businesses into leads"""
+    pending.close()
+    if not len(pending):
+        return
+    
+    # Submit every file first so the batches run side by side, then wait for all of them
+    batch_ids = []
+    for path, count in zip(pending.paths, pending.counts):
+        batch_id = submit_batch(client, path, description=f"VARDA sweep {timestamp}")
+        batch_ids.append(batch_id)
+        print(f"\n📦 Submitted batch {batch_id} ({os.path.basename(path)}, {count} reviews)")
+        if progress_callback:
+            progress_callback({"status": "batch_submitted", "batch_id": batch_id, "message": f"Submitted {count} reviews to the Batch API ({batch_id})"})
+    
+    poll_seconds = filters.get("batch_poll_seconds", BATCH_POLL_SECONDS)
+    batches = await asyncio.gather(*(wait_for_batch(client, batch_id, poll_seconds, progress_callback) for batch_id in batch_ids))
+    
+    verdicts = {}
+    for batch_id, batch in zip(batch_ids, batches):
+        if batch.status != "completed":
+            message = f"Batch {batch_id} ended with status {batch.status}"
+            print(f"      ⚠️ {message}")
+            if progress_callback:
+                progress_callback({"status": "info", "message": message})
+            continue
+        verdicts.update(download_batch_results(client, batch))
+    
+    # Merge verdicts back into their businesses
+    for business_idx, entry in enumerate(deferred):
+        business = entry["business"]
+        flagged_reviews = []
+        classified = []
+        for review_idx, review in enumerate(entry["reviews"]):
+            content = verdicts.get(f"{business_idx}:{review_idx}")
+            if content is None:
+                continue  # Failed or expired request
+            try:
+                classification = parse_classification_response(content)
+            except Exception as e:
+                classification = classification_error(e)
+            
+            record_classification_stats(stats, classification)
+            if classification["source"] == "llm":
+                record_training_label(review, classification, business, training_data, dataset)
+            classified.append((review, classification))
+            if classification["is_violation"]:
+                review["classification"] = classification
+                flagged_reviews.append(review)
+        
+        lead = None
+        if flagged_reviews:
+            lead = await record_lead(page, business, flagged_reviews, leads, stats, sink, progress_callback)
+        if store is not None:
+            store.record_business(run_id, business, classified, lead)
+        if history is not None:
+            history.record(business["category"], business["zip_code"], bool(flagged_reviews))
+
 
 #######################################################################
-# MAIN SCRAPER
+# PROGRESS EVENTS
 #######################################################################
 
-def save_lead_incrementally(lead: dict, output_dir: str, timestamp: str, area: str = ""):
-    """Save a single lead to CSV immediately for real-time viewing"""
-    safe_area = area.replace(",", "").replace(" ", "_")[:30] if area else ""
-    csv_filename = f"violations_leads_{safe_area}_{timestamp}.csv" if safe_area else f"violations_leads_{timestamp}.csv"
-    csv_path = f"{output_dir}/{csv_filename}"
-    
-    flagged = lead.get("flagged_reviews", [])
-    top_violations = flagged[:3]
-    
-    row = {
-        "business_name": lead["name"],
-        "website_url": lead.get("website", ""),
-        "email": lead.get("email", ""),
-        "phone": lead.get("phone", ""),
-        "violations_count": len(flagged),
-    }
+class ProgressEmitter:
+    """
+    Wraps a progress_callback so it sees a bounded event rate.
     
-    for i in range(3):
-        if i < len(top_violations):
-            v = top_violations[i]
-            row[f"review_{i+1}_text"] = v["text"]
-            row[f"review_{i+1}_reason"] = v["classification"]["reasoning"]
-            row[f"review_{i+1}_confidence"] = round(v["classification"]["confidence"], 2)
-            row[f"review_{i+1}_rating"] = v["rating"]
-            row[f"review_{i+1}_reviewer"] = v["reviewer_name"]
-            row[f"review_{i+1}_date"] = v["date"]
-        else:
-            row[f"review_{i+1}_text"] = ""
-            row[f"review_{i+1}_reason"] = ""
-            row[f"review_{i+1}_confidence"] = ""
-            row[f"review_{i+1}_rating"] = ""
-            row[f"review_{i+1}_reviewer"] = ""
+    Statuses in `coalesced` are held back and sent as one snapshot per status every `interval`
+    seconds: the latest event with a "coalesced" count of the events it stands for. Each flush also
+    sends a "counters" event with the run totals when anything was held or they changed. Any other
+    status flushes the held snapshots first (so order is kept) and passes straight through.
+    `run()` flushes on a timer, so held snapshots also go out during quiet stretches.
+    """
+    
+    def __init__(self, callback, stats: dict = None, interval: float = PROGRESS_INTERVAL_SECONDS,
+                 coalesced: set = COALESCED_STATUSES):
+        self.callback = callback
+        self.stats = stats
+        self.interval = interval
+        self.coalesced = coalesced
+        self.received = 0
+        self.sent = 0
+        self._held = {}  # status -> (latest event, count)
+        self._last_flush = time.monotonic()
+        self._last_counters = None
+    
+    def __call__(self, update: dict):
+        self.received += 1
+        status = update.get("status")
+        if self.interval <= 0 or status not in self.coalesced:
+            self.flush()
+            self._send(update)
+            return
+        _, count = self._held.get(status, (None, 0))
+        self._held[status] = (update, count + 1)
+        if time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+    
+    def _send(self, update: dict):
+        self.sent += 1
+        try:
+            self.callback(update)
+        except Exception as e:
+            print(f"      ⚠️ Progress callback failed: {e}")
+    
+    def counters(self) -> dict:
+        stats = self.stats or {}
+        return {
+            "found": stats.get("total_businesses_found", 0),
+            "processed": stats.get("total_businesses_processed", 0),
+            "reviews": stats.get("total_reviews_scraped", 0),
+            "violations": stats.get("total_violations_found", 0),
+            "leads": stats.get("total_leads", 0),
+        }
     
-    # Append to CSV (create if doesn't exist)
-    file_exists = os.path.exists(csv_path)
-    df = pd.DataFrame([row])
-    df.to_csv(csv_path, mode='a', header=not file_exists, index=False)
+    def flush(self):
+        """Send the held snapshots and the current counters"""
+        self._last_flush = time.monotonic()
+        held, self._held = self._held, {}
+        for update, count in held.values():
+            self._send({**update, "coalesced": count} if count > 1 else update)
+        if self.stats is not None:
+            counters = self.counters()
+            if held or counters != self._last_counters:
+                self._last_counters = counters
+                self._send({"status": "counters", "counters": counters, "message": ""})
+    
+    async def run(self):
+        """Flush every `interval` seconds that passed without one - run as a task next to the scrape"""
+        while True:
+            await asyncio.sleep(max(self.interval - (time.monotonic() - self._last_flush), 0.01))
+            if time.monotonic() - self._last_flush >= self.interval:
+                self.flush()
+    
+    def summary(self) -> dict:
+        return {"received": self.received, "sent": self.sent}
+
 
+#######################################################################
+# MAIN SCRAPER
+#######################################################################
 
 def print_violation_details(lead: dict, flagged_reviews: list):
     """Print detailed violation information to console"""
@@ -633,6 +1500,61 @@ async def install_playwright_browsers_if_needed(progress_callback=None):
     return False
 
 
+def attach_duplicate_evidence(lead: dict, duplicate_index: NearDuplicateIndex):
+    """Record where else each flagged review (or a near copy of it) was posted"""
+    evidence = 0
+    for review in lead.get("flagged_reviews", []):
+        cluster_id = review.get("duplicate_cluster_id")
+        if cluster_id is None:
+            continue
+        others = [o for o in duplicate_index.cluster(cluster_id) if o["business_url"] != lead.get("url", "")]
+        review["duplicates"] = others
+        if others:
+            evidence += 1
+    lead["duplicate_evidence_count"] = evidence
+
+
+async def record_lead(page, business: dict, flagged_reviews: list, leads: list, stats: dict, sink: LeadSink,
+                      progress_callback=None, duplicate_index: NearDuplicateIndex = None) -> dict:
+    """Turn a business with flagged reviews into a lead: find its email, save it and report it"""
+    # Try to get email from website
+    email = ""
+    if business.get("website"):
+        if progress_callback:
+            progress_callback({"status": "info", "message": f"Scraping email from {business.get('website', '')}"})
+        email = await scrape_email_from_website(page, business["website"])
+    
+    lead = {
+        "name": business["name"],
+        "website": business.get("website", ""),
+        "email": email,
+        "phone": business.get("phone", ""),
+        "rating": business.get("rating", 0.0),
+        "review_count": business.get("review_count", 0),
+        "flagged_reviews": flagged_reviews,
+        "zip_code": business.get("zip_code", ""),
+        "category": business.get("category", ""),
+        "url": business.get("url", ""),
+    }
+    
+    if duplicate_index is not None:
+        attach_duplicate_evidence(lead, duplicate_index)
+    
+    leads.append(lead)
+    stats["total_violations_found"] += len(flagged_reviews)
+    stats["total_leads"] += 1
+    
+    # Save immediately
+    if sink is not None:
+        sink.write(lead)
+    
+    if progress_callback:
+        progress_callback({"status": "lead_found", "lead": lead, "violations_count": len(flagged_reviews), "message": f"🚩 LEAD FOUND: {business['name']} ({len(flagged_reviews)} violations)"})
+    
+    print_violation_details(lead, flagged_reviews)
+    return lead
+
+
 async def run_scraper(zip_codes=None, progress_callback=None, filters=None):
     """
     Main scraper function
@@ -641,6 +1563,20 @@ async def run_scraper(zip_codes=None, progress_callback=None, filters=None):
         zip_codes: List of zip codes to scrape (e.g., ["92100", "92200"])
         progress_callback: Optional callback function for progress updates
         filters: Optional dict with min_rating, max_rating, min_reviews, etc.
+            Set "classification_mode": "batch" to classify through the Batch API after the sweep;
+            "batch_client" may hold a stand-in client such as batch_classifier.LocalBatchClient.
+            Set "time_budget_minutes" to stop after that long; businesses are processed by expected
+            lead yield across the whole zip x category grid, so the best ones go first.
+            Set "max_businesses" to cap businesses processed; the budget is split across cells by
+            past lead yield (with an "exploration_share"), and cells without budget are not searched.
+            Set "extraction_mode": "network" to decode Maps search and review responses instead of
+            reading the DOM ("record_payloads": True also saves the raw bodies to output/payloads/).
+            Set "businesses" to a list of business dicts (see BusinessTable.to_businesses) to process
+            those directly and skip the searches.
+            Set "progress_interval_seconds" to change how often per-item progress is reported (0 = every event).
+            Set "run_id" to choose the run's key in the results store (default: the run timestamp).
+            To stop a run, cancel its task (the worker does this for the dashboard's Stop button);
+            it is recorded as "cancelled" in the results store.
     
     Returns:
         Tuple of (leads_list, training_data_dict, stats_dict)
@@ -655,10 +1591,16 @@ async def run_scraper(zip_codes=None, progress_callback=None, filters=None):
             "min_reviews": MIN_REVIEWS,
             "max_reviews_per_business": MAX_REVIEWS_PER_BUSINESS,
             "min_violations_to_stop": MIN_VIOLATIONS_TO_STOP,
+            "max_clean_reviews": MAX_CLEAN_REVIEWS_TO_STOP,
+            "prefilter_threshold": PREFILTER_THRESHOLD,
+            "prefilter_audit_rate": PREFILTER_AUDIT_RATE,
+            "classifier_backend": CLASSIFIER_BACKEND,
+            "classification_mode": CLASSIFICATION_MODE,
         }
     
     country = filters.get("country", "France")
-    categories = filters.get("categories", ALL_CATEGORIES)
+    # The dashboard passes {"name": ..., "tier": ...} dicts
+    categories = [c["name"] if isinstance(c, dict) else c for c in filters.get("categories", ALL_CATEGORIES)]
     
     if progress_callback:
         progress_callback({"status": "starting", "message": "Starting scraper..."})
@@ -670,6 +1612,23 @@ async def run_scraper(zip_codes=None, progress_callback=None, filters=None):
         if progress_callback:
             progress_callback({"status": "error", "message": "Playwright browsers not installed. Please run: python -m playwright install chromium"})
         raise RuntimeError("Playwright browsers not installed. Please run: python -m playwright install chromium")
+    
+    # Load the local model once, before any browser work
+    backend = filters.get("classifier_backend", CLASSIFIER_BACKEND)
+    local_model = None
+    cascade = None
+    if backend in ("local", "cascade"):
+        local_model = get_local_classifier(filters.get("local_model_path", LOCAL_MODEL_PATH))
+        if backend == "cascade":
+            cascade = ClassifierCascade(
+                local_model,
+                low=filters.get("cascade_low", CASCADE_LOW),
+                high=filters.get("cascade_high", CASCADE_HIGH),
+                audit_rate=filters.get("cascade_audit_rate", CASCADE_AUDIT_RATE),
+            )
+            local_model = None  # The cascade owns the local model
+        if progress_callback:
+            progress_callback({"status": "info", "message": f"Using {backend} classifier backend"})
 
     async with async_playwright() as p:
         # Use persistent browser context to maintain language and login settings
@@ -714,6 +1673,12 @@ async def run_scraper(zip_codes=None, progress_callback=None, filters=None):
             });
         """)
         
+        # Network mode: decode the responses Maps fetches instead of walking the DOM
+        collector = None
+        if filters.get("extraction_mode", EXTRACTION_MODE) == "network":
+            record_dir = os.path.join(OUTPUT_DIR, "payloads") if filters.get("record_payloads") else None
+            collector = PayloadCollector(page, record_dir)
+        
         leads = []
         training_data = {"violations": [], "non_violations": []}
         stats = {
@@ -722,16 +1687,174 @@ async def run_scraper(zip_codes=None, progress_callback=None, filters=None):
             "total_reviews_scraped": 0,
             "total_violations_found": 0,
             "total_leads": 0,
+            "reviews_classified": 0,
+            "llm_calls": 0,
+            "prefilter_skipped": 0,
+            "prefilter_audited": 0,
+            "prefilter_agreed": 0,
+            "local_decisions": 0,
+            "reviews_queued": 0,
+            "near_duplicate_reuses": 0,
+            "classification_errors": 0,
+            "review_budget_total": 0,
+            "sequential_stops": 0,
         }
         
+        # From here on per-item progress is coalesced; milestones still go out immediately
+        emitter = None
+        if progress_callback:
+            emitter = ProgressEmitter(progress_callback, stats, filters.get("progress_interval_seconds", PROGRESS_INTERVAL_SECONDS))
+            progress_callback = emitter
+        
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
         
+        # Leads are written as they are found
+        sink = LeadSink(OUTPUT_DIR, timestamp)
+        
+        # Runs, businesses, reviews, verdicts and leads, queryable across runs
+        run_id = filters.get("run_id") or timestamp
+        store = ResultsStore(OUTPUT_DIR)
+        store.start_run(run_id, zip_codes, filters)
+        run_status = "failed"
+        
+        # Append-only dataset of every LLM verdict, shared across runs
+        dataset = TrainingDataset(OUTPUT_DIR)
+        
+        # Batch mode: queue reviews during the sweep, classify them through the Batch API at the end
+        batch_mode = filters.get("classification_mode", CLASSIFICATION_MODE) == "batch"
+        pending = PendingBatch(OUTPUT_DIR, timestamp) if batch_mode else None
+        deferred = []
+        
+        # Cached search feeds, shared across runs
+        cache_ttl = filters.get("search_cache_ttl_hours", SEARCH_CACHE_TTL_HOURS)
+        search_cache = SearchCache(OUTPUT_DIR, cache_ttl) if cache_ttl else None
+        
+        # Which selector variant currently matches each field, learned across runs
+        selectors = SelectorMemory(OUTPUT_DIR)
+        
+        details_timings = {}  # Per-field milliseconds spent on place pages
+        
+        # Every place seen in a search feed, for offline re-filtering
+        business_table = BusinessTable(OUTPUT_DIR)
+        preset_businesses = filters.get("businesses")
+        
+        # Run-wide index so copies of the same review across places are classified once
+        duplicate_index = NearDuplicateIndex() if filters.get("near_duplicate_detection", True) else None
+        
+        # Businesses from every zip x category search share one priority queue, best expected yield first
+        history = YieldHistory(OUTPUT_DIR)
+        queue = BusinessQueue()
+        businesses_per_search = filters.get("businesses_per_search", BUSINESSES_PER_SEARCH)
+        time_budget = filters.get("time_budget_minutes")
+        deadline = time.time() + time_budget * 60 if time_budget else None
+        
+        # Budgeted runs: a bandit splits the businesses-processed budget across zip x category cells
+        business_budget = filters.get("max_businesses")
+        allocation = None
+        if business_budget:
+            cells = [(zip_code, category) for zip_code in zip_codes for category in categories]
+            allocation = allocate_budget(cells, business_budget, history, filters.get("exploration_share", EXPLORATION_SHARE))
+            stats["allocation"] = {f"{z}|{c}": n for (z, c), n in allocation.items()}
+            if progress_callback:
+                progress_callback({
+                    "status": "allocation",
+                    "allocation": [
+                        {"zip_code": z, "category": c, "businesses": n, "expected_lead_rate": round(expected_cell_rate(history, z, c), 3)}
+                        for (z, c), n in sorted(allocation.items(), key=lambda item: -item[1])
+                    ],
+                    "message": f"Budget of {business_budget} businesses allocated to {sum(1 for n in allocation.values() if n)}/{len(cells)} zip x category cells",
+                })
+        cell_processed = {}
+        overflow = []  # Businesses beyond their cell's share, used if budget is left at the end
+        
+        async def process_business(business: dict):
+            """Details, reviews and classification for one business popped from the queue"""
+            if progress_callback:
+                processed = stats["total_businesses_processed"] + 1
+                total = processed + len(queue)
+                progress_callback({"status": "business_processing", "business_name": business["name"], "current": processed, "total": total, "priority": business.get("priority"), "message": f"Processing {business['name']} ({processed}/{total}, priority {business.get('priority', 0):.2f})"})
+            
+            try:
+                # Get business details
+                details = await scrape_business_details(page, business["url"], selectors, details_timings)
+                # Fields the page didn't render in time keep the values read from the search feed
+                business.update({field: value for field, value in details.items() if value or field not in business})
+                
+                # Scrape reviews and classify them as they load
+                if progress_callback:
+                    progress_callback({"status": "scraping_reviews", "business_name": business["name"], "message": f"Scraping reviews for {business['name']}..."})
+                
+                if batch_mode:
+                    # Verdicts arrive after the sweep - see classify_deferred_batch
+                    await queue_business_reviews(page, business, filters, stats, pending, deferred, progress_callback, collector, selectors)
+                    business_table.mark_processed(business)
+                    store.record_business(run_id, business)
+                    stats["total_businesses_processed"] += 1
+                    return
+                
+                classified = []
+                flagged_reviews = await classify_business_reviews(
+                    page, business, filters, stats, progress_callback,
+                    training_data=training_data, dataset=dataset,
+                    local_model=local_model, cascade=cascade, duplicate_index=duplicate_index,
+                    collector=collector, selectors=selectors, classified=classified,
+                )
+                
+                # If we found violations, this is a lead
+                lead = None
+                if flagged_reviews:
+                    lead = await record_lead(page, business, flagged_reviews, leads, stats, sink, progress_callback, duplicate_index)
+                store.record_business(run_id, business, classified, lead)
+                
+                history.record(business["category"], business["zip_code"], bool(flagged_reviews))
+                business_table.mark_processed(business)
+                stats["total_businesses_processed"] += 1
+                
+            except Exception as e:
+                print(f"      Error processing business {business.get('name', 'unknown')}: {e}")
+        
+        def out_of_time() -> bool:
+            if business_budget and stats["total_businesses_processed"] >= business_budget:
+                return True
+            return deadline is not None and time.time() >= deadline
+        
+        async def process_next():
+            """Pop the best business whose cell still has budget"""
+            while queue:
+                business = queue.pop()
+                cell = (business["zip_code"], business["category"])
+                if allocation is not None and cell_processed.get(cell, 0) >= allocation.get(cell, 0):
+                    overflow.append(business)
+                    continue
+                cell_processed[cell] = cell_processed.get(cell, 0) + 1
+                await process_business(business)
+                return
+        
+        # Held progress also goes out while the scrape is waiting on pages or batches
+        flusher = asyncio.create_task(emitter.run()) if emitter and emitter.interval > 0 else None
+        
         try:
-            for zip_code in zip_codes:
+            if preset_businesses:
+                # Re-filtered from the business table - no searches needed
+                for business in preset_businesses:
+                    business = dict(business)
+                    business["zip_code"] = str(business.get("zip_code", ""))
+                    queue.push(business, score_business(business, history))
+                stats["total_businesses_found"] = len(queue)
+                if progress_callback:
+                    progress_callback({"status": "businesses_found", "count": len(queue), "message": f"Queued {len(queue)} businesses from the saved business table"})
+            
+            for zip_code in ([] if preset_businesses else zip_codes):
+                if out_of_time():
+                    break
                 if progress_callback:
                     progress_callback({"status": "area_start", "area": zip_code, "message": f"Processing zip code: {zip_code}"})
                 
                 for category in categories:
+                    if out_of_time():
+                        break
+                    if allocation is not None and not allocation.get((zip_code, category)):
+                        continue  # No budget for this cell - skip the search entirely
                     if progress_callback:
                         progress_callback({"status": "category_start", "category": category, "message": f"Processing category: {category}"})
                     
@@ -739,171 +1862,160 @@ async def run_scraper(zip_codes=None, progress_callback=None, filters=None):
                     businesses = await scrape_all_businesses(
                         page, zip_code, category, country,
                         filters["min_rating"], filters["max_rating"], filters["min_reviews"],
-                        progress_callback
+                        progress_callback, search_cache, business_table, collector, selectors
                     )
                     
                     stats["total_businesses_found"] += len(businesses)
                     
+                    for business in businesses:
+                        business["zip_code"] = zip_code
+                        queue.push(business, score_business(business, history))
+                    
                     if progress_callback:
-                        progress_callback({"status": "businesses_found", "count": len(businesses), "message": f"Found {len(businesses)} businesses for {category} in {zip_code}"})
+                        progress_callback({"status": "businesses_found", "count": len(businesses), "message": f"Found {len(businesses)} businesses for {category} in {zip_code} ({len(queue)} queued)"})
                     
-                    # Process each business
-                    for idx, business in enumerate(businesses, 1):
-                        if progress_callback:
-                            progress_callback({"status": "business_processing", "business_name": business["name"], "current": idx, "total": len(businesses), "message": f"Processing {business['name']} ({idx}/{len(businesses)})"})
-                        
-                        try:
-                            # Get business details
-                            details = await scrape_business_details(page, business["url"])
-                            business.update(details)
-                            
-                            # Scrape reviews
-                            if progress_callback:
-                                progress_callback({"status": "scraping_reviews", "business_name": business["name"], "message": f"Scraping reviews for {business['name']}..."})
-                            
-                            reviews = await scrape_reviews(page, filters["max_reviews_per_business"])
-                            stats["total_reviews_scraped"] += len(reviews)
-                            
-                            if progress_callback:
-                                progress_callback({"status": "reviews_collected", "count": len(reviews), "message": f"Collected {len(reviews)} reviews"})
-                            
-                            # Classify reviews
-                            if progress_callback:
-                                progress_callback({"status": "classifying_reviews", "current": 0, "total": len(reviews), "message": "Classifying reviews..."})
-                            
-                            flagged_reviews = []
-                            violation_count = 0
-                            
-                            for review_idx, review in enumerate(reviews, 1):
-                                if progress_callback:
-                                    progress_callback({"status": "classifying_reviews", "current": review_idx, "total": len(reviews), "message": f"Classifying review {review_idx}/{len(reviews)}"})
-                                
-                                classification = classify_review(review["text"], review["rating"])
-                                
-                                if classification["is_violation"]:
-                                    review["classification"] = classification
-                                    flagged_reviews.append(review)
-                                    violation_count += 1
-                                    
-                                    if progress_callback:
-                                        progress_callback({"status": "violation_found", "violation_count": violation_count, "message": f"Violation found! ({violation_count} total)"})
-                                    
-                                    # Stop if we found enough violations
-                                    if violation_count >= filters["min_violations_to_stop"]:
-                                        break
-                            
-                            # If we found violations, this is a lead
-                            if flagged_reviews:
-                                # Try to get email from website
-                                email = ""
-                                if business.get("website"):
-                                    if progress_callback:
-                                        progress_callback({"status": "info", "message": f"Scraping email from {business.get('website', '')}"})
-                                    email = await scrape_email_from_website(page, business["website"])
-                                
-                                lead = {
-                                    "name": business["name"],
-                                    "website": business.get("website", ""),
-                                    "email": email,
-                                    "phone": business.get("phone", ""),
-                                    "rating": business.get("rating", 0.0),
-                                    "review_count": business.get("review_count", 0),
-                                    "flagged_reviews": flagged_reviews,
-                                    "zip_code": zip_code,
-                                    "category": category,
-                                }
-                                
-                                leads.append(lead)
-                                stats["total_violations_found"] += len(flagged_reviews)
-                                stats["total_leads"] += 1
-                                
-                                # Save immediately
-                                save_lead_incrementally(lead, OUTPUT_DIR, timestamp, zip_code)
-                                
-                                if progress_callback:
-                                    progress_callback({"status": "lead_found", "lead": lead, "violations_count": len(flagged_reviews), "message": f"🚩 LEAD FOUND: {business['name']} ({len(flagged_reviews)} violations)"})
-                                
-                                print_violation_details(lead, flagged_reviews)
-                            
-                            stats["total_businesses_processed"] += 1
-                            
-                        except Exception as e:
-                            print(f"      Error processing business {business.get('name', 'unknown')}: {e}")
-                            continue
+                    # Work the best businesses found so far while the grid is still being searched
+                    for _ in range(min(businesses_per_search, len(queue))):
+                        if out_of_time():
+                            break
+                        await process_next()
                     
                     await asyncio.sleep(1)  # Small delay between categories
                 
+                history.save()
+                business_table.save()
+                selectors.save()
                 await asyncio.sleep(2)  # Small delay between zip codes
             
+            # Drain the rest of the queue in priority order
+            while queue and not out_of_time():
+                await process_next()
+            
+            # Budget left because some cells had fewer businesses than their share
+            overflow.sort(key=lambda b: -b.get("priority", 0))
+            while overflow and not out_of_time():
+                await process_business(overflow.pop(0))
+            
+            if deadline is not None and time.time() >= deadline:
+                stats["businesses_left_in_queue"] = len(queue) + len(overflow)
+                message = f"⏱️ Time budget of {time_budget} min reached - {len(queue) + len(overflow)} queued businesses skipped"
+                print(f"\n{message}")
+                if progress_callback:
+                    progress_callback({"status": "info", "message": message})
+            
+            if batch_mode:
+                client = filters.get("batch_client") or get_openai_client()
+                await classify_deferred_batch(
+                    page, client, pending, deferred, filters, stats, leads, timestamp, progress_callback,
+                    training_data=training_data, dataset=dataset, history=history, sink=sink,
+                    store=store, run_id=run_id,
+                )
+            
+            # Copies found after a lead was saved still count as evidence in the returned leads
+            if duplicate_index is not None:
+                for lead in leads:
+                    attach_duplicate_evidence(lead, duplicate_index)
+                store.update_duplicate_evidence(run_id, leads)
+            
+            if stats["total_businesses_processed"]:
+                stats["avg_llm_calls_per_business"] = round(stats["llm_calls"] / stats["total_businesses_processed"], 2)
+                stats["avg_review_budget"] = round(stats["review_budget_total"] / stats["total_businesses_processed"], 1)
+            
+            stats["selectors"] = selectors.summary()
+            if details_timings:
+                stats["avg_details_ms"] = {
+                    field: round(entry["total_ms"] / entry["count"], 2) for field, entry in details_timings.items()
+                }
+                print(f"\n⏱️ Place page timing (avg ms): {stats['avg_details_ms']}")
+            
+            if collector:
+                stats["extraction"] = collector.summary()
+                print(f"\n📡 Network extraction: {collector.summary()}")
+            
+            if search_cache:
+                stats["search_cache_hits"] = search_cache.hits
+                stats["search_cache_misses"] = search_cache.misses
+                print(f"\n🗄️ Search cache: {search_cache.hits} hits, {search_cache.misses} searches")
+            
+            if stats["reviews_classified"]:
+                print(f"\n⚡ Pre-filter skipped {stats['prefilter_skipped']}/{stats['reviews_classified']} reviews "
+                      f"({stats.get('prefilter_skip_rate', 0):.1%}), {stats['llm_calls']} LLM calls")
+            if stats["prefilter_audited"]:
+                print(f"   Audit agreement: {stats.get('prefilter_agreement_rate', 0):.1%} on {stats['prefilter_audited']} sampled skips")
+            if cascade:
+                print(f"🪜 Cascade: {cascade.summary()}")
+            
+            # Columnar copy of the run for the dashboard's past results
+            if leads and "parquet" in EXPORT_FORMATS:
+                export_parquet(leads, OUTPUT_DIR, run_id)
+            
+            if emitter:
+                emitter.flush()
+                stats["progress_events"] = emitter.summary()
+            
+            run_status = "completed"
+            store.finish_run(run_id, run_status, stats)
+            
             if progress_callback:
                 progress_callback({"status": "completed", "stats": stats, "message": "Scraping completed!"})
         
+        except asyncio.CancelledError:
+            run_status = "cancelled"
+            raise
+        
         finally:
+            if flusher:
+                flusher.cancel()
+            if emitter:
+                emitter.flush()
+            if run_status != "completed":
+                store.finish_run(run_id, run_status, stats)
+            store.close()
+            if search_cache:
+                search_cache.close()
+            history.save()
+            business_table.save()
+            selectors.save()
+            if pending:
+                pending.close()
+            dataset.close()
+            sink.close()
             await browser.close()
     
     return leads, training_data, stats
 
 
-def export_leads(leads: list, output_dir: str = OUTPUT_DIR):
-    """Export leads to CSV and JSON files"""
+def export_leads(leads: list, output_dir: str = OUTPUT_DIR, formats: list = None, run_id: str = None):
+    """Export leads to CSV, Parquet and/or JSON files"""
     if not leads:
         print("No leads to export.")
         return
     
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
-    
-    # Export to CSV
-    csv_data = []
-    for lead in leads:
-        flagged = lead.get("flagged_reviews", [])
-        top_violations = flagged[:3]
-        
-        row = {
-            "business_name": lead["name"],
-            "website_url": lead.get("website", ""),
-            "email": lead.get("email", ""),
-            "phone": lead.get("phone", ""),
-            "rating": lead.get("rating", 0.0),
-            "review_count": lead.get("review_count", 0),
-            "violations_count": len(flagged),
-            "zip_code": lead.get("zip_code", ""),
-            "category": lead.get("category", ""),
-        }
-        
-        for i in range(3):
-            if i < len(top_violations):
-                v = top_violations[i]
-                row[f"review_{i+1}_text"] = v["text"]
-                row[f"review_{i+1}_reason"] = v["classification"]["reasoning"]
-                row[f"review_{i+1}_confidence"] = round(v["classification"]["confidence"], 2)
-                row[f"review_{i+1}_rating"] = v["rating"]
-                row[f"review_{i+1}_reviewer"] = v["reviewer_name"]
-                row[f"review_{i+1}_date"] = v["date"]
-            else:
-                row[f"review_{i+1}_text"] = ""
-                row[f"review_{i+1}_reason"] = ""
-                row[f"review_{i+1}_confidence"] = ""
-                row[f"review_{i+1}_rating"] = ""
-                row[f"review_{i+1}_reviewer"] = ""
-                row[f"review_{i+1}_date"] = ""
-        
-        csv_data.append(row)
+    formats = EXPORT_FORMATS if formats is None else formats
+    timestamp = run_id or datetime.now().strftime("%Y-%m-%d_%H-%M")
+    
+    if "csv" in formats:
+        # Same schema as the live lead files
+        df = leads_to_wide(leads)
+        csv_path = f"{output_dir}/violations_leads_{timestamp}.csv"
+        df.to_csv(csv_path, index=False)
+        print(f"\n✅ Exported {len(leads)} leads to {csv_path}")
     
-    df = pd.DataFrame(csv_data)
-    csv_path = f"{output_dir}/violations_leads_{timestamp}.csv"
-    df.to_csv(csv_path, index=False)
-    print(f"\n✅ Exported {len(leads)} leads to {csv_path}")
+    if "parquet" in formats:
+        paths = export_parquet(leads, output_dir, timestamp)
+        print(f"✅ Exported columnar data to {paths['leads']} and {paths['flagged_reviews']}")
     
-    # Export to JSON
-    json_path = f"{output_dir}/violations_details_{timestamp}.json"
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(leads, f, indent=2, ensure_ascii=False)
-    print(f"✅ Exported detailed data to {json_path}")
+    if "json" in formats:
+        json_path = f"{output_dir}/violations_details_{timestamp}.json"
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(leads, f, indent=2, ensure_ascii=False)
+        print(f"✅ Exported detailed data to {json_path}")
 
 
 if __name__ == "__main__":
     # Example usage
     zip_codes = ["92100", "92200"]
     leads, training_data, stats = asyncio.run(run_scraper(zip_codes=zip_codes))
-    export_leads(leads)
+    # run_scraper already exported the run's Parquet - a second copy would list every lead twice in Past Results
+    export_leads(leads, formats=[f for f in EXPORT_FORMATS if f != "parquet"])
     print(f"\n📊 Stats: {stats}")
@@ -0,0 +1,418 @@
+"""
+VARDA Worker
+Runs scraping jobs in their own process, behind a small local HTTP job API, so
+the dashboard only renders and a UI restart doesn't touch a running job.
+Run with: python worker.py  (the dashboard starts one itself if none is running)
+
+    POST /jobs                        {"zip_codes": [...], "filters": {...}} -> job
+    GET  /jobs                        every job, newest first
+    GET  /jobs/<job_id>               status, stats and lead count
+    POST /jobs/<job_id>/cancel        stop the job (or drop it if still queued)
+    GET  /jobs/<job_id>/events?offset=N&wait=S&limit=L
+                                      replay the job's events from offset N, waiting up to S seconds for new ones
+    POST /jobs/<job_id>/subscribe     {"offset": N} -> subscription with its own buffer (from N, or only new events)
+    GET  /subscriptions/<id>?wait=S&limit=L
+                                      buffered events, plus how many were dropped because the reader fell behind
+    DELETE /subscriptions/<id>
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import queue
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from event_bus import EventBus, JobChannel
+from varda_scraper import run_scraper
+
+WORKER_HOST = os.getenv("WORKER_HOST", "127.0.0.1")
+WORKER_PORT = int(os.getenv("WORKER_PORT", "8765"))
+WORKER_URL = os.getenv("WORKER_URL", f"http://{WORKER_HOST}:{WORKER_PORT}")
+MAX_EVENT_WAIT = 25.0  # Seconds an events request may block waiting for new events
+WORKER_START_TIMEOUT = 20.0  # Seconds the dashboard waits for a spawned worker to answer
+
+FINISHED_JOB_TTL_SECONDS = float(os.getenv("FINISHED_JOB_TTL_SECONDS", "3600"))  # Finished jobs (and their event logs) kept this long
+MAX_FINISHED_JOBS = int(os.getenv("MAX_FINISHED_JOBS", "20"))  # ...and never more than this many
+
+ACTIVE_STATUSES = ("queued", "running", "cancelling")
+
+
+def user_message(e: Exception) -> str:
+    """Short explanation of a failed job for the dashboard"""
+    error_str = str(e)
+    if "Executable doesn't exist" in error_str or "playwright install" in error_str.lower():
+        return "Playwright browsers not installed. Please run: playwright install chromium"
+    if "NotImplementedError" in error_str:
+        return "Windows event loop issue. Please restart the worker."
+    return f"Error: {error_str[:200]}"  # Truncate long errors
+
+
+#######################################################################
+# JOBS
+#######################################################################
+
+class Job:
+    """One run_scraper call and everything it reported"""
+
+    def __init__(self, zip_codes: list, filters: dict, bus: EventBus):
+        self.job_id = f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{uuid.uuid4().hex[:6]}"
+        self.zip_codes = zip_codes
+        self.filters = {**(filters or {}), "run_id": self.job_id}  # Same key in the results store
+        self.status = "queued"
+        self.submitted_at = datetime.now().isoformat(timespec="seconds")
+        self.started_at = None
+        self.finished_at = None
+        self.finished_time = None  # time.time() of finished_at, for eviction
+        self.stats = {}
+        self.leads = 0
+        self.error = None
+        self.channel: JobChannel = bus.channel(self.job_id)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._task = None
+
+    def emit(self, update: dict):
+        """progress_callback for run_scraper - called from the job's event loop thread"""
+        if update.get("status") == "lead_found":
+            self.leads += 1
+        elif update.get("status") == "completed":
+            self.stats = update.get("stats", {})
+        self.channel.publish(update)
+
+    def set_status(self, status: str):
+        with self._lock:
+            self.status = status
+            if status not in ACTIVE_STATUSES:
+                self.finished_at = datetime.now().isoformat(timespec="seconds")
+                self.finished_time = time.time()
+                self.channel.close()
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "zip_codes": self.zip_codes,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "leads": self.leads,
+            "events": self.channel.next_offset,
+            "stats": self.stats,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """
+    Runs submitted jobs one at a time (they share the browser profile) on a background thread.
+    Finished jobs are dropped with their event channels after `finished_ttl` seconds, or once more
+    than `max_finished` have finished - their results stay in the results store.
+    """
+
+    def __init__(self, finished_ttl: float = FINISHED_JOB_TTL_SECONDS, max_finished: int = MAX_FINISHED_JOBS):
+        self.bus = EventBus()
+        self.jobs = {}
+        self.finished_ttl = finished_ttl
+        self.max_finished = max_finished
+        self._pending = queue.Queue()
+        self._lock = threading.Lock()
+        self._runner = threading.Thread(target=self._run_forever, daemon=True)
+        self._runner.start()
+
+    def submit(self, zip_codes: list, filters: dict) -> Job:
+        self.evict_finished()
+        job = Job(zip_codes, filters, self.bus)
+        with self._lock:
+            self.jobs[job.job_id] = job
+        self._pending.put(job)
+        return job
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self) -> list:
+        self.evict_finished()
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return sorted(jobs, key=lambda job: job.submitted_at, reverse=True)
+
+    def evict_finished(self):
+        """Drop finished jobs past the TTL or beyond the newest `max_finished`"""
+        cutoff = time.time() - self.finished_ttl
+        with self._lock:
+            finished = sorted((job for job in self.jobs.values() if job.finished_time is not None),
+                              key=lambda job: job.finished_time, reverse=True)
+            evicted = [job for idx, job in enumerate(finished) if idx >= self.max_finished or job.finished_time < cutoff]
+            for job in evicted:
+                del self.jobs[job.job_id]
+        for job in evicted:
+            self.bus.remove_channel(job.job_id)
+
+    def cancel(self, job_id: str) -> Job:
+        job = self.get(job_id)
+        if job is None or job.status not in ACTIVE_STATUSES:
+            return job
+        if job.status == "queued":
+            job.set_status("cancelled")
+        else:
+            job.set_status("cancelling")
+            if job._loop is not None and job._task is not None:
+                job._loop.call_soon_threadsafe(job._task.cancel)
+        return job
+
+    def _run_forever(self):
+        if platform.system() == 'Windows':
+            # Playwright needs subprocess support from the event loop
+            asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+        while True:
+            job = self._pending.get()
+            if job.status == "queued":
+                self._run(job)
+            self.evict_finished()
+
+    def _run(self, job: Job):
+        job.started_at = datetime.now().isoformat(timespec="seconds")
+        job.set_status("running")
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            job._task = loop.create_task(run_scraper(zip_codes=job.zip_codes, progress_callback=job.emit, filters=job.filters))
+            job._loop = loop
+            if job.status == "cancelling":
+                job._task.cancel()  # Cancelled before the loop got going
+            loop.run_until_complete(job._task)
+            job.set_status("completed")
+        except asyncio.CancelledError:
+            job.emit({"status": "cancelled", "message": "Job cancelled"})
+            job.set_status("cancelled")
+        except Exception as e:
+            print(f"ERROR: Job {job.job_id} failed: {e}\n{traceback.format_exc()}")
+            job.error = user_message(e)
+            job.emit({"status": "error", "message": job.error})
+            job.set_status("failed")
+        finally:
+            job._loop = None
+            loop.close()
+
+
+#######################################################################
+# HTTP API
+#######################################################################
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    manager: JobManager = None
+
+    def log_message(self, format, *args):
+        pass  # Polled constantly - keep the console for scraper output
+
+    def _send(self, code: int, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self):
+        url = urllib.parse.urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        params = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+        return parts, params
+
+    def do_GET(self):
+        parts, params = self._route()
+        if parts == ["health"]:
+            return self._send(200, {"status": "ok"})
+        if parts == ["jobs"]:
+            return self._send(200, [job.to_dict() for job in self.manager.list()])
+        if len(parts) >= 2 and parts[0] == "jobs":
+            job = self.manager.get(parts[1])
+            if job is None:
+                return self._send(404, {"error": f"Unknown job: {parts[1]}"})
+            if len(parts) == 2:
+                return self._send(200, job.to_dict())
+            if parts[2:] == ["events"]:
+                offset = int(params.get("offset", 0))
+                wait = min(float(params.get("wait", 0)), MAX_EVENT_WAIT)
+                events, missed = job.channel.replay(offset, wait, int(params.get("limit", 500)))
+                next_offset = offset + missed + len(events)
+                return self._send(200, {"events": events, "missed": missed, "next_offset": next_offset, "status": job.status})
+        if len(parts) == 2 and parts[0] == "subscriptions":
+            wait = min(float(params.get("wait", 0)), MAX_EVENT_WAIT)
+            batch = self.manager.bus.read(parts[1], wait, int(params.get("limit", 500)))
+            if batch is None:
+                return self._send(404, {"error": f"Unknown subscription: {parts[1]}"})
+            return self._send(200, batch)
+        self._send(404, {"error": "Not found"})
+
+    def do_DELETE(self):
+        parts, _ = self._route()
+        if len(parts) == 2 and parts[0] == "subscriptions":
+            self.manager.bus.unsubscribe(parts[1])
+            return self._send(200, {"subscriber_id": parts[1]})
+        self._send(404, {"error": "Not found"})
+
+    def do_POST(self):
+        parts, _ = self._route()
+        if parts == ["jobs"]:
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self._send(400, {"error": "Body must be JSON"})
+            if not body.get("zip_codes") and not (body.get("filters") or {}).get("businesses"):
+                return self._send(400, {"error": "zip_codes is required"})
+            job = self.manager.submit(body.get("zip_codes") or [], body.get("filters") or {})
+            return self._send(201, job.to_dict())
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "subscribe":
+            job = self.manager.get(parts[1])
+            if job is None:
+                return self._send(404, {"error": f"Unknown job: {parts[1]}"})
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self._send(400, {"error": "Body must be JSON"})
+            subscription = self.manager.bus.subscribe(job.job_id, body.get("offset"))
+            return self._send(201, {"subscriber_id": subscription.subscriber_id, "job_id": job.job_id})
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "cancel":
+            job = self.manager.cancel(parts[1])
+            if job is None:
+                return self._send(404, {"error": f"Unknown job: {parts[1]}"})
+            return self._send(200, job.to_dict())
+        self._send(404, {"error": "Not found"})
+
+
+def serve(host: str = WORKER_HOST, port: int = WORKER_PORT):
+    JobRequestHandler.manager = JobManager()
+    server = ThreadingHTTPServer((host, port), JobRequestHandler)
+    server.daemon_threads = True
+    print(f"🛠️ VARDA worker listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+#######################################################################
+# CLIENT
+#######################################################################
+
+class WorkerError(Exception):
+    def __init__(self, message: str, status: int = None):
+        super().__init__(message)
+        self.status = status  # HTTP status, None when the worker could not be reached
+
+
+class WorkerClient:
+    """What the dashboard uses to talk to the worker"""
+
+    def __init__(self, base_url: str = WORKER_URL, timeout: float = 5.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, payload=None, timeout: float = None):
+        data = json.dumps(payload, default=str).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", str(e))
+            except ValueError:
+                message = str(e)
+            raise WorkerError(message, e.code) from e
+        except (urllib.error.URLError, OSError) as e:
+            raise WorkerError(f"Worker not reachable at {self.base_url}: {e}") from e
+
+    def healthy(self) -> bool:
+        try:
+            return self._request("GET", "/health", timeout=1.0).get("status") == "ok"
+        except WorkerError:
+            return False
+
+    def submit(self, zip_codes: list, filters: dict) -> dict:
+        return self._request("POST", "/jobs", {"zip_codes": zip_codes, "filters": filters})
+
+    def jobs(self) -> list:
+        return self._request("GET", "/jobs")
+
+    def status(self, job_id: str) -> dict:
+        return self._request("GET", f"/jobs/{urllib.parse.quote(job_id)}")
+
+    def cancel(self, job_id: str) -> dict:
+        return self._request("POST", f"/jobs/{urllib.parse.quote(job_id)}/cancel")
+
+    def events(self, job_id: str, offset: int = 0, wait: float = 0.0, limit: int = 500) -> dict:
+        query = urllib.parse.urlencode({"offset": offset, "wait": wait, "limit": limit})
+        return self._request("GET", f"/jobs/{urllib.parse.quote(job_id)}/events?{query}", timeout=self.timeout + wait)
+
+    def subscribe(self, job_id: str, offset: int = None) -> str:
+        return self._request("POST", f"/jobs/{urllib.parse.quote(job_id)}/subscribe", {"offset": offset})["subscriber_id"]
+
+    def read(self, subscriber_id: str, wait: float = 0.0, limit: int = 500) -> dict:
+        query = urllib.parse.urlencode({"wait": wait, "limit": limit})
+        return self._request("GET", f"/subscriptions/{urllib.parse.quote(subscriber_id)}?{query}", timeout=self.timeout + wait)
+
+    def unsubscribe(self, subscriber_id: str):
+        self._request("DELETE", f"/subscriptions/{urllib.parse.quote(subscriber_id)}")
+
+
+def ensure_worker(client: WorkerClient, output_dir: str = None) -> bool:
+    """
+    Start a detached worker process if none answers, and wait until it does.
+    The worker runs from the script directory, so it gets `output_dir` as an absolute OUTPUT_DIR
+    and writes where the dashboard reads; its output goes to worker.log there.
+    """
+    if client.healthy():
+        return True
+    env = dict(os.environ)
+    log = subprocess.DEVNULL
+    if output_dir:
+        env["OUTPUT_DIR"] = os.path.abspath(output_dir)
+        log = open(os.path.join(output_dir, "worker.log"), "a", encoding="utf-8")
+    kwargs = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP} if platform.system() == 'Windows' else {"start_new_session": True}
+    try:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env, stdout=log, stderr=subprocess.STDOUT, **kwargs,
+        )
+    finally:
+        if log is not subprocess.DEVNULL:
+            log.close()  # The worker has its own copy of the handle
+    deadline = time.time() + WORKER_START_TIMEOUT
+    while time.time() < deadline:
+        if client.healthy():
+            return True
+        time.sleep(0.25)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the VARDA scraping worker")
+    parser.add_argument("--host", default=WORKER_HOST)
+    parser.add_argument("--port", type=int, default=WORKER_PORT)
+    args = parser.parse_args()
+    serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()